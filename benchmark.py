@@ -0,0 +1,873 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import csv
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from livraria_async import AsyncDatabaseManager
+from livraria_http import ServidorLivraria
+from sistema_livraria import (CAMPOS_IMPORTACAO, COLUNAS_CSV, CacheLRU, CatalogoCompacto, DatabaseManager,
+                              FORMATOS_ARQUIVO, PERFIS_DURABILIDADE, SistemaLivraria, _validar_colunas,
+                              formato_do_arquivo)
+
+
+def preparar_banco(diretorio: Path, quantidade: int, nome: str = "benchmark.db",
+                   perfil: str = 'balanced') -> str:
+    caminho_db = str(diretorio / nome)
+    DatabaseManager(caminho_db, perfil=perfil).close()
+
+    with sqlite3.connect(caminho_db) as conn:
+        conn.executemany(
+            'INSERT INTO livros (titulo, autor, ano_publicacao, preco) VALUES (?, ?, ?, ?)',
+            ((f"Livro {i}", f"Autor {i % 100}", 1900 + i % 120, 10 + i % 90) for i in range(quantidade))
+        )
+    return caminho_db
+
+
+def medir_busca_por_id(caminho_db: str, tamanho_pool: int, operacoes: int, quantidade: int) -> float:
+    rnd = random.Random(42)
+    ids = [rnd.randint(1, quantidade) for _ in range(operacoes)]
+
+    with DatabaseManager(caminho_db, tamanho_pool) as db:
+        inicio = time.perf_counter()
+        for id_livro in ids:
+            db.obter_livro_por_id(id_livro)
+        duracao = time.perf_counter() - inicio
+
+    return operacoes / duracao
+
+
+def benchmark_pool(args):
+    print(f"Busca por ID: {args.operacoes} operações sobre {args.livros} livros\n")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho_db = preparar_banco(Path(diretorio), args.livros)
+
+        sem_pool = medir_busca_por_id(caminho_db, 0, args.operacoes, args.livros)
+        com_pool = medir_busca_por_id(caminho_db, 1, args.operacoes, args.livros)
+
+    print(f"  Sem pool (conexão por chamada): {sem_pool:>12,.0f} ops/s")
+    print(f"  Com pool (conexão reutilizada): {com_pool:>12,.0f} ops/s")
+    print(f"  Ganho: {com_pool / sem_pool:.1f}x")
+
+
+def medir_carga_mista(caminho_db: str, perfil, leitores: int, duracao: float, quantidade: int) -> dict:
+    # Um escritor (um commit por operação) e N leitores disputando o banco pelo tempo informado
+    contagem = {'leituras': 0, 'escritas': 0}
+    lock = threading.Lock()
+    parar = threading.Event()
+
+    with DatabaseManager(caminho_db, leitores + 1, perfil) as db:
+        def escritor():
+            rnd = random.Random(1)
+            escritas = 0
+            while not parar.is_set():
+                if rnd.random() < 0.5:
+                    db.adicionar_livro("Novo livro", "Autor novo", 2000, 10.0)
+                else:
+                    db.atualizar_preco_livro(rnd.randint(1, quantidade), round(rnd.uniform(5, 100), 2))
+                escritas += 1
+            with lock:
+                contagem['escritas'] += escritas
+
+        def leitor(semente: int):
+            rnd = random.Random(semente)
+            leituras = 0
+            while not parar.is_set():
+                db.obter_livro_por_id(rnd.randint(1, quantidade))
+                leituras += 1
+            with lock:
+                contagem['leituras'] += leituras
+
+        threads = [threading.Thread(target=escritor)]
+        threads += [threading.Thread(target=leitor, args=(i,)) for i in range(leitores)]
+        for thread in threads:
+            thread.start()
+        time.sleep(duracao)
+        parar.set()
+        for thread in threads:
+            thread.join()
+
+    return {chave: valor / duracao for chave, valor in contagem.items()}
+
+
+def benchmark_perfis(args):
+    print(f"Carga mista: 1 escritor + {args.leitores} leitores, {args.duracao:.0f}s por perfil, "
+          f"{args.livros} livros\n")
+    print(f"  {'Perfil':<22} {'Leituras/s':>12} {'Escritas/s':>12}")
+
+    perfis = [None] + list(PERFIS_DURABILIDADE)
+    with tempfile.TemporaryDirectory() as diretorio:
+        for perfil in perfis:
+            nome = f"benchmark_{perfil or 'padrao'}.db"
+            caminho_db = preparar_banco(Path(diretorio), args.livros, nome, perfil)
+            resultado = medir_carga_mista(caminho_db, perfil, args.leitores, args.duracao, args.livros)
+            rotulo = perfil or 'padrão do SQLite'
+            print(f"  {rotulo:<22} {resultado['leituras']:>12,.0f} {resultado['escritas']:>12,.0f}")
+
+
+def percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+async def carga_assincrona(caminho_db: str, corrotinas: int, leitores: int, duracao: float,
+                           quantidade: int) -> dict:
+    latencias = []
+    erros = []
+    livros_iterados = 0
+
+    async with AsyncDatabaseManager(caminho_db, leitores) as db:
+        fim = time.perf_counter() + duracao
+
+        async def cliente(semente: int):
+            rnd = random.Random(semente)
+            while time.perf_counter() < fim:
+                sorteio = rnd.random()
+                inicio = time.perf_counter()
+                try:
+                    if sorteio < 0.7:
+                        await db.obter_livro_por_id(rnd.randint(1, quantidade))
+                    elif sorteio < 0.8:
+                        await db.buscar_livros_por_autor(f"Autor {rnd.randint(0, 99)}")
+                    elif sorteio < 0.9:
+                        await db.atualizar_preco_livro(rnd.randint(1, quantidade), round(rnd.uniform(5, 100), 2))
+                    else:
+                        await db.adicionar_livro("Livro novo", "Autor novo", 2000, 10.0)
+                except Exception as e:
+                    erros.append(str(e))
+                latencias.append(time.perf_counter() - inicio)
+
+        async def leitor_do_catalogo():
+            nonlocal livros_iterados
+            while time.perf_counter() < fim:
+                async for _ in db.iterar_livros(tamanho_pagina=500):
+                    livros_iterados += 1
+
+        await asyncio.gather(*(cliente(i) for i in range(corrotinas)),
+                             *(leitor_do_catalogo() for _ in range(2)))
+
+    return {
+        'operacoes_por_segundo': len(latencias) / duracao,
+        'p50_ms': percentil(latencias, 0.50) * 1000,
+        'p99_ms': percentil(latencias, 0.99) * 1000,
+        'erros': erros,
+        'livros_iterados': livros_iterados,
+    }
+
+
+def benchmark_async(args):
+    print(f"Carga assíncrona: {args.corrotinas} corrotinas concorrentes + 2 iterações do catálogo, "
+          f"{args.leitores} threads de leitura, {args.duracao:.0f}s\n")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho_db = preparar_banco(Path(diretorio), args.livros)
+        resultado = asyncio.run(carga_assincrona(caminho_db, args.corrotinas, args.leitores,
+                                                 args.duracao, args.livros))
+
+    print(f"  Operações/s:       {resultado['operacoes_por_segundo']:>10,.0f}")
+    print(f"  Latência p50:      {resultado['p50_ms']:>10.2f} ms")
+    print(f"  Latência p99:      {resultado['p99_ms']:>10.2f} ms")
+    print(f"  Livros iterados:   {resultado['livros_iterados']:>10,}")
+    print(f"  Erros:             {len(resultado['erros']):>10}")
+    for erro in sorted(set(resultado['erros']))[:5]:
+        print(f"    - {erro}")
+
+
+def gerar_csv(caminho: Path, quantidade: int):
+    # Uma linha inválida a cada 1000, para exercitar o relatório de erros
+    with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+        writer = csv.writer(arquivo)
+        writer.writerow([COLUNAS_CSV[campo] for campo in ('titulo', 'autor', 'ano_publicacao', 'preco')])
+        for i in range(quantidade):
+            ano = "sem ano" if i % 1000 == 999 else 1900 + i % 120
+            writer.writerow([f"Livro {i}", f"Autor {i % 100}", ano, f"{10 + i % 90},90"])
+
+
+def medir_importacao(diretorio: Path, arquivo_csv: Path, processos: int) -> tuple:
+    (diretorio / "exports").mkdir(parents=True)
+    shutil.copyfile(arquivo_csv, diretorio / "exports" / arquivo_csv.name)
+    sistema = SistemaLivraria(str(diretorio))
+    try:
+        inicio = time.perf_counter()
+        resultado = sistema.importar_csv_em_fluxo(arquivo_csv.name, retomar=False, processos=processos)
+        duracao = time.perf_counter() - inicio
+    finally:
+        sistema.close()
+    return resultado, duracao
+
+
+def benchmark_importacao(args):
+    print(f"Importação de CSV: {args.livros} linhas com {', '.join(map(str, args.processos))} processo(s)\n")
+    print(f"  {'Processos':>9} {'Tempo':>9} {'Linhas/s':>12} {'Importados':>11} {'Erros':>7}")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivo_csv = Path(diretorio) / "benchmark.csv"
+        gerar_csv(arquivo_csv, args.livros)
+
+        referencia = None
+        for processos in args.processos:
+            resultado, duracao = medir_importacao(Path(diretorio) / f"p{processos}", arquivo_csv, processos)
+            print(f"  {processos:>9} {duracao:>8.2f}s {resultado['linha'] / duracao:>12,.0f} "
+                  f"{resultado['importados']:>11,} {resultado['erros']:>7,}")
+            # O resultado não pode depender da quantidade de processos
+            contagem = (resultado['importados'], resultado['erros'])
+            if referencia is not None and contagem != referencia:
+                print("  AVISO: resultado diferente da primeira execução")
+            referencia = referencia or contagem
+
+
+def benchmark_formatos(args):
+    print(f"Formatos de arquivo: exportação e leitura + validação de {args.livros} livros\n")
+    print(f"  {'Formato':<18} {'Exportação':>11} {'Tamanho':>11} {'Leitura':>9} {'Livros/s':>12}")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        (Path(diretorio) / "data").mkdir()
+        preparar_banco(Path(diretorio) / "data", args.livros, "livraria.db")
+        sistema = SistemaLivraria(diretorio)
+        try:
+            for formato in FORMATOS_ARQUIVO:
+                for compactar in (False, True):
+                    rotulo = formato + (" compactado" if compactar else "")
+                    nome = "benchmark" + FORMATOS_ARQUIVO[formato].extensao
+                    try:
+                        inicio = time.perf_counter()
+                        caminho, _ = sistema.gerenciador_arquivos.exportar_em_fluxo(
+                            sistema.db_manager.iterar_livros(), nome, formato, compactar=compactar)
+                        exportacao = time.perf_counter() - inicio
+                    except ImportError as e:
+                        print(f"  {rotulo:<18} ignorado: {e}")
+                        continue
+
+                    # Leitura em lotes de colunas + validação, sem gravar no banco
+                    inicio = time.perf_counter()
+                    lidos = 0
+                    for colunas in sistema.gerenciador_arquivos.iterar_lotes(Path(caminho).name, 10000):
+                        quantidade = len(colunas['titulo'])
+                        _validar_colunas(list(range(lidos + 1, lidos + quantidade + 1)), colunas)
+                        lidos += quantidade
+                    leitura = time.perf_counter() - inicio
+
+                    tamanho_mb = Path(caminho).stat().st_size / 1024 / 1024
+                    print(f"  {rotulo:<18} {exportacao:>10.2f}s {tamanho_mb:>8.1f} MB {leitura:>8.2f}s "
+                          f"{lidos / leitura:>12,.0f}")
+        finally:
+            sistema.close()
+
+
+def carga_http(porta: int, clientes: int, duracao: float, quantidade: int) -> dict:
+    # Clientes com conexão keep-alive: 70% leituras por ID, 15% páginas da listagem (com
+    # If-None-Match, como um navegador com cache), 5% buscas, 7% reajustes e 3% inclusões
+    latencias = []
+    contagem = {'304': 0, 'erros': 0}
+    lock = threading.Lock()
+    fim = time.perf_counter() + duracao
+
+    def cliente(semente: int):
+        rnd = random.Random(semente)
+        conexao = http.client.HTTPConnection("127.0.0.1", porta)
+        etag_listagem = None
+        minhas_latencias = []
+        nao_modificados = erros = novos = 0
+        while time.perf_counter() < fim:
+            sorteio = rnd.random()
+            cabecalhos = {}
+            corpo = None
+            if sorteio < 0.70:
+                metodo, caminho = "GET", f"/livros/{rnd.randint(1, quantidade)}"
+            elif sorteio < 0.85:
+                metodo, caminho = "GET", "/livros?limite=50"
+                if etag_listagem:
+                    cabecalhos['If-None-Match'] = etag_listagem
+            elif sorteio < 0.90:
+                metodo, caminho = "GET", f"/busca?q=Autor {rnd.randint(0, 99)}&limite=20".replace(' ', '%20')
+            elif sorteio < 0.97:
+                metodo, caminho = "PATCH", f"/livros/{rnd.randint(1, quantidade)}"
+                corpo = json.dumps({'preco': round(rnd.uniform(5, 100), 2)})
+            else:
+                novos += 1
+                metodo, caminho = "POST", "/livros"
+                corpo = json.dumps({'titulo': f"Novo {semente}-{novos}", 'autor': "Autor novo",
+                                    'ano_publicacao': 2000, 'preco': 10})
+            inicio = time.perf_counter()
+            conexao.request(metodo, caminho, body=corpo, headers=cabecalhos)
+            resposta = conexao.getresponse()
+            resposta.read()
+            minhas_latencias.append(time.perf_counter() - inicio)
+            if resposta.status == 304:
+                nao_modificados += 1
+            elif resposta.status >= 400:
+                erros += 1
+            if caminho.startswith("/livros?"):
+                etag_listagem = resposta.getheader('ETag')
+        conexao.close()
+        with lock:
+            latencias.extend(minhas_latencias)
+            contagem['304'] += nao_modificados
+            contagem['erros'] += erros
+
+    threads = [threading.Thread(target=cliente, args=(i,)) for i in range(clientes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {
+        'requisicoes_por_segundo': len(latencias) / duracao,
+        'p50_ms': percentil(latencias, 0.50) * 1000,
+        'p99_ms': percentil(latencias, 0.99) * 1000,
+        'nao_modificados': contagem['304'],
+        'erros': contagem['erros'],
+    }
+
+
+def medir_exportacao_http(porta: int) -> tuple:
+    conexao = http.client.HTTPConnection("127.0.0.1", porta)
+    inicio = time.perf_counter()
+    conexao.request("GET", "/exportar?formato=csv")
+    resposta = conexao.getresponse()
+    primeiro_bloco = None
+    total_bytes = 0
+    while True:
+        bloco = resposta.read1(65536)
+        if not bloco:
+            break
+        if primeiro_bloco is None:
+            primeiro_bloco = time.perf_counter() - inicio
+        total_bytes += len(bloco)
+    conexao.close()
+    return primeiro_bloco or 0.0, time.perf_counter() - inicio, total_bytes
+
+
+def benchmark_http(args):
+    print(f"API HTTP: {args.clientes} clientes keep-alive, {args.leitores} conexões de leitura, "
+          f"{args.duracao:.0f}s, {args.livros} livros\n")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        (Path(diretorio) / "data").mkdir()
+        preparar_banco(Path(diretorio) / "data", args.livros, "livraria.db")
+        servidor = ServidorLivraria(("127.0.0.1", 0), diretorio, args.leitores, registrar_acessos=False)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        try:
+            porta = servidor.server_address[1]
+            resultado = carga_http(porta, args.clientes, args.duracao, args.livros)
+            primeiro_bloco, exportacao, total_bytes = medir_exportacao_http(porta)
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
+
+    print(f"  Requisições/s:         {resultado['requisicoes_por_segundo']:>10,.0f}")
+    print(f"  Latência p50:          {resultado['p50_ms']:>10.2f} ms")
+    print(f"  Latência p99:          {resultado['p99_ms']:>10.2f} ms")
+    print(f"  Respostas 304:         {resultado['nao_modificados']:>10,}")
+    print(f"  Erros:                 {resultado['erros']:>10}")
+    print(f"  Exportação CSV:        {exportacao:>10.2f} s ({total_bytes / 1024 / 1024:.1f} MB, "
+          f"primeiro bloco em {primeiro_bloco * 1000:.0f} ms)")
+
+
+# Catálogo sintético para a suíte de benchmarks: nomes e títulos com acentos, poucos autores
+# com muitos livros, anos concentrados nas últimas décadas e preços com cauda longa.
+# Determinístico: a mesma semente e o mesmo tamanho geram sempre o mesmo catálogo.
+
+PRENOMES = [
+    "João", "José", "Antônio", "Francisco", "Luís", "Sebastião", "Raimundo", "Inácio", "Joaquim", "Estêvão",
+    "André", "Vinícius", "Caetano", "Álvaro", "Rogério", "Fábio", "Márcio", "Túlio", "Otávio", "Cássio",
+    "Heitor", "Simão", "Mário", "Aurélio", "Jerônimo", "Lúcio", "Gonçalo", "Tomás", "Flávio", "Sérgio",
+    "Maria", "Ana", "Conceição", "Inês", "Cecília", "Clarice", "Lígia", "Raquel", "Adélia", "Hilda",
+    "Márcia", "Lúcia", "Letícia", "Mônica", "Débora", "Patrícia", "Vitória", "Glória", "Júlia", "Beatriz",
+    "Fátima", "Luíza", "Helena", "Estela", "Irene", "Dóris", "Aurora", "Rosário", "Sônia", "Élida",
+]
+SOBRENOMES = [
+    "Silva", "Araújo", "Gonçalves", "Magalhães", "Simões", "Brandão", "Assunção", "Conceição", "Fonsêca", "Guimarães",
+    "Mendonça", "Quintão", "Sá", "Veríssimo", "Andrade", "Meireles", "Lispector", "Queiroz", "Telles", "Fagundes",
+    "Romão", "Falcão", "Lobão", "Azevêdo", "Macêdo", "Pestana", "Galvão", "Bastião", "Loureiro", "Nóbrega",
+    "Peçanha", "Sarmento", "Cortês", "Leão", "Correia", "Damásio", "Gusmão", "Ribeiro", "Tavares", "Antunes",
+    "Barbosa", "Camões", "Drummond", "Esteves", "Feitosa", "Granja", "Holanda", "Jardim", "Lacerda", "Moraes",
+    "Nogueira", "Otoni", "Prado", "Quaresma", "Rocha", "Salgado", "Teixeira", "Valadão", "Xavier", "Zózimo",
+]
+SUBSTANTIVOS = [
+    "O Cortiço", "A Moreninha", "O Sertão", "As Memórias", "A Cidade", "O Coração", "A Noite", "O Mar",
+    "A Viagem", "O Tempo", "A Lição", "O Silêncio", "A Paixão", "O Relógio", "A Ilha", "O Jardim",
+    "A Canção", "O Espelho", "A Herança", "O Segredo", "A Estação", "O Sonho", "A Memória", "O Caminho",
+    "A Sombra", "O Rio", "A Floresta", "O Último Verão", "A Promessa", "O Retrato", "A Pérola", "O Ônibus",
+    "A Máquina", "O Órfão", "A Ausência", "O Vôo", "A Cartomante", "O Alienista", "A Hora", "O Mistério",
+    "As Crônicas", "Os Sertões", "A Maçã", "O Pássaro", "A Legião", "O Tesouro", "A Árvore", "O Cântico",
+    "A Travessia", "O Pêndulo", "A Ópera", "O Naufrágio", "As Águas", "O Açude", "A Tempestade", "O Exílio",
+    "A Vigília", "O Poço", "A Fábula", "O Labirinto",
+]
+COMPLEMENTOS = [
+    "do Sertão", "da Meia-Noite", "de Açúcar", "sem Nome", "das Águas", "do Além", "de Inverno", "da Aurora",
+    "dos Ventos", "de São Paulo", "do Maranhão", "de Minas", "em Chamas", "à Beira-Mar", "de Cristal",
+    "da Solidão", "das Estrelas", "do Pântano", "de Ébano", "dos Irmãos", "da Conceição", "de Verão",
+    "do Norte", "da Esperança", "sob a Chuva", "entre Nós", "para Sempre", "de Ninguém", "do Capitão",
+    "da Ilusão", "de Pedra", "do Vigário", "da Serra", "dos Órfãos", "em Lisboa", "no Recôncavo",
+    "do Pajé", "da Lagoa", "de Papel", "do Império", "das Sombras", "da Saudade", "do Avô", "de Março",
+    "da Fé", "do Oráculo", "sem Volta", "de Marfim", "da Colônia", "do Porão", "das Cinzas", "em Silêncio",
+    "de Outono", "do Cangaço", "da Várzea", "do Farol", "das Marés", "de Belém", "do Acaso", "da Razão",
+]
+ANO_BASE_CATALOGO = 2024
+
+
+class GeradorCatalogo:
+    # Gera os livros 0..total-1 de um catálogo sintético. Cada índice tem um título único
+    # (uma permutação dos índices sobre as combinações de título e subtítulo), então os
+    # livros nunca colidem na chave natural, com qualquer tamanho de catálogo.
+    def __init__(self, total: int, semente: int = 42):
+        self.total = total
+        self.semente = semente
+        self.titulos_principais = len(SUBSTANTIVOS) * len(COMPLEMENTOS)
+        # Catálogos pequenos só têm títulos curtos; os grandes ganham subtítulos
+        self.modulo = self.titulos_principais * max(1, -(-total // self.titulos_principais))
+        # Um autor a cada 20 livros, até esgotar as combinações de nome e dois sobrenomes
+        self.autores = min(len(PRENOMES) * len(SOBRENOMES) ** 2, max(50, total // 20))
+
+    def titulo(self, indice: int) -> str:
+        # 2147483647 é primo e não divide o módulo: a multiplicação é uma permutação
+        posicao = (indice * 2147483647 + self.semente) % self.modulo
+        subtitulo, principal = divmod(posicao, self.titulos_principais)
+        substantivo, complemento = divmod(principal, len(COMPLEMENTOS))
+        titulo = f"{SUBSTANTIVOS[substantivo]} {COMPLEMENTOS[complemento]}"
+        if subtitulo:
+            volume, subtitulo = divmod(subtitulo - 1, self.titulos_principais)
+            substantivo, complemento = divmod(subtitulo, len(COMPLEMENTOS))
+            titulo += f": {SUBSTANTIVOS[substantivo]} {COMPLEMENTOS[complemento]}"
+            if volume:
+                titulo += f", Volume {volume + 1}"
+        return titulo
+
+    def autor(self, posicao: int) -> str:
+        # posicao 0 é o autor mais publicado; a multiplicação espalha os mais publicados
+        # pelos nomes, para que não compartilhem todos o mesmo sobrenome
+        numero = (posicao * 1000003) % self.autores
+        prenome, numero = numero % len(PRENOMES), numero // len(PRENOMES)
+        # Deslocar o sobrenome pelo prenome varia os sobrenomes também nos catálogos pequenos
+        sobrenome = (numero + prenome * 7) % len(SOBRENOMES)
+        nome = f"{PRENOMES[prenome]} {SOBRENOMES[sobrenome]}"
+        if numero >= len(SOBRENOMES):
+            nome += f" {SOBRENOMES[numero // len(SOBRENOMES) % len(SOBRENOMES)]}"
+        return nome
+
+    def sortear_autor(self, rnd: random.Random) -> str:
+        # Distribuição de cauda longa: 1% dos autores fica com ~16% dos livros
+        return self.autor(int(self.autores * rnd.random() ** 2.5))
+
+    def livros(self, inicio: int = 0, fim: Optional[int] = None) -> Iterator[Tuple[str, str, int, float]]:
+        rnd = random.Random(self.semente * 1000003 + inicio)
+        for indice in range(inicio, self.total if fim is None else fim):
+            ano = max(1500, ANO_BASE_CATALOGO - int(rnd.expovariate(1 / 25)))
+            preco = max(4.9, round(rnd.lognormvariate(3.6, 0.5)) - 0.1)
+            yield self.titulo(indice), self.sortear_autor(rnd), ano, preco
+
+
+def gerar_catalogo(args):
+    # Grava o catálogo sintético em um arquivo, para testar importações fora da suíte
+    caminho = Path(args.arquivo)
+    formato = formato_do_arquivo(caminho.name)
+    gerador = GeradorCatalogo(args.livros, args.semente)
+    inicio = time.perf_counter()
+    total = FORMATOS_ARQUIVO[formato].exportar(gerador.livros(), caminho, CAMPOS_IMPORTACAO,
+                                              caminho.suffix == '.gz')
+    print(f"✓ {total:,} livros gravados em {caminho} ({time.perf_counter() - inicio:.1f}s)")
+
+
+# Suíte reproduzível: cada cenário devolve {métrica: {'valor', 'unidade', 'maior_melhor'}}.
+# Métricas com maior_melhor None são só informativas e não entram na comparação.
+
+def _metrica(valor: float, unidade: str, maior_melhor: Optional[bool] = True) -> dict:
+    return {'valor': round(valor, 6), 'unidade': unidade, 'maior_melhor': maior_melhor}
+
+
+def _medir_latencias(operacoes: list, funcao) -> dict:
+    latencias = []
+    inicio = time.perf_counter()
+    for argumento in operacoes:
+        antes = time.perf_counter()
+        funcao(argumento)
+        latencias.append(time.perf_counter() - antes)
+    duracao = time.perf_counter() - inicio
+    return {
+        'ops_por_s': _metrica(len(operacoes) / duracao, 'ops/s'),
+        'p50_ms': _metrica(percentil(latencias, 0.50) * 1000, 'ms', False),
+        'p99_ms': _metrica(percentil(latencias, 0.99) * 1000, 'ms', False),
+    }
+
+
+def _melhor_de(repeticoes: int, medir) -> dict:
+    # Leituras são repetidas e fica a execução mais rápida, a menos afetada por ruído
+    return max((medir() for _ in range(repeticoes)), key=lambda resultado: resultado['ops_por_s']['valor'])
+
+
+def cenario_insercao(contexto: dict) -> dict:
+    args, gerador, db = contexto['args'], contexto['gerador'], contexto['sistema'].db_manager
+    inicio = time.perf_counter()
+    inseridos, erros = db.adicionar_livros_em_lote(gerador.livros(0, args.livros), 5000)
+    duracao = time.perf_counter() - inicio
+    if erros:
+        raise RuntimeError(f"{len(erros)} livros sintéticos rejeitados, ex.: {erros[0][1]}")
+
+    # Inserções avulsas (uma transação cada) com os livros seguintes do mesmo catálogo
+    avulsos = list(gerador.livros(args.livros, args.livros + args.insercoes))
+    resultado = _medir_latencias(avulsos, lambda livro: db.adicionar_livro(*livro))
+    return {
+        'lote_livros_por_s': _metrica(inseridos / duracao, 'livros/s'),
+        'lote_segundos': _metrica(duracao, 's', None),
+        **{f"avulsa_{nome}": valor for nome, valor in resultado.items()},
+    }
+
+
+def cenario_carga_em_massa(contexto: dict) -> dict:
+    # Duas cargas do tamanho do catálogo num banco próprio: a primeira com o banco vazio, a
+    # segunda sobre os livros da primeira (como ao importar o arquivo de outra loja). Mede o
+    # custo dos índices, do índice de busca, das estatísticas e do registro de alterações.
+    args = contexto['args']
+    gerador = GeradorCatalogo(2 * args.livros, args.semente)
+    db = DatabaseManager(str(contexto['diretorio'] / "carga_em_massa.db"))
+    try:
+        duracoes = []
+        for inicio in (0, args.livros):
+            antes = time.perf_counter()
+            inseridos, erros = db.adicionar_livros_em_lote(gerador.livros(inicio, inicio + args.livros), 5000)
+            duracoes.append(time.perf_counter() - antes)
+            if erros:
+                raise RuntimeError(f"{len(erros)} livros sintéticos rejeitados, ex.: {erros[0][1]}")
+    finally:
+        db.close()
+    return {
+        'vazio_livros_por_s': _metrica(args.livros / duracoes[0], 'livros/s'),
+        'sobre_catalogo_livros_por_s': _metrica(args.livros / duracoes[1], 'livros/s'),
+        'total_segundos': _metrica(sum(duracoes), 's', None),
+    }
+
+
+def cenario_busca_id(contexto: dict) -> dict:
+    args, db = contexto['args'], contexto['sistema'].db_manager
+    rnd = random.Random(args.semente)
+    ids = [rnd.randint(1, args.livros) for _ in range(args.operacoes)]
+    return _melhor_de(args.repeticoes, lambda: _medir_latencias(ids, db.obter_livro_por_id))
+
+
+def cenario_busca_autor(contexto: dict) -> dict:
+    args, gerador, db = contexto['args'], contexto['gerador'], contexto['sistema'].db_manager
+    rnd = random.Random(args.semente)
+    autores = [gerador.sortear_autor(rnd) for _ in range(max(1, args.operacoes // 10))]
+    resultado = _melhor_de(args.repeticoes, lambda: _medir_latencias(autores, db.buscar_livros_por_autor))
+    encontrados = sum(len(db.buscar_livros_por_autor(autor)) for autor in autores[:100])
+    resultado['livros_por_busca'] = _metrica(encontrados / min(100, len(autores)), 'livros', None)
+    return resultado
+
+
+def cenario_listagem(contexto: dict) -> dict:
+    args, db = contexto['args'], contexto['sistema'].db_manager
+
+    def percorrer_catalogo():
+        inicio = time.perf_counter()
+        total = sum(1 for _ in db.iterar_livros())
+        return {'ops_por_s': _metrica(total / (time.perf_counter() - inicio), 'livros/s')}
+
+    def paginar():
+        # Primeiras páginas da listagem por título, como na tela "Exibir todos os livros"
+        paginas = []
+        chave = None
+        for _ in range(min(200, max(1, args.livros // 50))):
+            pagina = db.listar_livros(chave, 50)
+            paginas.append(pagina)
+            if len(pagina) < 50:
+                break
+            chave = db.chave_listagem(pagina[-1], 'titulo')
+        return len(paginas)
+
+    completa = _melhor_de(args.repeticoes, percorrer_catalogo)
+    inicio = time.perf_counter()
+    paginas = sum(paginar() for _ in range(args.repeticoes))
+    return {
+        'completa_livros_por_s': completa['ops_por_s'],
+        'paginas_por_s': _metrica(paginas / (time.perf_counter() - inicio), 'páginas/s'),
+    }
+
+
+def cenario_exportacao(contexto: dict) -> dict:
+    sistema = contexto['sistema']
+    inicio = time.perf_counter()
+    caminho, total = sistema.gerenciador_arquivos.exportar_em_fluxo(sistema.db_manager.iterar_livros(),
+                                                                   "suite.csv", 'csv')
+    duracao = time.perf_counter() - inicio
+    return {
+        'livros_por_s': _metrica(total / duracao, 'livros/s'),
+        'tamanho_mb': _metrica(Path(caminho).stat().st_size / 1024 / 1024, 'MB', None),
+    }
+
+
+def cenario_importacao(contexto: dict) -> dict:
+    # Importa o catálogo sintético em um banco vazio, pelo mesmo caminho do menu
+    args, gerador = contexto['args'], contexto['gerador']
+    diretorio = contexto['diretorio'] / "importacao"
+    (diretorio / "exports").mkdir(parents=True)
+    FORMATOS_ARQUIVO['csv'].exportar(gerador.livros(0, args.livros), diretorio / "exports" / "suite.csv",
+                                     CAMPOS_IMPORTACAO, False)
+    sistema = SistemaLivraria(str(diretorio))
+    try:
+        inicio = time.perf_counter()
+        resultado = sistema.importar_csv_em_fluxo("suite.csv", retomar=False, processos=args.processos)
+        duracao = time.perf_counter() - inicio
+    finally:
+        sistema.close()
+    if resultado['erros']:
+        raise RuntimeError(f"{resultado['erros']} linhas sintéticas rejeitadas na importação")
+    return {'livros_por_s': _metrica(resultado['importados'] / duracao, 'livros/s')}
+
+
+def cenario_catalogo_compacto(contexto: dict) -> dict:
+    # Cópia em memória para leitura: carga inicial, memória por livro (comparada à lista
+    # de tuplas de obter_todos_livros), busca por id sem SQL e atualização incremental
+    args, db = contexto['args'], contexto['sistema'].db_manager
+    inicio = time.perf_counter()
+    catalogo = CatalogoCompacto(db)
+    carga = time.perf_counter() - inicio
+    bytes_tuplas = CacheLRU._estimar_tamanho(db.obter_todos_livros())
+
+    rnd = random.Random(args.semente)
+    ids = [rnd.randint(1, args.livros) for _ in range(args.operacoes)]
+    resultado = _melhor_de(args.repeticoes, lambda: _medir_latencias(ids, catalogo.obter_por_id))
+
+    for _ in range(100):
+        db.atualizar_preco_livro(rnd.randint(1, args.livros), round(rnd.uniform(5, 100), 2))
+    inicio = time.perf_counter()
+    catalogo.atualizar()
+    atualizacao = time.perf_counter() - inicio
+    catalogo.buscar_por_preco(0, 0)  # ordenação por preço, montada na primeira consulta
+    inicio = time.perf_counter()
+    quantidade = len(catalogo.buscar_por_preco(10, 20))
+    faixa = time.perf_counter() - inicio
+    return {
+        'carga_livros_por_s': _metrica(len(catalogo) / carga, 'livros/s'),
+        'bytes_por_livro': _metrica(catalogo.estatisticas()['bytes'] / len(catalogo), 'B', False),
+        'bytes_por_livro_tuplas': _metrica(bytes_tuplas / len(catalogo), 'B', None),
+        **{f"id_{nome}": valor for nome, valor in resultado.items()},
+        'atualizacao_100_ms': _metrica(atualizacao * 1000, 'ms', False),
+        'faixa_preco_livros_por_s': _metrica(quantidade / faixa, 'livros/s'),
+    }
+
+
+def cenario_backup(contexto: dict) -> dict:
+    # O primeiro backup grava todos os blocos; o segundo, depois de algumas alterações, só
+    # os que mudaram. A restauração confere cada bloco antes de remontar o banco.
+    args, sistema = contexto['args'], contexto['sistema']
+    gerenciador = sistema.gerenciador_arquivos
+    inicio = time.perf_counter()
+    nome = gerenciador.criar_backup()
+    duracao = time.perf_counter() - inicio
+    completo = gerenciador.listar_backups()[0]
+
+    rnd = random.Random(args.semente)
+    for _ in range(100):
+        sistema.db_manager.atualizar_preco_livro(rnd.randint(1, args.livros), round(rnd.uniform(5, 100), 2))
+    inicio = time.perf_counter()
+    gerenciador.criar_backup()
+    duracao_seguinte = time.perf_counter() - inicio
+    seguinte = gerenciador.listar_backups()[0]
+
+    inicio = time.perf_counter()
+    gerenciador.verificar_backup(nome)
+    verificacao = time.perf_counter() - inicio
+    tamanho_mb = completo['tamanho'] / 1024 / 1024
+    return {
+        'mb_por_s': _metrica(tamanho_mb / duracao, 'MB/s'),
+        'segundos': _metrica(duracao, 's', None),
+        'tamanho_mb': _metrica(tamanho_mb, 'MB', None),
+        'gravado_mb': _metrica(completo['gravado'] / 1024 / 1024, 'MB', False),
+        'seguinte_segundos': _metrica(duracao_seguinte, 's', False),
+        'seguinte_gravado_kb': _metrica(seguinte['gravado'] / 1024, 'KB', False),
+        'verificacao_mb_por_s': _metrica(tamanho_mb / verificacao, 'MB/s'),
+    }
+
+
+# Em ordem de execução; inserção vem primeiro porque monta o catálogo dos demais
+CENARIOS_SUITE = {
+    'insercao': cenario_insercao,
+    'carga_em_massa': cenario_carga_em_massa,
+    'busca_id': cenario_busca_id,
+    'busca_autor': cenario_busca_autor,
+    'listagem': cenario_listagem,
+    'exportacao': cenario_exportacao,
+    'importacao': cenario_importacao,
+    'catalogo_compacto': cenario_catalogo_compacto,
+    'backup': cenario_backup,
+}
+
+
+def _ambiente() -> dict:
+    return {
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'plataforma': platform.platform(),
+        'processadores': os.cpu_count(),
+    }
+
+
+def benchmark_suite(args):
+    cenarios = [nome for nome in CENARIOS_SUITE if nome == 'insercao' or nome in args.cenarios]
+    print(f"Suíte de benchmarks: {args.livros:,} livros sintéticos (semente {args.semente}), "
+          f"cenários: {', '.join(cenarios)}\n")
+    gerador = GeradorCatalogo(args.livros + args.insercoes, args.semente)
+    resultados = {
+        'versao': 1,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'ambiente': _ambiente(),
+        'parametros': {campo: getattr(args, campo)
+                       for campo in ('livros', 'semente', 'operacoes', 'insercoes', 'repeticoes', 'processos')},
+        'cenarios': {},
+    }
+
+    with tempfile.TemporaryDirectory(dir=args.diretorio_temporario) as diretorio:
+        sistema = SistemaLivraria(str(Path(diretorio) / "catalogo"))
+        contexto = {'args': args, 'gerador': gerador, 'sistema': sistema, 'diretorio': Path(diretorio)}
+        try:
+            for nome in cenarios:
+                inicio = time.perf_counter()
+                metricas = CENARIOS_SUITE[nome](contexto)
+                resultados['cenarios'][nome] = metricas
+                print(f"  {nome} ({time.perf_counter() - inicio:.1f}s)")
+                for metrica, dados in metricas.items():
+                    print(f"    {metrica:<26} {dados['valor']:>14,.3f} {dados['unidade']}")
+        finally:
+            sistema.close()
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultados, arquivo, ensure_ascii=False, indent=2)
+        print(f"\n✓ Resultados salvos em {args.saida}")
+    if args.comparar_com:
+        with open(args.comparar_com, encoding='utf-8') as arquivo:
+            base = json.load(arquivo)
+        return comparar_resultados(base, resultados, args.tolerancia)
+    return 0
+
+
+def comparar_resultados(base: dict, novo: dict, tolerancia: float) -> int:
+    # Variação de cada métrica presente nas duas execuções; piora acima da tolerância
+    # (em %) é regressão. Retorna 1 se houver regressão, para uso em scripts e CI.
+    print(f"\nComparação: {base['data']} -> {novo['data']} (tolerância {tolerancia:.0f}%)")
+    for secao in ('parametros', 'ambiente'):
+        diferencas = [campo for campo in base[secao] if base[secao][campo] != novo[secao].get(campo)]
+        if diferencas:
+            print(f"  AVISO: {secao} diferentes ({', '.join(diferencas)}); a comparação pode não ser justa")
+
+    print(f"\n  {'Métrica':<38} {'Antes':>14} {'Depois':>14} {'Variação':>9}")
+    regressoes = 0
+    for cenario, metricas in novo['cenarios'].items():
+        for metrica, dados in metricas.items():
+            anterior = base['cenarios'].get(cenario, {}).get(metrica)
+            if anterior is None or dados['maior_melhor'] is None or not anterior['valor']:
+                continue
+            variacao = (dados['valor'] - anterior['valor']) / anterior['valor'] * 100
+            piora = -variacao if dados['maior_melhor'] else variacao
+            situacao = ""
+            if piora > tolerancia:
+                situacao = "REGRESSÃO"
+                regressoes += 1
+            elif piora < -tolerancia:
+                situacao = "melhora"
+            print(f"  {cenario + '.' + metrica:<38} {anterior['valor']:>14,.3f} {dados['valor']:>14,.3f} "
+                  f"{variacao:>+8.1f}% {situacao}")
+
+    if regressoes:
+        print(f"\n{regressoes} regressão(ões) acima de {tolerancia:.0f}%")
+        return 1
+    print("\n✓ Nenhuma regressão")
+    return 0
+
+
+def benchmark_comparar(args):
+    with open(args.base, encoding='utf-8') as arquivo:
+        base = json.load(arquivo)
+    with open(args.novo, encoding='utf-8') as arquivo:
+        novo = json.load(arquivo)
+    return comparar_resultados(base, novo, args.tolerancia)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do Sistema de Livraria")
+    subparsers = parser.add_subparsers(dest="cenario", required=True)
+
+    parser_pool = subparsers.add_parser("pool", help="Busca por ID com e sem pool de conexões")
+    parser_pool.add_argument("--livros", type=int, default=10000)
+    parser_pool.add_argument("--operacoes", type=int, default=20000)
+    parser_pool.set_defaults(funcao=benchmark_pool)
+
+    parser_perfis = subparsers.add_parser("perfis", help="Carga mista de leitura/escrita por perfil de durabilidade")
+    parser_perfis.add_argument("--livros", type=int, default=10000)
+    parser_perfis.add_argument("--leitores", type=int, default=4)
+    parser_perfis.add_argument("--duracao", type=float, default=3.0)
+    parser_perfis.set_defaults(funcao=benchmark_perfis)
+
+    parser_async = subparsers.add_parser("async", help="Teste de carga do AsyncDatabaseManager")
+    parser_async.add_argument("--livros", type=int, default=10000)
+    parser_async.add_argument("--corrotinas", type=int, default=200)
+    parser_async.add_argument("--leitores", type=int, default=4)
+    parser_async.add_argument("--duracao", type=float, default=5.0)
+    parser_async.set_defaults(funcao=benchmark_async)
+
+    parser_importacao = subparsers.add_parser("importacao", help="Importação de CSV sequencial e em paralelo")
+    parser_importacao.add_argument("--livros", type=int, default=200000)
+    parser_importacao.add_argument("--processos", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser_importacao.set_defaults(funcao=benchmark_importacao)
+
+    parser_formatos = subparsers.add_parser("formatos", help="Exportação e leitura em CSV, NDJSON, Parquet e Arrow")
+    parser_formatos.add_argument("--livros", type=int, default=200000)
+    parser_formatos.set_defaults(funcao=benchmark_formatos)
+
+    parser_http = subparsers.add_parser("http", help="Teste de carga da API HTTP (livraria_http.py)")
+    parser_http.add_argument("--livros", type=int, default=10000)
+    parser_http.add_argument("--clientes", type=int, default=16)
+    parser_http.add_argument("--leitores", type=int, default=4)
+    parser_http.add_argument("--duracao", type=float, default=5.0)
+    parser_http.set_defaults(funcao=benchmark_http)
+
+    parser_suite = subparsers.add_parser("suite", help="Suíte reproduzível sobre um catálogo sintético, com saída JSON")
+    parser_suite.add_argument("--livros", type=int, default=100000, help="Tamanho do catálogo (até 10 milhões)")
+    parser_suite.add_argument("--semente", type=int, default=42)
+    parser_suite.add_argument("--operacoes", type=int, default=20000, help="Buscas por ID (e um décimo por autor)")
+    parser_suite.add_argument("--insercoes", type=int, default=1000, help="Inserções avulsas após a carga")
+    parser_suite.add_argument("--repeticoes", type=int, default=3, help="Execuções de cada leitura (vale a melhor)")
+    parser_suite.add_argument("--processos", type=int, default=1, help="Processos da importação de CSV")
+    parser_suite.add_argument("--cenarios", nargs="+", choices=list(CENARIOS_SUITE), default=list(CENARIOS_SUITE),
+                              help="Cenários a executar (a inserção sempre executa, pois monta o catálogo)")
+    parser_suite.add_argument("--saida", help="Arquivo JSON para os resultados")
+    parser_suite.add_argument("--comparar-com", help="Resultados JSON de uma execução anterior")
+    parser_suite.add_argument("--tolerancia", type=float, default=10.0, help="Piora tolerada, em %% (padrão: 10)")
+    parser_suite.add_argument("--diretorio-temporario", help="Onde criar os bancos (padrão: diretório temporário do sistema)")
+    parser_suite.set_defaults(funcao=benchmark_suite)
+
+    parser_comparar = subparsers.add_parser("comparar", help="Comparar dois resultados JSON da suíte")
+    parser_comparar.add_argument("base")
+    parser_comparar.add_argument("novo")
+    parser_comparar.add_argument("--tolerancia", type=float, default=10.0, help="Piora tolerada, em %% (padrão: 10)")
+    parser_comparar.set_defaults(funcao=benchmark_comparar)
+
+    parser_gerar = subparsers.add_parser("gerar", help="Gravar um catálogo sintético em CSV ou NDJSON (.gz opcional)")
+    parser_gerar.add_argument("arquivo")
+    parser_gerar.add_argument("--livros", type=int, default=100000)
+    parser_gerar.add_argument("--semente", type=int, default=42)
+    parser_gerar.set_defaults(funcao=gerar_catalogo)
+
+    args = parser.parse_args()
+    sys.exit(args.funcao(args) or 0)
+
+
+if __name__ == "__main__":
+    main()
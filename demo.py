@@ -52,15 +52,16 @@ def popular_banco_demonstracao():
         print(f"  Livros adicionados: {livros_adicionados}")
         
         # Mostrar estatísticas
-        todos_livros = sistema.db_manager.obter_todos_livros()
-        print(f"  Total no banco: {len(todos_livros)}")
+        estatisticas = sistema.db_manager.obter_estatisticas()
+        print(f"  Total no banco: {estatisticas['total_livros']}")
         
         # Criar backup
-        backup_path = sistema.gerenciador_arquivos.criar_backup()
-        print(f"  Backup criado: {backup_path.split('\\')[-1]}")
+        nome_backup = sistema.gerenciador_arquivos.criar_backup()
+        print(f"  Backup criado: {nome_backup}")
         
         # Exportar para CSV
-        csv_path = sistema.gerenciador_arquivos.exportar_csv(todos_livros, "demonstracao_completa.csv")
+        csv_path, _ = sistema.gerenciador_arquivos.exportar_csv_em_fluxo(
+            sistema.db_manager.iterar_livros(), "demonstracao_completa.csv")
         print(f"  CSV exportado: demonstracao_completa.csv")
         
         print(f"\n✓ Sistema pronto para uso!")
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# Linha de comando não interativa do Sistema de Livraria, para scripts e tarefas agendadas:
+#
+#   python livraria.py add "Dom Casmurro" "Machado de Assis" 1899 29,90
+#   python livraria.py --formato csv list --autor Machado > machado.csv
+#   python livraria.py batch operacoes.txt
+#
+# A saída vai para stdout em JSON (um objeto por linha), CSV ou tabela; mensagens e erros
+# vão para stderr. O código de saída é 0 em caso de sucesso e 1 em caso de erro.
+import argparse
+import os
+import sqlite3
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# O módulo do sistema é importado só depois de interpretar os argumentos (ver main), para
+# que --help e erros de uso respondam sem abrir o banco
+CAMPOS_LIVRO = ['id', 'titulo', 'autor', 'ano_publicacao', 'preco']
+
+# Comandos aceitos em um arquivo de operações (batch)
+COMANDOS_LOTE = ('add', 'get', 'list', 'search', 'update-price', 'remove')
+
+
+class ErroComando(Exception):
+    pass
+
+
+class Saida:
+    # Escreve livros e resultados no formato escolhido: json (um objeto por linha, fácil
+    # de processar em fluxo), csv (com o mesmo cabeçalho aceito pela importação) ou tabela
+    def __init__(self, formato: str):
+        self.formato = formato
+        self._writer_csv = None
+
+    def livros(self, livros):
+        if self.formato == 'tabela':
+            from sistema_livraria import SistemaLivraria
+            SistemaLivraria._imprimir_livros(livros)
+        elif self.formato == 'csv':
+            from sistema_livraria import COLUNAS_CSV
+            writer = self._csv()
+            writer.writerow([COLUNAS_CSV[campo] for campo in CAMPOS_LIVRO])
+            writer.writerows(livros)
+        else:
+            for livro in livros:
+                self._json(dict(zip(CAMPOS_LIVRO, livro)))
+
+    def resultado(self, dados: dict):
+        if self.formato == 'tabela':
+            for chave, valor in dados.items():
+                print(f"{chave}: {valor}")
+        elif self.formato == 'csv':
+            writer = self._csv()
+            writer.writerow(list(dados))
+            writer.writerow(list(dados.values()))
+        else:
+            self._json(dados)
+
+    def _csv(self):
+        if self._writer_csv is None:
+            import csv
+            self._writer_csv = csv.writer(sys.stdout)
+        return self._writer_csv
+
+    def _json(self, dados: dict):
+        import json
+        print(json.dumps(dados, ensure_ascii=False))
+
+
+def _filtros(args, validador) -> dict:
+    filtros = {}
+    if args.autor:
+        filtros['autor'] = args.autor
+    if args.ano_min:
+        filtros['ano_min'] = validador.validar_ano(args.ano_min)
+    if args.ano_max:
+        filtros['ano_max'] = validador.validar_ano(args.ano_max)
+    if args.preco_min:
+        filtros['preco_min'] = validador.validar_preco(args.preco_min)
+    if args.preco_max:
+        filtros['preco_max'] = validador.validar_preco(args.preco_max)
+    return filtros
+
+
+def _obter_livro(sistema, id_livro: int):
+    livro = sistema.db_manager.obter_livro_por_id(id_livro)
+    if livro is None:
+        raise ErroComando(f"Livro com ID {id_livro} não encontrado")
+    return livro
+
+
+def _caminho_arquivo(nome: str) -> str:
+    # Caminhos que existem a partir do diretório atual são usados como estão; nomes simples
+    # continuam relativos ao diretório exports
+    caminho = Path(nome)
+    if caminho.is_absolute() or len(caminho.parts) > 1 or caminho.exists():
+        return str(caminho.resolve())
+    return nome
+
+
+def comando_add(sistema, args, saida):
+    validador = sistema.validador
+    livro = (validador.validar_titulo(args.titulo), validador.validar_autor(args.autor),
+             validador.validar_ano(args.ano), validador.validar_preco(args.preco))
+    try:
+        id_livro = sistema.db_manager.adicionar_livro(*livro)
+    except sqlite3.IntegrityError:
+        raise ErroComando("Livro já cadastrado (mesmo título, autor e ano)") from None
+    saida.livros([(id_livro, *livro)])
+
+
+def comando_get(sistema, args, saida):
+    saida.livros([_obter_livro(sistema, args.id)])
+
+
+def comando_list(sistema, args, saida):
+    saida.livros(sistema.db_manager.iterar_livros(**_filtros(args, sistema.validador)))
+
+
+def comando_search(sistema, args, saida):
+    saida.livros(sistema.db_manager.buscar_livros(args.termo, args.limite))
+
+
+def comando_update_price(sistema, args, saida):
+    preco = sistema.validador.validar_preco(args.preco)
+    if not sistema.db_manager.atualizar_preco_livro(args.id, preco):
+        raise ErroComando(f"Livro com ID {args.id} não encontrado")
+    saida.livros([_obter_livro(sistema, args.id)])
+
+
+def comando_remove(sistema, args, saida):
+    livro = _obter_livro(sistema, args.id)
+    if not sistema.db_manager.remover_livro(args.id):
+        raise ErroComando(f"Livro com ID {args.id} não encontrado")
+    saida.livros([livro])
+
+
+def comando_export(sistema, args, saida):
+    colunas = [coluna.strip() for coluna in args.colunas.split(',')] if args.colunas else None
+    livros = sistema.db_manager.iterar_livros(colunas, **_filtros(args, sistema.validador))
+    caminho, total = sistema.gerenciador_arquivos.exportar_em_fluxo(
+        livros, _caminho_arquivo(args.arquivo), args.formato_arquivo, colunas, args.compactar)
+    saida.resultado({'arquivo': caminho, 'livros': total})
+
+
+def comando_import(sistema, args, saida):
+    from sistema_livraria import TAMANHO_MINIMO_IMPORTACAO_PARALELA, formato_do_arquivo
+
+    nome_arquivo = _caminho_arquivo(args.arquivo)
+
+    def relatar_erro(linha: int, erro: str):
+        print(f"Erro na linha {linha}: {erro}", file=sys.stderr)
+
+    if formato_do_arquivo(nome_arquivo) == 'csv' and not nome_arquivo.endswith('.gz'):
+        # Mesmo fluxo do menu: retomada após interrupção e validação em paralelo em arquivos grandes
+        processos = args.processos
+        if processos is None:
+            tamanho = sistema.gerenciador_arquivos.tamanho_arquivo_exports(nome_arquivo)
+            processos = 1
+            if tamanho >= TAMANHO_MINIMO_IMPORTACAO_PARALELA:
+                processos = os.cpu_count() or 1
+        resultado = sistema.importar_csv_em_fluxo(nome_arquivo, not args.sem_retomar, ao_erro=relatar_erro,
+                                                  processos=processos, se_existir=args.se_existir)
+    else:
+        resultado = sistema.importar_arquivo_em_fluxo(nome_arquivo, ao_erro=relatar_erro,
+                                                      se_existir=args.se_existir)
+    saida.resultado({'importados': resultado['importados'], 'existentes': resultado['existentes'],
+                     'erros': resultado['erros']})
+
+
+def comando_backup(sistema, args, saida):
+    gerenciador = sistema.gerenciador_arquivos
+    for item in (args.retencao or '').split(','):
+        if not item.strip():
+            continue
+        faixa, _, quantidade = item.partition('=')
+        if faixa.strip() not in gerenciador.retencao_backups or not quantidade.strip().isdigit():
+            raise ErroComando(f"Retenção inválida: {item}. Use faixa=quantidade com as faixas "
+                              f"{', '.join(gerenciador.retencao_backups)}")
+        gerenciador.retencao_backups[faixa.strip()] = int(quantidade)
+    with redirect_stdout(sys.stderr):
+        nome = gerenciador.criar_backup()
+    backup = next(backup for backup in gerenciador.listar_backups() if backup['nome'] == nome)
+    saida.resultado({'backup': nome, 'tamanho': backup['tamanho'], 'gravado': backup['gravado']})
+
+
+def comando_backups(sistema, args, saida):
+    for backup in sistema.gerenciador_arquivos.listar_backups():
+        saida.resultado(backup)
+
+
+def comando_verify(sistema, args, saida):
+    saida.resultado(sistema.gerenciador_arquivos.verificar_backup(args.nome))
+
+
+def comando_restore(sistema, args, saida):
+    # O estado atual é guardado antes, para que a restauração possa ser desfeita
+    gerenciador = sistema.gerenciador_arquivos
+    with redirect_stdout(sys.stderr):
+        anterior = gerenciador.criar_backup()
+        reaplicadas = gerenciador.restaurar_backup(args.nome)
+    saida.resultado({'backup': args.nome, 'alteracoes_reaplicadas': reaplicadas, 'estado_anterior': anterior})
+
+
+def comando_batch(sistema, args, saida):
+    # Cada linha do arquivo é um comando (add, update-price, remove...) com a mesma sintaxe
+    # da linha de comando; linhas vazias e iniciadas por # são ignoradas. Todas as linhas
+    # são interpretadas antes de começar, e as operações rodam em uma única transação:
+    # um erro desfaz tudo, a menos que --continuar seja usado (aí só a linha com erro é descartada).
+    import shlex
+
+    parser = criar_parser()
+    operacoes = []
+    arquivo = sys.stdin if args.arquivo == '-' else open(args.arquivo, encoding='utf-8')
+    try:
+        for numero, linha in enumerate(arquivo, 1):
+            if not linha.strip() or linha.lstrip().startswith('#'):
+                continue
+            try:
+                argumentos = shlex.split(linha)
+                if argumentos[0] not in COMANDOS_LOTE:
+                    raise ErroComando(f"comando não permitido em lote: {argumentos[0]} "
+                                      f"(use um de: {', '.join(COMANDOS_LOTE)})")
+                operacoes.append((numero, parser.parse_args(argumentos)))
+            except (ValueError, ErroComando, SystemExit) as e:
+                detalhe = f": {e}" if not isinstance(e, SystemExit) else ""
+                raise ErroComando(f"linha {numero} inválida{detalhe}") from None
+    finally:
+        if arquivo is not sys.stdin:
+            arquivo.close()
+
+    falhas = 0
+    with sistema.db_manager.transacao():
+        for numero, operacao in operacoes:
+            try:
+                operacao.funcao(sistema, operacao, saida)
+            except _erros_comando() as e:
+                if not args.continuar:
+                    raise ErroComando(f"linha {numero}: {e}. Nenhuma operação foi gravada.") from None
+                print(f"Erro na linha {numero}: {e}", file=sys.stderr)
+                falhas += 1
+
+    print(f"✓ {len(operacoes) - falhas} operação(ões) gravada(s) em uma transação"
+          + (f", {falhas} com erro" if falhas else ""), file=sys.stderr)
+
+
+# Comandos que alteram o catálogo: antes deles o registro de alterações pode ser compactado
+# em um backup completo, como no menu interativo
+COMANDOS_ESCRITA = ('add', 'update-price', 'remove', 'import', 'batch')
+# Comandos que só consultam: abrem o banco existente sem criar diretórios nem migrá-lo
+COMANDOS_LEITURA = ('get', 'list', 'search')
+
+
+def _erros_comando() -> tuple:
+    # Erros relatados como "Erro: ..." com código de saída 1; outros são falhas inesperadas
+    from sistema_livraria import ValidationError
+    return ErroComando, ValidationError, ValueError, OSError, sqlite3.Error
+
+
+def _adicionar_filtros(parser):
+    parser.add_argument("--autor", help="Parte do nome do autor")
+    parser.add_argument("--ano-min")
+    parser.add_argument("--ano-max")
+    parser.add_argument("--preco-min")
+    parser.add_argument("--preco-max")
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="livraria", description="Sistema de Livraria - linha de comando")
+    parser.add_argument("--diretorio", default=".", help="Diretório com data/, backups/ e exports/ (padrão: .)")
+    parser.add_argument("--formato", choices=["json", "csv", "tabela"], default="json",
+                        help="Formato da saída (padrão: json, um objeto por linha)")
+    parser.add_argument("--metricas", metavar="ARQUIVO",
+                        help="Gravar as latências das operações e dos comandos SQL neste arquivo JSON")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    parser_add = subparsers.add_parser("add", help="Adicionar um livro")
+    parser_add.add_argument("titulo")
+    parser_add.add_argument("autor")
+    parser_add.add_argument("ano")
+    parser_add.add_argument("preco")
+    parser_add.set_defaults(funcao=comando_add)
+
+    parser_get = subparsers.add_parser("get", help="Mostrar um livro pelo ID")
+    parser_get.add_argument("id", type=int)
+    parser_get.set_defaults(funcao=comando_get)
+
+    parser_list = subparsers.add_parser("list", help="Listar livros, com filtros opcionais")
+    _adicionar_filtros(parser_list)
+    parser_list.set_defaults(funcao=comando_list)
+
+    parser_search = subparsers.add_parser("search", help="Buscar por título ou autor")
+    parser_search.add_argument("termo")
+    parser_search.add_argument("--limite", type=int, default=50)
+    parser_search.set_defaults(funcao=comando_search)
+
+    parser_update = subparsers.add_parser("update-price", help="Atualizar o preço de um livro")
+    parser_update.add_argument("id", type=int)
+    parser_update.add_argument("preco")
+    parser_update.set_defaults(funcao=comando_update_price)
+
+    parser_remove = subparsers.add_parser("remove", help="Remover um livro")
+    parser_remove.add_argument("id", type=int)
+    parser_remove.set_defaults(funcao=comando_remove)
+
+    parser_export = subparsers.add_parser("export", help="Exportar livros para um arquivo")
+    parser_export.add_argument("arquivo", help="Nome no diretório exports ou caminho do arquivo")
+    parser_export.add_argument("--formato-arquivo", choices=["csv", "ndjson", "parquet", "arrow"],
+                               help="Padrão: pela extensão do arquivo")
+    parser_export.add_argument("--colunas", help="Colunas separadas por vírgula (padrão: todas)")
+    parser_export.add_argument("--compactar", action="store_true")
+    _adicionar_filtros(parser_export)
+    parser_export.set_defaults(funcao=comando_export)
+
+    parser_import = subparsers.add_parser("import", help="Importar livros de um arquivo")
+    parser_import.add_argument("arquivo", help="Nome no diretório exports ou caminho do arquivo")
+    parser_import.add_argument("--se-existir", choices=["relatar", "pular", "atualizar_preco"],
+                               default="atualizar_preco", help="Livros já cadastrados (padrão: atualizar_preco)")
+    parser_import.add_argument("--processos", type=int, help="Processos de validação para CSV (padrão: automático)")
+    parser_import.add_argument("--sem-retomar", action="store_true",
+                               help="Ignorar o ponto de retomada de uma importação interrompida")
+    parser_import.set_defaults(funcao=comando_import)
+
+    parser_backup = subparsers.add_parser("backup", help="Fazer backup completo do banco")
+    parser_backup.add_argument("--retencao", help="Backups mantidos por faixa, ex.: recentes=5,horarios=24,diarios=7,semanais=4")
+    parser_backup.set_defaults(funcao=comando_backup)
+
+    parser_backups = subparsers.add_parser("backups", help="Listar os backups completos")
+    parser_backups.set_defaults(funcao=comando_backups)
+
+    parser_verify = subparsers.add_parser("verify", help="Conferir um backup sem restaurá-lo")
+    parser_verify.add_argument("nome")
+    parser_verify.set_defaults(funcao=comando_verify)
+
+    parser_restore = subparsers.add_parser("restore", help="Restaurar um backup completo (conferido antes)")
+    parser_restore.add_argument("nome")
+    parser_restore.set_defaults(funcao=comando_restore)
+
+    parser_batch = subparsers.add_parser("batch", help="Executar um arquivo de operações em uma transação")
+    parser_batch.add_argument("arquivo", help="Arquivo com um comando por linha (- para stdin)")
+    parser_batch.add_argument("--continuar", action="store_true",
+                              help="Descartar só as linhas com erro em vez de desfazer tudo")
+    parser_batch.set_defaults(funcao=comando_batch)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = criar_parser().parse_args(argv)
+
+    from sistema_livraria import Metricas, SistemaLivraria
+    erros_comando = _erros_comando()
+
+    try:
+        sistema = SistemaLivraria(args.diretorio, metricas=Metricas(arquivo=args.metricas) if args.metricas else None,
+                                  somente_leitura=args.comando in COMANDOS_LEITURA)
+    except erros_comando as e:
+        print(f"Erro ao abrir o banco: {e}", file=sys.stderr)
+        return 1
+
+    try:
+        if args.comando in COMANDOS_ESCRITA:
+            # As mensagens do backup automático vão para stderr, separadas da saída do comando
+            try:
+                nome_backup = sistema.compactar_registro_se_necessario()
+                if nome_backup:
+                    print(f"✓ Backup criado automaticamente: {nome_backup}", file=sys.stderr)
+            except erros_comando as e:
+                print(f"Aviso: Não foi possível criar backup: {e}", file=sys.stderr)
+        args.funcao(sistema, args, Saida(args.formato))
+    except BrokenPipeError:
+        # Saída interrompida (ex.: "| head"): o stdout passa a apontar para /dev/null, para
+        # que a descarga dele na saída do Python não falhe de novo. Antes de erros_comando,
+        # que inclui OSError.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except erros_comando as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    finally:
+        sistema.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sistema_livraria import CacheLRU, DatabaseManager
+
+
+class AsyncDatabaseManager:
+    # Fachada assíncrona do DatabaseManager para uso dentro de um event loop (ex.: serviço web).
+    # As leituras rodam em um executor com "leitores" threads; todas as escritas passam por um
+    # executor de uma única thread, que funciona como fila de escrita: nunca há dois escritores
+    # disputando o banco, o que evita erros "database is locked". O pool de conexões tem uma
+    # conexão por thread de leitura mais uma para o escritor.
+    def __init__(self, caminho_db: str, leitores: int = 4, perfil: Optional[str] = 'balanced',
+                 cache: Optional[CacheLRU] = None):
+        self.db_manager = DatabaseManager(caminho_db, leitores + 1, perfil, cache)
+        self._executor_leitura = ThreadPoolExecutor(max_workers=leitores, thread_name_prefix="livraria-leitura")
+        self._executor_escrita = ThreadPoolExecutor(max_workers=1, thread_name_prefix="livraria-escrita")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        # Aguarda as operações pendentes antes de fechar as conexões
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._executor_escrita.shutdown)
+        await loop.run_in_executor(None, self._executor_leitura.shutdown)
+        self.db_manager.close()
+
+    async def _ler(self, funcao: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor_leitura, partial(funcao, *args, **kwargs))
+
+    async def _escrever(self, funcao: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor_escrita, partial(funcao, *args, **kwargs))
+
+    # Escritas
+
+    async def adicionar_livro(self, titulo: str, autor: str, ano_publicacao: int, preco: float) -> int:
+        return await self._escrever(self.db_manager.adicionar_livro, titulo, autor, ano_publicacao, preco)
+
+    async def adicionar_livros_em_lote(self, livros: Iterable[Tuple[str, str, int, float]], batch_size: int = 1000,
+                                       se_existir: str = 'relatar') -> Tuple[int, List[Tuple[int, str]]]:
+        return await self._escrever(self.db_manager.adicionar_livros_em_lote, livros, batch_size, se_existir)
+
+    async def remover_duplicados(self) -> int:
+        return await self._escrever(self.db_manager.remover_duplicados)
+
+    async def atualizar_preco_livro(self, id_livro: int, novo_preco: float) -> bool:
+        return await self._escrever(self.db_manager.atualizar_preco_livro, id_livro, novo_preco)
+
+    async def remover_livro(self, id_livro: int) -> bool:
+        return await self._escrever(self.db_manager.remover_livro, id_livro)
+
+    async def reajustar_precos(self, percentual: Optional[float] = None, valor: Optional[float] = None,
+                               **filtros) -> int:
+        return await self._escrever(self.db_manager.reajustar_precos, percentual, valor, **filtros)
+
+    async def aplicar_lista_precos(self, precos: Iterable[Tuple[int, float]]) -> Tuple[int, List[int]]:
+        return await self._escrever(self.db_manager.aplicar_lista_precos, precos)
+
+    # Leituras
+
+    async def obter_livro_por_id(self, id_livro: int) -> Optional[Tuple]:
+        return await self._ler(self.db_manager.obter_livro_por_id, id_livro)
+
+    async def obter_todos_livros(self) -> List[Tuple]:
+        return await self._ler(self.db_manager.obter_todos_livros)
+
+    async def buscar_livros_por_autor(self, autor: str) -> List[Tuple]:
+        return await self._ler(self.db_manager.buscar_livros_por_autor, autor)
+
+    async def buscar_livros(self, termo: str, limite: int = 50) -> List[Tuple]:
+        return await self._ler(self.db_manager.buscar_livros, termo, limite)
+
+    async def listar_livros(self, chave_apos: Optional[Tuple] = None, limite: int = 20,
+                            ordenar_por: str = 'titulo', chave_antes: Optional[Tuple] = None) -> List[Tuple]:
+        return await self._ler(self.db_manager.listar_livros, chave_apos, limite, ordenar_por, chave_antes)
+
+    async def contar_livros(self, **filtros) -> int:
+        return await self._ler(self.db_manager.contar_livros, **filtros)
+
+    async def obter_estatisticas(self, limite_autores: int = 10) -> Dict:
+        return await self._ler(self.db_manager.obter_estatisticas, limite_autores)
+
+    async def iterar_livros(self, tamanho_pagina: int = 500,
+                            ordenar_por: str = 'titulo') -> AsyncIterator[Tuple]:
+        # Percorre o catálogo página a página (paginação por chave). Nenhuma conexão fica
+        # presa entre uma página e outra, então muitos iteradores podem estar abertos ao
+        # mesmo tempo sem esgotar o pool.
+        chave = None
+        while True:
+            pagina = await self.listar_livros(chave, tamanho_pagina, ordenar_por)
+            for livro in pagina:
+                yield livro
+            if len(pagina) < tamanho_pagina:
+                return
+            chave = self.db_manager.chave_listagem(pagina[-1], ordenar_por)
@@ -0,0 +1,239 @@
+import heapq
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice, zip_longest
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sistema_livraria import COLUNAS_CSV, DatabaseManager, SistemaLivraria
+
+# Lotes que cada loja lê à frente do merge numa listagem em fluxo (iterar_livros)
+TAMANHO_LOTE_FEDERADO = 1000
+LOTES_A_FRENTE = 4
+
+
+def _ler_a_frente(iterador: Iterator[Tuple], tamanho_lote: int = TAMANHO_LOTE_FEDERADO,
+                  lotes: int = LOTES_A_FRENTE) -> Iterator[Tuple]:
+    # Consome o iterador numa thread própria, alguns lotes à frente de quem lê: enquanto o
+    # merge espera por uma loja, as outras continuam lendo. Se quem lê para no meio, a
+    # thread é avisada, fecha o iterador (liberando a conexão) e termina.
+    fila = queue.Queue(lotes)
+    parar = threading.Event()
+    fim = object()
+
+    def entregar(item) -> bool:
+        while not parar.is_set():
+            try:
+                fila.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produzir():
+        try:
+            for lote in iter(lambda: list(islice(iterador, tamanho_lote)), []):
+                if not entregar(lote):
+                    return
+            entregar(fim)
+        except Exception as e:
+            entregar(e)
+        finally:
+            iterador.close()
+
+    thread = threading.Thread(target=produzir, name="livraria-loja-leitura", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = fila.get()
+            if item is fim:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield from item
+    finally:
+        parar.set()
+        thread.join()
+
+
+class LivrariaFederada:
+    # Várias lojas (cada uma um SistemaLivraria com o seu data/livraria.db) consultadas como
+    # um catálogo só. Cada loja tem as suas conexões e as consultas rodam em paralelo, uma
+    # thread por loja (o SQLite libera o GIL enquanto executa); os resultados, já ordenados
+    # em cada loja, são intercalados por um merge de k vias. Os livros voltam como
+    # (id, titulo, autor, ano_publicacao, preco, loja): os ids só são únicos dentro de uma
+    # loja, então as escritas recebem a loja dona do livro.
+    #
+    # Antes de cada escrita a loja compacta o seu registro de alterações quando preciso
+    # (SistemaLivraria.compactar_registro_se_necessario). Nada é escrito na tela: os
+    # backups criados ficam em backups_automaticos e as falhas, que não impedem a escrita,
+    # em falhas_backup, ambos como (loja, backup ou exceção).
+    def __init__(self, lojas: Dict[str, str], tamanho_pool: int = 2, perfil: str = 'balanced'):
+        if not lojas:
+            raise ValueError("Informe ao menos uma loja")
+        self.lojas = {nome: SistemaLivraria(diretorio, tamanho_pool, perfil)
+                      for nome, diretorio in sorted(lojas.items())}
+        self._executor = ThreadPoolExecutor(max_workers=len(self.lojas), thread_name_prefix="livraria-loja")
+        self.backups_automaticos: List[Tuple[str, str]] = []
+        self.falhas_backup: List[Tuple[str, Exception]] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown()
+        for sistema in self.lojas.values():
+            sistema.close()
+
+    def _sistema(self, loja: str) -> SistemaLivraria:
+        sistema = self.lojas.get(loja)
+        if sistema is None:
+            raise ValueError(f"Loja desconhecida: {loja}")
+        return sistema
+
+    def _em_todas(self, funcao: Callable[[SistemaLivraria], object],
+                  lojas: Optional[List[str]] = None) -> Dict[str, object]:
+        # Executa funcao(sistema) em todas as lojas (ou nas informadas) ao mesmo tempo
+        nomes = list(lojas) if lojas is not None else list(self.lojas)
+        sistemas = [self._sistema(nome) for nome in nomes]
+        return dict(zip(nomes, self._executor.map(funcao, sistemas)))
+
+    def _para_escrita(self, loja: str) -> SistemaLivraria:
+        sistema = self._sistema(loja)
+        try:
+            nome_backup = sistema.compactar_registro_se_necessario()
+            if nome_backup:
+                self.backups_automaticos.append((loja, nome_backup))
+        except Exception as e:
+            # A escrita segue: ela fica no registro de alterações até o próximo backup
+            self.falhas_backup.append((loja, e))
+        return sistema
+
+    @staticmethod
+    def _com_loja(livros: Iterator[Tuple], loja: str) -> Iterator[Tuple]:
+        return (tuple(livro) + (loja,) for livro in livros)
+
+    @staticmethod
+    def chave_listagem(livro: Tuple, ordenar_por: str = 'titulo') -> Tuple:
+        # Chave de posição na listagem federada: (valor da coluna, id, loja)
+        return (*DatabaseManager.chave_listagem(livro, ordenar_por), livro[5])
+
+    # Escritas: vão só para a loja dona do livro
+
+    def adicionar_livro(self, loja: str, titulo: str, autor: str, ano_publicacao: int, preco: float) -> int:
+        return self._para_escrita(loja).db_manager.adicionar_livro(titulo, autor, ano_publicacao, preco)
+
+    def atualizar_preco_livro(self, loja: str, id_livro: int, novo_preco: float) -> bool:
+        return self._para_escrita(loja).db_manager.atualizar_preco_livro(id_livro, novo_preco)
+
+    def remover_livro(self, loja: str, id_livro: int) -> bool:
+        return self._para_escrita(loja).db_manager.remover_livro(id_livro)
+
+    def reajustar_precos(self, percentual: Optional[float] = None, valor: Optional[float] = None,
+                         lojas: Optional[List[str]] = None, **filtros) -> Dict[str, int]:
+        # Reajuste em várias lojas de uma vez; cada loja aplica o seu numa transação própria
+        nomes = list(lojas) if lojas is not None else list(self.lojas)
+        for nome in nomes:
+            self._sistema(nome)  # loja desconhecida: nenhuma é alterada
+        resultados = self._executor.map(
+            lambda loja: self._para_escrita(loja).db_manager.reajustar_precos(percentual, valor, **filtros), nomes)
+        return dict(zip(nomes, resultados))
+
+    # Leituras
+
+    def obter_livro(self, loja: str, id_livro: int) -> Optional[Tuple]:
+        livro = self._sistema(loja).db_manager.obter_livro_por_id(id_livro)
+        return tuple(livro) + (loja,) if livro is not None else None
+
+    def buscar_livros_por_autor(self, autor: str) -> List[Tuple]:
+        # Em ordem de título, como em cada loja
+        resultados = self._em_todas(lambda sistema: sistema.db_manager.buscar_livros_por_autor(autor))
+        return list(heapq.merge(*(self._com_loja(livros, loja) for loja, livros in resultados.items()),
+                                key=lambda livro: livro[1]))
+
+    def buscar_livros(self, termo: str, limite: int = 50) -> List[Tuple]:
+        # A relevância calculada por uma loja não se compara à de outra (depende do
+        # catálogo de cada uma); os resultados são intercalados na ordem de cada loja
+        resultados = self._em_todas(lambda sistema: sistema.db_manager.buscar_livros(termo, limite))
+        listas = [self._com_loja(livros, loja) for loja, livros in resultados.items()]
+        intercalados = (livro for rodada in zip_longest(*listas) for livro in rodada if livro is not None)
+        return list(islice(intercalados, limite))
+
+    def listar_livros(self, chave_apos: Optional[Tuple] = None, limite: int = 20,
+                      ordenar_por: str = 'titulo') -> List[Tuple]:
+        # Paginação por chave em todas as lojas: cada loja devolve a sua próxima página a
+        # partir da chave (valor, id, loja) e o merge fica com os primeiros "limite" livros.
+        # Uma loja posterior à da chave também pode ter um livro com o mesmo (valor, id),
+        # que ainda não foi mostrado: para ela a busca começa em id - 1.
+        if ordenar_por not in COLUNAS_CSV:
+            raise ValueError(f"Ordenação inválida: {ordenar_por}")
+
+        def pagina(loja: str) -> List[Tuple]:
+            chave = None
+            if chave_apos is not None:
+                valor, id_livro, loja_chave = chave_apos
+                chave = (valor, id_livro) if loja <= loja_chave else (valor, id_livro - 1)
+            livros = self.lojas[loja].db_manager.listar_livros(chave, limite, ordenar_por)
+            return list(self._com_loja(livros, loja))
+
+        paginas = self._executor.map(pagina, list(self.lojas))
+        chave = lambda livro: self.chave_listagem(livro, ordenar_por)
+        return list(islice(heapq.merge(*paginas, key=chave), limite))
+
+    def iterar_livros(self, ordenar_por: str = 'titulo', **filtros) -> Iterator[Tuple]:
+        # Percorre o catálogo de todas as lojas em ordem, em fluxo: cada loja lê os seus
+        # livros numa thread própria e só alguns lotes por loja ficam em memória
+        indice = list(COLUNAS_CSV).index(ordenar_por) if ordenar_por in COLUNAS_CSV else None
+        if indice is None:
+            raise ValueError(f"Coluna de ordenação inválida: {ordenar_por}")
+        fluxos = [self._com_loja(_ler_a_frente(sistema.db_manager.iterar_livros(ordenar_por=ordenar_por, **filtros)),
+                                 loja)
+                  for loja, sistema in self.lojas.items()]
+        return heapq.merge(*fluxos, key=lambda livro: livro[indice])
+
+    def contar_livros(self, **filtros) -> int:
+        return sum(self._em_todas(lambda sistema: sistema.db_manager.contar_livros(**filtros)).values())
+
+    def contar_por_loja(self, **filtros) -> Dict[str, int]:
+        return self._em_todas(lambda sistema: sistema.db_manager.contar_livros(**filtros))
+
+    def obter_estatisticas(self, limite_autores: int = 10) -> Dict:
+        # Soma os painéis das lojas. Um autor pode estar em mais de uma loja, então cada
+        # loja devolve todos os seus autores (LIMIT -1) para a contagem e o ranking gerais.
+        paineis_por_loja = self._em_todas(lambda sistema: sistema.db_manager.obter_estatisticas(-1))
+        paineis = list(paineis_por_loja.values())
+
+        def somar_grupos(campo: str) -> Dict:
+            # {grupo: (quantidade, soma dos preços)} a partir de [(grupo, quantidade, preço médio)]
+            grupos = {}
+            for painel in paineis:
+                for grupo, quantidade, preco_medio in painel[campo]:
+                    total, soma = grupos.get(grupo, (0, 0.0))
+                    grupos[grupo] = (total + quantidade, soma + preco_medio * quantidade)
+            return grupos
+
+        def extremo(funcao: Callable, campo: str):
+            valores = [painel[campo] for painel in paineis if painel[campo] is not None]
+            return funcao(valores) if valores else None
+
+        autores = somar_grupos('autores')
+        decadas = somar_grupos('decadas')
+        total_livros = sum(painel['total_livros'] for painel in paineis)
+        valor_total = round(sum(painel['valor_total'] for painel in paineis), 2)
+        mais_livros = sorted(autores.items(), key=lambda item: (-item[1][0], item[0]))[:limite_autores]
+        return {
+            'total_livros': total_livros,
+            'total_autores': len(autores),
+            'valor_total': valor_total,
+            'preco_medio': valor_total / total_livros if total_livros else None,
+            'preco_minimo': extremo(min, 'preco_minimo'),
+            'preco_maximo': extremo(max, 'preco_maximo'),
+            'ano_mais_antigo': extremo(min, 'ano_mais_antigo'),
+            'ano_mais_recente': extremo(max, 'ano_mais_recente'),
+            'autores': [(autor, quantidade, soma / quantidade) for autor, (quantidade, soma) in mais_livros],
+            'decadas': [(decada, quantidade, soma / quantidade) for decada, (quantidade, soma) in sorted(decadas.items())],
+            'lojas': {loja: painel['total_livros'] for loja, painel in paineis_por_loja.items()},
+        }
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+# API HTTP/JSON do catálogo, só com a biblioteca padrão, para servir a loja virtual:
+#
+#   python livraria_http.py --porta 8000
+#
+#   GET    /livros?limite=20&ordenar_por=titulo&apos=<cursor>   listagem paginada por chave
+#   GET    /livros?autor=Machado                               livros de um autor
+#   GET    /livros/<id>
+#   GET    /busca?q=alencar&limite=50                          busca por título ou autor
+#   GET    /estatisticas
+#   GET    /metricas                                           latências (com --metricas)
+#   GET    /exportar?formato=csv|ndjson&autor=...&ano_min=...   exportação em fluxo
+#   POST   /livros          {"titulo", "autor", "ano_publicacao", "preco"}
+#   PATCH  /livros/<id>     {"preco"}
+#   DELETE /livros/<id>
+#
+# Cada conexão HTTP é atendida por uma thread. As leituras usam um pool de conexões SQLite
+# (no máximo "leitores" consultas ao mesmo tempo; as demais aguardam uma conexão livre).
+# Todas as escritas passam por uma única thread escritora, com sua própria conexão, então
+# nunca há dois escritores disputando o banco e as leituras nunca esperam pelas escritas (WAL).
+import argparse
+import base64
+import gzip
+import hashlib
+import io
+import json
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import chain
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from sistema_livraria import (COLUNAS_CSV, FORMATOS_ARQUIVO, DatabaseManager, Metricas, SistemaLivraria,
+                              ValidationError)
+
+TAMANHO_MAXIMO_CORPO = 1024 * 1024
+LIMITE_MAXIMO_PAGINA = 1000
+# Tamanho de cada bloco (chunk) enviado nas exportações em fluxo
+TAMANHO_BLOCO_EXPORTACAO = 64 * 1024
+# Formatos que podem ser gerados direto na resposta, sem arquivo intermediário
+TIPOS_EXPORTACAO = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+class ErroHTTP(Exception):
+    def __init__(self, status: HTTPStatus, mensagem: str):
+        super().__init__(mensagem)
+        self.status = status
+
+
+class _SaidaEmBlocos(io.RawIOBase):
+    # Transfer-Encoding: chunked sobre o socket da resposta; close() envia o bloco final
+    def __init__(self, wfile):
+        self._wfile = wfile
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, dados) -> int:
+        if dados:
+            self._wfile.write(b'%X\r\n%s\r\n' % (len(dados), bytes(dados)))
+        return len(dados)
+
+    def close(self):
+        if not self.closed:
+            self._wfile.write(b'0\r\n\r\n')
+        super().close()
+
+
+def _livro_json(livro: Tuple) -> Dict:
+    return dict(zip(COLUNAS_CSV, livro))
+
+
+def _codificar_cursor(chave: Tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(chave)).encode('utf-8')).decode('ascii')
+
+
+def _decodificar_cursor(cursor: str) -> Tuple:
+    # O cursor é a chave de DatabaseManager.chave_listagem: [valor da coluna de ordenação, id]
+    try:
+        chave = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError):
+        chave = None
+    if not (isinstance(chave, list) and len(chave) == 2
+            and isinstance(chave[0], (str, int, float)) and not isinstance(chave[0], bool)
+            and isinstance(chave[1], int) and not isinstance(chave[1], bool)):
+        raise ErroHTTP(HTTPStatus.BAD_REQUEST, "Cursor de paginação inválido")
+    return tuple(chave)
+
+
+class ServidorLivraria(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, endereco: Tuple[str, int], diretorio_base: str = ".", leitores: int = 4,
+                 perfil: str = 'balanced', registrar_acessos: bool = True, metricas: Optional[Metricas] = None):
+        # O SistemaLivraria (com uma conexão) é usado só pela thread escritora, o que também
+        # mantém a compactação do registro de alterações em backups completos
+        self.sistema = SistemaLivraria(diretorio_base, 1, perfil, metricas=metricas)
+        self.leitura = DatabaseManager(str(self.sistema.gerenciador_arquivos.arquivo_db), leitores, perfil,
+                                       metricas=metricas)
+        self.metricas = metricas
+        self.registrar_acessos = registrar_acessos
+        self._executor_escrita = ThreadPoolExecutor(max_workers=1, thread_name_prefix="livraria-escrita")
+        super().__init__(endereco, ManipuladorLivraria)
+
+    def escrever(self, funcao: Callable, *args):
+        # Enfileira a escrita na thread escritora e aguarda o resultado
+        def executar():
+            try:
+                nome_backup = self.sistema.compactar_registro_se_necessario()
+                if nome_backup:
+                    self.registrar(f"Backup criado automaticamente: {nome_backup}")
+            except Exception as e:
+                # A escrita segue: ela fica no registro de alterações até o próximo backup
+                self.registrar(f"Aviso: Não foi possível criar backup: {e}")
+            return funcao(*args)
+        return self._executor_escrita.submit(executar).result()
+
+    def registrar(self, mensagem: str):
+        # Avisos do servidor (ex.: backup automático), no stderr como o registro de acessos
+        sys.stderr.write(f"{mensagem}\n")
+
+    def versao_catalogo(self, recurso: str) -> str:
+        # ETag das leituras: a marca do registro de alterações (número e horário da última
+        # alteração) muda a cada escrita, feita por este servidor ou por outro processo
+        # (menu, linha de comando), e também a cada restauração, que consome um número.
+        # O recurso (caminho e parâmetros normalizados) entra no ETag para que o de uma URL
+        # nunca valha para outra.
+        seq, momento = self.leitura.marca_alteracoes()
+        resumo = hashlib.sha256(recurso.encode('utf-8')).hexdigest()[:16]
+        return f'"{seq}-{momento or ""}-{resumo}"'
+
+    def server_close(self):
+        super().server_close()
+        self._executor_escrita.shutdown()
+        self.leitura.close()
+        self.sistema.close()
+
+
+class ManipuladorLivraria(BaseHTTPRequestHandler):
+    # HTTP/1.1 mantém a conexão aberta entre requisições (keep-alive)
+    protocol_version = "HTTP/1.1"
+    server_version = "Livraria/1.0"
+    # Cabeçalhos e corpo saem em escritas separadas; sem TCP_NODELAY, o algoritmo de Nagle
+    # somado ao ACK atrasado do cliente segura cada resposta por ~40 ms
+    disable_nagle_algorithm = True
+
+    ROTAS = [
+        ('GET', re.compile(r'/livros'), 'listar'),
+        ('GET', re.compile(r'/livros/(\d+)'), 'obter'),
+        ('GET', re.compile(r'/busca'), 'buscar'),
+        ('GET', re.compile(r'/estatisticas'), 'estatisticas'),
+        ('GET', re.compile(r'/metricas'), 'metricas'),
+        ('GET', re.compile(r'/exportar'), 'exportar'),
+        ('POST', re.compile(r'/livros'), 'adicionar'),
+        ('PATCH', re.compile(r'/livros/(\d+)'), 'atualizar_preco'),
+        ('DELETE', re.compile(r'/livros/(\d+)'), 'remover'),
+    ]
+
+    def do_GET(self):
+        self._despachar('GET')
+
+    def do_POST(self):
+        self._despachar('POST')
+
+    def do_PATCH(self):
+        self._despachar('PATCH')
+
+    def do_DELETE(self):
+        self._despachar('DELETE')
+
+    def log_message(self, formato, *args):
+        if self.server.registrar_acessos:
+            super().log_message(formato, *args)
+
+    def _despachar(self, metodo: str):
+        url = urlsplit(self.path)
+        self.parametros = {chave: valores[-1] for chave, valores in parse_qs(url.query).items()}
+        # Caminho e parâmetros como são usados (sem barra final, em ordem e só o último
+        # valor de cada um): URLs equivalentes têm o mesmo ETag
+        self.recurso = f"{url.path.rstrip('/') or '/'}?{urlencode(sorted(self.parametros.items()))}"
+        try:
+            # O corpo é sempre consumido, mesmo em caso de erro, para não atrapalhar a
+            # próxima requisição na mesma conexão
+            tamanho = int(self.headers.get('Content-Length') or 0)
+            if tamanho > TAMANHO_MAXIMO_CORPO:
+                self.close_connection = True
+                raise ErroHTTP(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Corpo da requisição muito grande")
+            self.corpo = self.rfile.read(tamanho) if tamanho > 0 else b''
+
+            for metodo_rota, padrao, nome in self.ROTAS:
+                encontrado = padrao.fullmatch(url.path.rstrip('/') or '/')
+                if encontrado and metodo_rota == metodo:
+                    inicio = time.perf_counter()
+                    try:
+                        getattr(self, nome)(*(int(grupo) for grupo in encontrado.groups()))
+                    finally:
+                        if self.server.metricas is not None:
+                            self.server.metricas.registrar(f"http.{nome}", time.perf_counter() - inicio)
+                    return
+            if any(padrao.fullmatch(url.path.rstrip('/')) for _, padrao, _ in self.ROTAS):
+                raise ErroHTTP(HTTPStatus.METHOD_NOT_ALLOWED, f"Método {metodo} não permitido")
+            raise ErroHTTP(HTTPStatus.NOT_FOUND, f"Recurso não encontrado: {url.path}")
+        except ErroHTTP as e:
+            self._responder_json({'erro': str(e)}, e.status)
+        except (ValidationError, ValueError) as e:
+            self._responder_json({'erro': str(e)}, HTTPStatus.BAD_REQUEST)
+        except sqlite3.IntegrityError:
+            self._responder_json({'erro': "Livro já cadastrado (mesmo título, autor e ano)"}, HTTPStatus.CONFLICT)
+        except Exception as e:
+            self.log_error("Erro ao atender %s %s: %r", metodo, self.path, e)
+            self._responder_json({'erro': "Erro interno do servidor"}, HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    # Respostas
+
+    def _responder_json(self, dados, status: HTTPStatus = HTTPStatus.OK, etag: Optional[str] = None,
+                        cabecalhos: Optional[Dict[str, str]] = None):
+        corpo = json.dumps(dados, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _leitura_condicional(self, ler: Callable[[], object]):
+        # GET condicional: se o cliente já tem a versão atual desta URL (If-None-Match),
+        # responde 304 sem corpo e sem executar a consulta
+        etag = self.server.versao_catalogo(self.recurso)
+        if etag in [valor.strip() for valor in self.headers.get('If-None-Match', '').split(',')]:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self._responder_json(ler(), etag=etag)
+
+    def _ler_corpo_json(self) -> Dict:
+        try:
+            dados = json.loads(self.corpo or b'{}')
+        except ValueError:
+            raise ErroHTTP(HTTPStatus.BAD_REQUEST, "Corpo da requisição não é um JSON válido") from None
+        if not isinstance(dados, dict):
+            raise ErroHTTP(HTTPStatus.BAD_REQUEST, "O corpo da requisição deve ser um objeto JSON")
+        return dados
+
+    def _inteiro(self, nome: str, padrao: int, maximo: int) -> int:
+        try:
+            valor = int(self.parametros.get(nome, padrao))
+        except ValueError:
+            raise ErroHTTP(HTTPStatus.BAD_REQUEST, f"Parâmetro {nome} deve ser um número inteiro") from None
+        return max(1, min(valor, maximo))
+
+    def _filtros(self) -> Dict:
+        validador = self.server.sistema.validador
+        filtros = {}
+        if self.parametros.get('autor'):
+            filtros['autor'] = self.parametros['autor']
+        for nome, validar in (('ano_min', validador.validar_ano), ('ano_max', validador.validar_ano),
+                              ('preco_min', validador.validar_preco), ('preco_max', validador.validar_preco)):
+            if self.parametros.get(nome):
+                filtros[nome] = validar(self.parametros[nome])
+        return filtros
+
+    def _obter_livro(self, id_livro: int) -> Tuple:
+        livro = self.server.leitura.obter_livro_por_id(id_livro)
+        if livro is None:
+            raise ErroHTTP(HTTPStatus.NOT_FOUND, f"Livro com ID {id_livro} não encontrado")
+        return livro
+
+    # Leituras
+
+    def listar(self):
+        leitura = self.server.leitura
+        limite = self._inteiro('limite', 20, LIMITE_MAXIMO_PAGINA)
+        ordenar_por = self.parametros.get('ordenar_por', 'titulo')
+        autor = self.parametros.get('autor')
+        chave_apos = _decodificar_cursor(self.parametros['apos']) if self.parametros.get('apos') else None
+
+        def ler():
+            if autor:
+                return {'livros': [_livro_json(livro) for livro in leitura.buscar_livros_por_autor(autor)]}
+            pagina = leitura.listar_livros(chave_apos, limite, ordenar_por)
+            proxima = None
+            if len(pagina) == limite:
+                proxima = _codificar_cursor(leitura.chave_listagem(pagina[-1], ordenar_por))
+            return {'livros': [_livro_json(livro) for livro in pagina], 'proxima': proxima}
+
+        self._leitura_condicional(ler)
+
+    def obter(self, id_livro: int):
+        self._leitura_condicional(lambda: _livro_json(self._obter_livro(id_livro)))
+
+    def buscar(self):
+        termo = self.parametros.get('q', '').strip()
+        if not termo:
+            raise ErroHTTP(HTTPStatus.BAD_REQUEST, "Informe o termo de busca no parâmetro q")
+        limite = self._inteiro('limite', 50, LIMITE_MAXIMO_PAGINA)
+        self._leitura_condicional(
+            lambda: {'livros': [_livro_json(livro) for livro in self.server.leitura.buscar_livros(termo, limite)]})
+
+    def estatisticas(self):
+        self._leitura_condicional(self.server.leitura.obter_estatisticas)
+
+    def metricas(self):
+        if self.server.metricas is None:
+            raise ErroHTTP(HTTPStatus.NOT_FOUND, "Medição desligada; inicie o servidor com --metricas")
+        limite = self._inteiro('limite_sql', 20, self.server.metricas.max_comandos_sql)
+        self._responder_json(self.server.metricas.estatisticas(limite), cabecalhos={'Cache-Control': 'no-store'})
+
+    def exportar(self):
+        # O catálogo é lido em blocos do cursor e enviado em blocos (chunked) conforme é
+        # gerado: memória constante no servidor e o cliente começa a receber na hora.
+        # Um único snapshot (a transação de leitura do cursor) garante uma exportação consistente.
+        formato = self.parametros.get('formato', 'csv')
+        if formato not in TIPOS_EXPORTACAO:
+            raise ErroHTTP(HTTPStatus.BAD_REQUEST,
+                           f"Formato inválido: {formato}. Use um de: {', '.join(TIPOS_EXPORTACAO)}")
+        colunas = None
+        if self.parametros.get('colunas'):
+            colunas = [coluna.strip() for coluna in self.parametros['colunas'].split(',')]
+        livros = self.server.leitura.iterar_livros(colunas, **self._filtros())
+        # Busca o primeiro bloco antes de enviar o status, para que erros virem um 400/500 comum
+        primeiro = next(livros, None)
+        compactar = 'gzip' in self.headers.get('Accept-Encoding', '')
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', TIPOS_EXPORTACAO[formato])
+        self.send_header('Content-Disposition', f'attachment; filename="livros{FORMATOS_ARQUIVO[formato].extensao}"')
+        self.send_header('Transfer-Encoding', 'chunked')
+        if compactar:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+
+        saida = io.BufferedWriter(_SaidaEmBlocos(self.wfile), TAMANHO_BLOCO_EXPORTACAO)
+        arquivo = gzip.GzipFile(fileobj=saida, mode='wb', compresslevel=6) if compactar else saida
+        texto = io.TextIOWrapper(arquivo, encoding='utf-8', newline='')
+        try:
+            linhas = livros if primeiro is None else chain([primeiro], livros)
+            FORMATOS_ARQUIVO[formato].escrever(linhas, texto, colunas or list(COLUNAS_CSV))
+            texto.close()
+            if compactar:
+                saida.close()
+        except Exception as e:
+            # O status já foi enviado: a conexão é encerrada sem o bloco final, e o cliente
+            # percebe a resposta incompleta
+            self.log_error("Exportação interrompida: %r", e)
+            self.close_connection = True
+            livros.close()
+
+    # Escritas (serializadas na thread escritora)
+
+    def adicionar(self):
+        dados = self._ler_corpo_json()
+        validador = self.server.sistema.validador
+        livro = (validador.validar_titulo(dados.get('titulo')), validador.validar_autor(dados.get('autor')),
+                 validador.validar_ano(dados.get('ano_publicacao')), validador.validar_preco(dados.get('preco')))
+        id_livro = self.server.escrever(self.server.sistema.db_manager.adicionar_livro, *livro)
+        self._responder_json(_livro_json((id_livro, *livro)), HTTPStatus.CREATED,
+                             cabecalhos={'Location': f'/livros/{id_livro}'})
+
+    def atualizar_preco(self, id_livro: int):
+        dados = self._ler_corpo_json()
+        preco = self.server.sistema.validador.validar_preco(dados.get('preco'))
+        if not self.server.escrever(self.server.sistema.db_manager.atualizar_preco_livro, id_livro, preco):
+            raise ErroHTTP(HTTPStatus.NOT_FOUND, f"Livro com ID {id_livro} não encontrado")
+        self._responder_json(_livro_json(self._obter_livro(id_livro)))
+
+    def remover(self, id_livro: int):
+        livro = self._obter_livro(id_livro)
+        if not self.server.escrever(self.server.sistema.db_manager.remover_livro, id_livro):
+            raise ErroHTTP(HTTPStatus.NOT_FOUND, f"Livro com ID {id_livro} não encontrado")
+        self._responder_json(_livro_json(livro))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API HTTP do Sistema de Livraria")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8000)
+    parser.add_argument("--diretorio", default=".", help="Diretório com data/, backups/ e exports/ (padrão: .)")
+    parser.add_argument("--leitores", type=int, default=4, help="Conexões de leitura no pool (padrão: 4)")
+    parser.add_argument("--metricas", nargs="?", const="", metavar="ARQUIVO",
+                        help="Medir as latências (GET /metricas); com ARQUIVO, grava as métricas nele ao encerrar")
+    args = parser.parse_args()
+
+    metricas = Metricas(arquivo=args.metricas or None) if args.metricas is not None else None
+    servidor = ServidorLivraria((args.host, args.porta), args.diretorio, args.leitores, metricas=metricas)
+    print(f"✓ API da livraria em http://{args.host}:{servidor.server_address[1]}/livros (Ctrl+C para sair)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\nServidor encerrado.")
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
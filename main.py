@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
-from sistema_livraria import SistemaLivraria
+import sys
 
 def main():
     """Função principal"""
+    # Com argumentos (ex.: "python main.py list"), usa a linha de comando não interativa,
+    # que só importa o sistema depois de interpretar os argumentos
+    if len(sys.argv) > 1:
+        from livraria import main as linha_de_comando
+        sys.exit(linha_de_comando())
+    
+    from sistema_livraria import SistemaLivraria
     try:
         sistema = SistemaLivraria(".")
         sistema.executar()
@@ -1,10 +1,146 @@
 import sqlite3
+import bisect
 import csv
+import functools
+import gzip
+import hashlib
+import heapq
+import io
+import json
+import math
 import os
-import shutil
+import queue
+import re
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Tuple
+
+
+# Páginas copiadas por etapa pela API de backup do SQLite (modo rollback journal)
+PAGINAS_POR_ETAPA_BACKUP = 1024
+
+# Quantidade de alterações registradas entre dois backups completos automáticos
+INTERVALO_COMPACTACAO = 500
+
+# Armazém de backups: tamanho dos blocos deduplicados (múltiplo de qualquer tamanho de
+# página do SQLite) e tamanho máximo do banco copiado direto para a memória ao fazer backup
+TAMANHO_BLOCO_BACKUP = 32 * 1024
+LIMITE_BACKUP_EM_MEMORIA = 64 * 1024 * 1024
+EXTENSOES_COMPRESSAO = {'gzip': '.gz', 'zstd': '.zst'}
+
+# Retenção padrão dos backups completos: os N mais recentes, mais o mais recente de cada
+# uma das últimas horas, dias e semanas que tiveram backup
+RETENCAO_BACKUPS = {'recentes': 5, 'horarios': 24, 'diarios': 7, 'semanais': 4}
+
+# Perfis de durabilidade/desempenho aplicados a cada conexão aberta pelo DatabaseManager.
+# Todos usam WAL (leitores não bloqueiam escritores); variam no synchronous e na memória:
+# - safe: commit só retorna após fsync do WAL, nada se perde mesmo em queda de energia
+# - balanced: fsync apenas nos checkpoints; uma queda de energia pode perder os últimos commits,
+#   mas o banco nunca fica corrompido
+# - fast: sem fsync; uma queda do sistema operacional pode corromper o banco
+PERFIS_DURABILIDADE = {
+    'safe': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -8000,          # KiB (valores negativos), ~8 MB
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,         # ms
+    },
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -32000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    'fast': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -128000,
+        'mmap_size': 1024 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+}
+
+# Tempo máximo (s) que uma thread espera por uma conexão devolvida por outra quando o pool
+# está cheio; a thread que já tem uma conexão do pool reutiliza a sua e nunca espera
+ESPERA_MAXIMA_POOL = 30.0
+
+# Faixa de preços aceita pelo Validador e pelos reajustes em lote
+PRECO_MAXIMO = 999999.99
+
+# Importação paralela: arquivos CSV maiores que o mínimo são divididos em trechos de
+# TAMANHO_TRECHO_IMPORTACAO bytes, validados em processos separados (se o arquivo não tem
+# campos entre aspas com quebra de linha; ver GerenciadorArquivos.dividir_csv)
+TAMANHO_MINIMO_IMPORTACAO_PARALELA = 8 * 1024 * 1024
+TAMANHO_TRECHO_IMPORTACAO = 4 * 1024 * 1024
+
+# Chave natural de um livro: título, autor (sem diferenciar maiúsculas nem espaços nas
+# pontas) e ano. O índice único sobre ela impede que importações dupliquem o catálogo.
+# O lower() do SQLite só converte letras ASCII: "Dom Casmurro" e "dom casmurro" são o mesmo
+# livro, mas "Érico" e "érico" não (o índice não pode usar uma função definida em Python,
+# que faltaria em outras conexões ao banco).
+CHAVE_NATURAL = 'lower(trim(titulo)), lower(trim(autor)), ano_publicacao'
+
+# O que fazer ao importar um livro que já existe (mesma chave natural):
+# relatar como erro, pular ou atualizar o preço do livro existente
+MODOS_LIVRO_EXISTENTE = ('relatar', 'pular', 'atualizar_preco')
+
+# Tabelas de resumo do painel de estatísticas: (tabela, chave, expressão da chave sobre
+# uma linha de livros, com {0} no lugar do nome ou apelido da linha)
+RESUMOS_ESTATISTICAS = [
+    ('estatisticas_autor', 'autor', '{0}.autor'),
+    ('estatisticas_decada', 'decada', '{0}.ano_publicacao / 10 * 10'),
+]
+
+# Livro como JSON no registro de alterações, com {0} no lugar de new, old ou da tabela
+JSON_LIVRO = ("json_object('titulo', {0}.titulo, 'autor', {0}.autor, "
+              "'ano_publicacao', {0}.ano_publicacao, 'preco', {0}.preco)")
+
+# Lotes de adicionar_livros_em_lote com pelo menos tantos livros suspendem os triggers de
+# inserção e fazem o trabalho deles de uma vez ao fim do lote, com um INSERT ... SELECT
+# sobre os livros inseridos
+TRIGGERS_CARGA_EM_MASSA = ('livros_fts_insert', 'estatisticas_insert', 'livros_alteracoes_insert')
+LOTE_MINIMO_CARGA_EM_MASSA = 200
+
+# Campo do livro -> nome da coluna nos arquivos CSV
+COLUNAS_CSV = {
+    'id': 'ID',
+    'titulo': 'Título',
+    'autor': 'Autor',
+    'ano_publicacao': 'Ano de Publicação',
+    'preco': 'Preço',
+}
+
+# Campos lidos de um arquivo importado (o ID é sempre gerado pelo banco)
+CAMPOS_IMPORTACAO = ['titulo', 'autor', 'ano_publicacao', 'preco']
+
+# Tipos de cada campo nos formatos colunares (Parquet/Arrow) e linhas por lote gravado
+TIPOS_COLUNAS = {
+    'id': 'int64',
+    'titulo': 'string',
+    'autor': 'string',
+    'ano_publicacao': 'int32',
+    'preco': 'float64',
+}
+TAMANHO_LOTE_COLUNAR = 65536
+
+
+def _normalizar_texto(texto: str) -> str:
+    # Minúsculas e sem acentos, como o tokenizador do índice de busca ("Pompéia" -> "pompeia")
+    decomposto = unicodedata.normalize('NFD', texto.lower())
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
 
 
 class ValidationError(Exception):
@@ -12,199 +148,2934 @@ class ValidationError(Exception):
     pass
 
 
+# Formatos aceitos para ano e preço (já sem espaços e com o preço usando ponto decimal)
+_FORMATO_ANO = re.compile(r'[+-]?\d+')
+_FORMATO_PRECO = re.compile(r'[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?')
+
+
+def _converter_ano(valor) -> Optional[int]:
+    # Aceita inteiros, floats sem parte fracionária (2000.0) e texto com dígitos ("2000")
+    if isinstance(valor, str):
+        valor = valor.strip()
+        return int(valor) if _FORMATO_ANO.fullmatch(valor) else None
+    if isinstance(valor, int):
+        return int(valor)
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return None
+
+
+def _converter_preco(valor) -> Optional[float]:
+    # Aceita números finitos e texto como "29.90", "29,90", "1.234,56" (vírgula decimal com
+    # ponto de milhar) e "1e3"
+    if not isinstance(valor, str):
+        if isinstance(valor, (int, float)) and math.isfinite(valor):
+            return float(valor)
+        return None
+    texto = valor.strip()
+    if ',' in texto:
+        if texto.rfind('.') > texto.rfind(','):
+            return None
+        texto = texto.replace('.', '').replace(',', '.')
+    if not _FORMATO_PRECO.fullmatch(texto):
+        return None
+    return float(texto)
+
+
 class Validador:
+    # As verificações trabalham sobre colunas inteiras: cada _verificar_* recebe uma lista
+    # de valores e devolve (valores limpos, erros), com None nas posições sem valor válido
+    # e sem erro, respectivamente. validar_lote combina as quatro colunas; os validar_* de
+    # um valor só usam as mesmas verificações com uma lista de um elemento.
+    @staticmethod
+    def _verificar_texto(valores: List, limite: int, vazio: str, longo: str) -> Tuple[List, List]:
+        limpos = [valor.strip() if isinstance(valor, str) else ('' if valor is None else str(valor).strip())
+                  for valor in valores]
+        erros = [None if 0 < len(valor) <= limite else (longo if valor else vazio) for valor in limpos]
+        return limpos, erros
+    
+    @staticmethod
+    def _verificar_titulos(titulos: List) -> Tuple[List, List]:
+        return Validador._verificar_texto(titulos, 200, "O título não pode estar vazio",
+                                          "O título não pode ter mais de 200 caracteres")
+    
+    @staticmethod
+    def _verificar_autores(autores: List) -> Tuple[List, List]:
+        return Validador._verificar_texto(autores, 100, "O nome do autor não pode estar vazio",
+                                          "O nome do autor não pode ter mais de 100 caracteres")
+    
+    @staticmethod
+    def _verificar_anos(anos: List, ano_maximo: int) -> Tuple[List, List]:
+        # Colunas já inteiras (Parquet/Arrow, NumPy) dispensam a conversão valor a valor
+        if not all(type(ano) is int for ano in anos):
+            anos = [_converter_ano(ano) for ano in anos]
+        faixa = f"Ano deve estar entre 1000 e {ano_maximo}"
+        erros = ["Ano deve ser um número inteiro válido" if ano is None
+                 else (None if 1000 <= ano <= ano_maximo else faixa) for ano in anos]
+        return anos, erros
+    
+    @staticmethod
+    def _verificar_precos(precos: List) -> Tuple[List, List]:
+        if all(type(preco) is float for preco in precos):
+            precos = [preco if math.isfinite(preco) else None for preco in precos]
+        else:
+            precos = [_converter_preco(preco) for preco in precos]
+        erros = ["Preço deve ser um número válido (ex: 29.90 ou 29,90)" if preco is None
+                 else "O preço não pode ser negativo" if preco < 0
+                 else "O preço não pode ser maior que R$ 999.999,99" if preco > PRECO_MAXIMO
+                 else None for preco in precos]
+        return [None if preco is None else round(preco, 2) for preco in precos], erros
+    
+    @staticmethod
+    def _levantar_se_erro(resultado: Tuple[List, List]):
+        (valor,), (erro,) = resultado
+        if erro:
+            raise ValidationError(erro)
+        return valor
+    
     @staticmethod
     def validar_titulo(titulo: str) -> str:
-        if not titulo or not titulo.strip():
-            raise ValidationError("O título não pode estar vazio")
-        titulo = titulo.strip()
-        if len(titulo) > 200:
-            raise ValidationError("O título não pode ter mais de 200 caracteres")
-        return titulo
+        return Validador._levantar_se_erro(Validador._verificar_titulos([titulo]))
     
     @staticmethod
     def validar_autor(autor: str) -> str:
-        if not autor or not autor.strip():
-            raise ValidationError("O nome do autor não pode estar vazio")
-        autor = autor.strip()
-        if len(autor) > 100:
-            raise ValidationError("O nome do autor não pode ter mais de 100 caracteres")
-        return autor
+        return Validador._levantar_se_erro(Validador._verificar_autores([autor]))
     
     @staticmethod
     def validar_ano(ano: str) -> int:
-        try:
-            ano_int = int(ano)
-            if ano_int < 1000 or ano_int > datetime.now().year + 1:
-                raise ValidationError(f"Ano deve estar entre 1000 e {datetime.now().year + 1}")
-            return ano_int
-        except ValueError:
-            raise ValidationError("Ano deve ser um número inteiro válido")
+        return Validador._levantar_se_erro(Validador._verificar_anos([ano], datetime.now().year + 1))
     
     @staticmethod
     def validar_preco(preco: str) -> float:
+        return Validador._levantar_se_erro(Validador._verificar_precos([preco]))
+    
+    @staticmethod
+    def validar_lote(titulos: Iterable, autores: Iterable, anos: Iterable, precos: Iterable) -> Dict:
+        # Valida colunas inteiras (listas ou arrays NumPy) sem parar no primeiro erro.
+        # Retorna as colunas limpas ('titulos', 'autores', 'anos', 'precos', com None nas
+        # linhas inválidas), a máscara 'validos' e 'erros' = [(índice, mensagem)] com o
+        # primeiro erro de cada linha inválida, na ordem título, autor, ano, preço.
+        colunas = [valores.tolist() if hasattr(valores, 'tolist') else list(valores)
+                   for valores in (titulos, autores, anos, precos)]
+        quantidade = len(colunas[0])
+        if any(len(valores) != quantidade for valores in colunas):
+            raise ValueError("As colunas do lote devem ter o mesmo tamanho")
+        
+        verificadas = [
+            Validador._verificar_titulos(colunas[0]),
+            Validador._verificar_autores(colunas[1]),
+            Validador._verificar_anos(colunas[2], datetime.now().year + 1),
+            Validador._verificar_precos(colunas[3]),
+        ]
+        limpas = [limpos for limpos, _ in verificadas]
+        # Primeiro erro de cada linha (or fica com a primeira mensagem que não é None)
+        erros_por_linha = [erro_titulo or erro_autor or erro_ano or erro_preco
+                           for erro_titulo, erro_autor, erro_ano, erro_preco
+                           in zip(*(erros for _, erros in verificadas))]
+        validos = [erro is None for erro in erros_por_linha]
+        if not all(validos):
+            limpas = [[valor if valido else None for valor, valido in zip(limpos, validos)] for limpos in limpas]
+        
+        return {
+            'titulos': limpas[0],
+            'autores': limpas[1],
+            'anos': limpas[2],
+            'precos': limpas[3],
+            'validos': validos,
+            'erros': [(indice, erro) for indice, erro in enumerate(erros_por_linha) if erro is not None],
+        }
+
+
+def _validar_colunas(linhas: List[int], colunas: Dict[str, List]) -> Tuple[List[Tuple[int, Tuple]], List[Tuple[int, str]]]:
+    # Valida um lote em colunas (campo -> valores) de uma vez com Validador.validar_lote.
+    # Retorna ([(linha, livro pronto para inserir)], [(linha, erro)]).
+    resultado = Validador.validar_lote(
+        colunas['titulo'], colunas['autor'], colunas['ano_publicacao'], colunas['preco'])
+    validados = zip(linhas, zip(resultado['titulos'], resultado['autores'],
+                                resultado['anos'], resultado['precos']), resultado['validos'])
+    return ([(linha, livro) for linha, livro, valido in validados if valido],
+            [(linhas[indice], erro) for indice, erro in resultado['erros']])
+
+
+def _validar_livros_csv(linhas: List[int], livros: List[Dict]) -> Tuple[List[Tuple[int, Tuple]], List[Tuple[int, str]]]:
+    # Mesmo que _validar_colunas, para linhas lidas do CSV (um dicionário por livro)
+    return _validar_colunas(linhas, {campo: [livro[campo] for livro in livros] for campo in CAMPOS_IMPORTACAO})
+
+
+def _validar_trecho_csv(caminho_csv: str, inicio: int, fim: int,
+                        indices: Dict[str, int]) -> Tuple[int, List[Tuple[int, Tuple]], List[Tuple[int, str]]]:
+    # Executada nos processos da importação paralela: lê os bytes [inicio, fim) do arquivo,
+    # interpreta as linhas e valida os livros. Retorna (linhas lidas, [(linha, livro)],
+    # [(linha, erro)]) com números de linha relativos ao trecho.
+    with open(caminho_csv, 'rb') as arquivo:
+        arquivo.seek(inicio)
+        dados = arquivo.read(fim - inicio)
+    
+    linhas = (linha_bytes.decode('utf-8') for linha_bytes in io.BytesIO(dados))
+    livros = [
+        {campo: row[indice] if indice < len(row) else '' for campo, indice in indices.items()}
+        for row in csv.reader(linhas) if row
+    ]
+    validos, erros = _validar_livros_csv(list(range(1, len(livros) + 1)), livros)
+    return len(livros), validos, erros
+
+
+def _importar_pyarrow():
+    # pyarrow é opcional: só é importado quando um formato colunar é usado
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Os formatos Parquet e Arrow requerem o pacote pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+def _abrir_texto(caminho: Path, modo: str):
+    # Arquivos de texto terminados em .gz são lidos/gravados com gzip
+    if caminho.suffix == '.gz':
+        return gzip.open(caminho, modo + 't', newline='', encoding='utf-8')
+    return open(caminho, modo, newline='', encoding='utf-8')
+
+
+class FormatoCSV:
+    # Formatos de arquivo de FORMATOS_ARQUIVO: exportar() grava as linhas conforme chegam e
+    # devolve a quantidade gravada; ler_lotes() devolve lotes em colunas (campo -> valores)
+    extensao = '.csv'
+    compactacao_gzip = True
+    
+    def exportar(self, linhas: Iterable[Tuple], caminho: Path, colunas: List[str], compactar: bool) -> int:
+        with _abrir_texto(caminho, 'w') as arquivo:
+            return self.escrever(linhas, arquivo, colunas)
+    
+    def escrever(self, linhas: Iterable[Tuple], arquivo, colunas: List[str]) -> int:
+        # Formatos de texto também gravam em qualquer arquivo aberto (ex.: uma resposta HTTP)
+        total = 0
+        writer = csv.writer(arquivo)
+        # Cabeçalho
+        writer.writerow([COLUNAS_CSV[coluna] for coluna in colunas])
+        # Dados
+        for linha in linhas:
+            writer.writerow(linha)
+            total += 1
+        return total
+    
+    def ler_lotes(self, caminho: Path, tamanho_lote: int) -> Iterator[Dict[str, List]]:
+        with _abrir_texto(caminho, 'r') as arquivo:
+            reader = csv.reader(arquivo)
+            cabecalho = next(reader, None)
+            if cabecalho is None:
+                return
+            indices = GerenciadorArquivos._indices_colunas(cabecalho)
+            linhas = (row for row in reader if row)
+            while True:
+                lote = list(islice(linhas, tamanho_lote))
+                if not lote:
+                    return
+                yield {campo: [row[indice] if indice < len(row) else '' for row in lote]
+                       for campo, indice in indices.items()}
+
+
+class FormatoNDJSON:
+    # Um objeto JSON por linha, com os nomes dos campos (titulo, autor, ...) como chaves
+    extensao = '.ndjson'
+    compactacao_gzip = True
+    
+    def exportar(self, linhas: Iterable[Tuple], caminho: Path, colunas: List[str], compactar: bool) -> int:
+        with _abrir_texto(caminho, 'w') as arquivo:
+            return self.escrever(linhas, arquivo, colunas)
+    
+    def escrever(self, linhas: Iterable[Tuple], arquivo, colunas: List[str]) -> int:
+        total = 0
+        linhas = iter(linhas)
+        while True:
+            lote = list(islice(linhas, 1000))
+            if not lote:
+                break
+            arquivo.writelines(json.dumps(dict(zip(colunas, linha)), ensure_ascii=False) + '\n'
+                               for linha in lote)
+            total += len(lote)
+        return total
+    
+    def ler_lotes(self, caminho: Path, tamanho_lote: int) -> Iterator[Dict[str, List]]:
+        with _abrir_texto(caminho, 'r') as arquivo:
+            registros = (json.loads(linha) for linha in arquivo if linha.strip())
+            while True:
+                lote = list(islice(registros, tamanho_lote))
+                if not lote:
+                    return
+                yield {campo: [registro.get(campo) for registro in lote] for campo in CAMPOS_IMPORTACAO}
+
+
+class FormatoParquet:
+    # Colunar, com tipos (ano inteiro, preço float64): quem lê não converte texto e pode ler
+    # só as colunas de que precisa. Gravado em grupos de linhas de TAMANHO_LOTE_COLUNAR.
+    extensao = '.parquet'
+    compactacao_gzip = False
+    
+    def exportar(self, linhas: Iterable[Tuple], caminho: Path, colunas: List[str], compactar: bool) -> int:
+        pyarrow = _importar_pyarrow()
+        import pyarrow.parquet
+        
+        esquema = _esquema_arrow(pyarrow, colunas)
+        writer = pyarrow.parquet.ParquetWriter(str(caminho), esquema,
+                                               compression='zstd' if compactar else 'snappy')
+        try:
+            total = 0
+            for lote in _lotes_arrow(pyarrow, esquema, linhas):
+                writer.write_table(pyarrow.Table.from_batches([lote]))
+                total += lote.num_rows
+        finally:
+            writer.close()
+        return total
+    
+    def ler_lotes(self, caminho: Path, tamanho_lote: int) -> Iterator[Dict[str, List]]:
+        _importar_pyarrow()
+        import pyarrow.parquet
+        
+        arquivo = pyarrow.parquet.ParquetFile(str(caminho))
+        _verificar_campos_arrow(arquivo.schema_arrow.names)
+        for lote in arquivo.iter_batches(batch_size=tamanho_lote, columns=CAMPOS_IMPORTACAO):
+            yield lote.to_pydict()
+
+
+class FormatoArrow:
+    # Arrow IPC (Feather v2): o formato em memória do Arrow gravado em disco, lido por
+    # mapeamento de memória sem conversão
+    extensao = '.arrow'
+    compactacao_gzip = False
+    
+    def exportar(self, linhas: Iterable[Tuple], caminho: Path, colunas: List[str], compactar: bool) -> int:
+        pyarrow = _importar_pyarrow()
+        import pyarrow.ipc
+        
+        esquema = _esquema_arrow(pyarrow, colunas)
+        opcoes = pyarrow.ipc.IpcWriteOptions(compression='zstd' if compactar else None)
+        total = 0
+        with pyarrow.ipc.new_file(str(caminho), esquema, options=opcoes) as writer:
+            for lote in _lotes_arrow(pyarrow, esquema, linhas):
+                writer.write_batch(lote)
+                total += lote.num_rows
+        return total
+    
+    def ler_lotes(self, caminho: Path, tamanho_lote: int) -> Iterator[Dict[str, List]]:
+        pyarrow = _importar_pyarrow()
+        import pyarrow.ipc
+        
+        with pyarrow.memory_map(str(caminho)) as origem:
+            leitor = pyarrow.ipc.open_file(origem)
+            _verificar_campos_arrow(leitor.schema.names)
+            for indice in range(leitor.num_record_batches):
+                lote = leitor.get_batch(indice)
+                for inicio in range(0, lote.num_rows, tamanho_lote):
+                    trecho = lote.slice(inicio, tamanho_lote)
+                    yield {campo: trecho.column(trecho.schema.get_field_index(campo)).to_pylist()
+                           for campo in CAMPOS_IMPORTACAO}
+
+
+def _esquema_arrow(pyarrow, colunas: List[str]):
+    return pyarrow.schema([(coluna, getattr(pyarrow, TIPOS_COLUNAS[coluna])()) for coluna in colunas])
+
+
+def _lotes_arrow(pyarrow, esquema, linhas: Iterable[Tuple]):
+    # Converte as linhas do cursor em RecordBatches de TAMANHO_LOTE_COLUNAR linhas
+    linhas = iter(linhas)
+    while True:
+        lote = list(islice(linhas, TAMANHO_LOTE_COLUNAR))
+        if not lote:
+            return
+        colunas = list(zip(*lote))
+        yield pyarrow.RecordBatch.from_arrays(
+            [pyarrow.array(valores, type=campo.type) for valores, campo in zip(colunas, esquema)],
+            schema=esquema)
+
+
+def _verificar_campos_arrow(nomes: List[str]):
+    faltando = [campo for campo in CAMPOS_IMPORTACAO if campo not in nomes]
+    if faltando:
+        raise ValueError(f"Colunas ausentes no arquivo: {', '.join(faltando)}")
+
+
+# Formatos de exportação/importação, pelo nome. Novos formatos seguem a interface de
+# FormatoCSV (extensao, compactacao_gzip, exportar e ler_lotes) e são registrados aqui.
+FORMATOS_ARQUIVO = {
+    'csv': FormatoCSV(),
+    'ndjson': FormatoNDJSON(),
+    'parquet': FormatoParquet(),
+    'arrow': FormatoArrow(),
+}
+
+
+def formato_do_arquivo(nome_arquivo: str) -> str:
+    # Nome do formato pela extensão (ignorando um .gz final)
+    nome = nome_arquivo[:-3] if nome_arquivo.endswith('.gz') else nome_arquivo
+    for nome_formato, formato in FORMATOS_ARQUIVO.items():
+        if nome.endswith(formato.extensao):
+            return nome_formato
+    raise ValueError(f"Formato de arquivo não reconhecido: {nome_arquivo}. "
+                     f"Use um de: {', '.join(FORMATOS_ARQUIVO)}")
+
+
+class HistogramaLatencia:
+    # Histograma com baldes logarítmicos (4 por potência de 2, ~19% de largura): memória
+    # fixa, qualquer que seja a quantidade de medições. Os percentis são o limite superior
+    # do balde, em segundos.
+    __slots__ = ('contagem', 'soma', 'maximo', 'linhas', 'baldes')
+    
+    def __init__(self):
+        self.contagem = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+        self.linhas = 0
+        self.baldes = {}
+    
+    def registrar(self, segundos: float, linhas: int = 0):
+        self.contagem += 1
+        self.soma += segundos
+        self.linhas += linhas
+        if segundos > self.maximo:
+            self.maximo = segundos
+        balde = math.ceil(math.log2(segundos * 1e6) * 4) if segundos > 1e-6 else 0
+        self.baldes[balde] = self.baldes.get(balde, 0) + 1
+    
+    def percentil(self, p: float) -> float:
+        alvo = p * self.contagem
+        acumulado = 0
+        for balde in sorted(self.baldes):
+            acumulado += self.baldes[balde]
+            if acumulado >= alvo:
+                return min(2 ** (balde / 4) / 1e6, self.maximo)
+        return self.maximo
+    
+    def resumo(self) -> Dict:
+        return {
+            'contagem': self.contagem,
+            'total_ms': self.soma * 1000,
+            'media_ms': self.soma / self.contagem * 1000 if self.contagem else 0.0,
+            'p50_ms': self.percentil(0.50) * 1000,
+            'p95_ms': self.percentil(0.95) * 1000,
+            'p99_ms': self.percentil(0.99) * 1000,
+            'max_ms': self.maximo * 1000,
+            'linhas': self.linhas,
+        }
+
+
+# Literais (textos e números) trocados por ? para agrupar o mesmo comando SQL com valores diferentes
+_LITERAIS_SQL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+class Metricas:
+    # Instrumentação opcional do DatabaseManager e do GerenciadorArquivos: latência de cada
+    # operação (contagem, p50/p95/p99, linhas afetadas), tempo de cada comando SQL (via
+    # set_trace_callback) e contadores como os bytes copiados pelos backups. Sem um objeto
+    # Metricas (o padrão) cada operação custa só a verificação de que ele não existe.
+    # arquivo: caminho opcional onde salvar() grava as métricas em JSON (ex.: ao encerrar).
+    def __init__(self, rastrear_sql: bool = True, max_comandos_sql: int = 200, arquivo: Optional[str] = None):
+        self.rastrear_sql = rastrear_sql
+        self.max_comandos_sql = max_comandos_sql
+        self.arquivo = arquivo
+        self._lock = threading.Lock()
+        self.operacoes = {}  # nome -> HistogramaLatencia
+        self.comandos_sql = {}  # comando normalizado -> HistogramaLatencia
+        self.contadores = {}
+        self.inicio = datetime.now()
+    
+    def registrar(self, operacao: str, segundos: float, linhas: int = 0):
+        with self._lock:
+            histograma = self.operacoes.get(operacao)
+            if histograma is None:
+                histograma = self.operacoes[operacao] = HistogramaLatencia()
+            histograma.registrar(segundos, linhas)
+    
+    def registrar_sql(self, comando: str, segundos: float):
+        comando = ' '.join(_LITERAIS_SQL.sub('?', comando).split())
+        with self._lock:
+            histograma = self.comandos_sql.get(comando)
+            if histograma is None:
+                # Limita a memória se a aplicação gerar comandos demais
+                if len(self.comandos_sql) >= self.max_comandos_sql:
+                    comando = '(outros comandos)'
+                histograma = self.comandos_sql.setdefault(comando, HistogramaLatencia())
+            histograma.registrar(segundos)
+    
+    def somar(self, contador: str, valor: int = 1):
+        with self._lock:
+            self.contadores[contador] = self.contadores.get(contador, 0) + valor
+    
+    def rastreador_sql(self) -> 'RastreadorSQL':
+        return RastreadorSQL(self)
+    
+    def limpar(self):
+        with self._lock:
+            self.operacoes.clear()
+            self.comandos_sql.clear()
+            self.contadores.clear()
+            self.inicio = datetime.now()
+    
+    def estatisticas(self, limite_sql: int = 20) -> Dict:
+        # Operações em ordem alfabética; comandos SQL pelo tempo total, os mais caros primeiro
+        with self._lock:
+            comandos = sorted(self.comandos_sql.items(), key=lambda item: item[1].soma, reverse=True)
+            return {
+                'desde': self.inicio.isoformat(timespec='seconds'),
+                'operacoes': {nome: self.operacoes[nome].resumo() for nome in sorted(self.operacoes)},
+                'sql': [dict(comando=comando, **histograma.resumo()) for comando, histograma in comandos[:limite_sql]],
+                'contadores': dict(sorted(self.contadores.items())),
+            }
+    
+    def salvar(self, caminho: Optional[str] = None) -> str:
+        # Grava em arquivo temporário e renomeia, como os pontos de retomada da importação
+        caminho = Path(caminho or self.arquivo)
+        caminho_temporario = caminho.with_name(caminho.name + '.tmp')
+        with open(caminho_temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(self.estatisticas(limite_sql=self.max_comandos_sql), arquivo, ensure_ascii=False, indent=2)
+        os.replace(caminho_temporario, caminho)
+        return str(caminho)
+
+
+class RastreadorSQL:
+    # Callback de set_trace_callback de uma conexão. O SQLite avisa só o início de cada
+    # comando, então o tempo de um comando vai do seu início até o próximo comando ou o fim
+    # da operação (finalizar), incluindo a leitura das linhas pelo Python. Os comandos de
+    # triggers chegam repetindo o comando que os disparou, e os internos do FTS5 chegam
+    # como comentários ("-- ..."); ambos contam como parte do comando original.
+    __slots__ = ('metricas', 'comando', 'inicio')
+    
+    def __init__(self, metricas: Metricas):
+        self.metricas = metricas
+        self.comando = None
+        self.inicio = 0.0
+    
+    def __call__(self, comando: str):
+        if comando == self.comando or comando.startswith('--'):
+            return
+        agora = time.perf_counter()
+        if self.comando is not None:
+            self.metricas.registrar_sql(self.comando, agora - self.inicio)
+        self.comando = comando
+        self.inicio = agora
+    
+    def finalizar(self):
+        if self.comando is not None:
+            self.metricas.registrar_sql(self.comando, time.perf_counter() - self.inicio)
+            self.comando = None
+
+
+def _medir(operacao: str, linhas: Optional[Callable[[object], int]] = None):
+    # Mede o método em self.metricas (se houver); linhas(resultado) conta as linhas afetadas
+    def decorador(metodo):
+        @functools.wraps(metodo)
+        def medido(self, *args, **kwargs):
+            metricas = self.metricas
+            if metricas is None:
+                return metodo(self, *args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                resultado = metodo(self, *args, **kwargs)
+            except Exception:
+                metricas.registrar(f"{operacao}.erro", time.perf_counter() - inicio)
+                raise
+            metricas.registrar(operacao, time.perf_counter() - inicio, linhas(resultado) if linhas else 0)
+            return resultado
+        return medido
+    return decorador
+
+
+def _compactador_backup(compressao: str) -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    # (compactar, descompactar) dos objetos do armazém de backups. zstandard é opcional e só é
+    # importado quando usado; cada chamada cria seu compressor, pois eles não podem ser
+    # compartilhados entre threads
+    if compressao == 'gzip':
+        return (lambda dados: gzip.compress(dados, compresslevel=6, mtime=0)), gzip.decompress
+    if compressao == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("A compressão zstd requer o pacote zstandard (pip install zstandard)") from None
+        return (lambda dados: zstandard.ZstdCompressor(level=3).compress(dados),
+                lambda dados: zstandard.ZstdDecompressor().decompress(dados))
+    raise ValueError(f"Compressão inválida: {compressao}. Use uma de: {', '.join(EXTENSOES_COMPRESSAO)}")
+
+
+def _compressao_padrao() -> str:
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return 'gzip'
+    return 'zstd'
+
+
+def _em_paralelo(funcao: Callable, itens: Iterable, janela: int = 64) -> Iterator:
+    # map() em threads, na ordem dos itens. gzip, zstd e hashlib liberam o GIL com blocos
+    # grandes, então com mais de um processador os blocos são processados em paralelo;
+    # a janela limita quantos resultados ficam em memória ao mesmo tempo.
+    processadores = os.cpu_count() or 1
+    if processadores == 1:
+        yield from map(funcao, itens)
+        return
+    from concurrent.futures import ThreadPoolExecutor
+    itens = iter(itens)
+    with ThreadPoolExecutor(max_workers=processadores, thread_name_prefix="livraria-backup") as executor:
+        while True:
+            lote = list(islice(itens, janela))
+            if not lote:
+                return
+            yield from executor.map(funcao, lote)
+
+
+class ArmazemBackups:
+    # Backups completos guardados por conteúdo. O banco é dividido em blocos de
+    # TAMANHO_BLOCO_BACKUP bytes e cada bloco diferente é gravado uma única vez, compactado,
+    # em objetos/<hash[:2]>/<hash[2:]>, com o SHA-256 do conteúdo como nome. O SQLite altera
+    # as páginas no lugar, então backups seguidos compartilham quase todos os blocos e cada
+    # novo backup grava só os blocos que mudaram.
+    #
+    # O índice (indice.db) guarda a lista de blocos de cada backup, quantos backups usam cada
+    # objeto e os backups incrementais de cada backup completo: listar, restaurar e limpar
+    # não dependem de percorrer o diretório.
+    def __init__(self, diretorio: Path, compressao: Optional[str] = None):
+        self.diretorio = Path(diretorio)
+        self.diretorio_objetos = self.diretorio / "objetos"
+        self.caminho_indice = self.diretorio / "indice.db"
+        self.compressao = compressao or _compressao_padrao()
+        if self.compressao not in EXTENSOES_COMPRESSAO:
+            raise ValueError(f"Compressão inválida: {self.compressao}. Use uma de: {', '.join(EXTENSOES_COMPRESSAO)}")
+        
+        self.diretorio_objetos.mkdir(parents=True, exist_ok=True)
+        conn = self._conectar()
+        try:
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS backups (
+                    nome TEXT PRIMARY KEY,
+                    momento TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    tamanho INTEGER NOT NULL,
+                    gravado INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    blocos BLOB NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_backups_momento ON backups (momento);
+                CREATE TABLE IF NOT EXISTS objetos (
+                    hash BLOB PRIMARY KEY,
+                    compressao TEXT NOT NULL,
+                    tamanho INTEGER NOT NULL,
+                    referencias INTEGER NOT NULL
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS incrementais (
+                    arquivo TEXT PRIMARY KEY,
+                    base TEXT NOT NULL,
+                    seq_inicial INTEGER NOT NULL,
+                    seq_final INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_incrementais_base ON incrementais (base);
+            ''')
+        finally:
+            conn.close()
+    
+    def _conectar(self) -> sqlite3.Connection:
+        # Um backup grande pode manter o índice travado por bastante tempo; outros processos esperam
+        return sqlite3.connect(self.caminho_indice, timeout=300)
+    
+    def _caminho_objeto(self, resumo: bytes, compressao: str) -> Path:
+        nome = resumo.hex()
+        return self.diretorio_objetos / nome[:2] / (nome[2:] + EXTENSOES_COMPRESSAO[compressao])
+    
+    def _gravar_objeto(self, resumo: bytes, dados: bytes):
+        # Grava em arquivo temporário, sincroniza e renomeia: o índice só aponta para objetos completos
+        caminho = self._caminho_objeto(resumo, self.compressao)
+        caminho.parent.mkdir(exist_ok=True)
+        caminho_temporario = caminho.with_name(caminho.name + '.tmp')
+        with open(caminho_temporario, 'wb') as arquivo:
+            arquivo.write(dados)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(caminho_temporario, caminho)
+    
+    def guardar(self, nome: str, blocos: Iterable[bytes], seq: int, momento: Optional[str] = None) -> Dict:
+        # Guarda um backup (blocos do banco, em ordem) e devolve seu resumo, como em listar().
+        # Se o nome já existe, recebe um contador (_1, _2...). Tudo acontece com o índice
+        # travado para escrita, então a limpeza feita por outro processo nunca remove um
+        # objeto que este backup vai usar.
+        compactar, _ = _compactador_backup(self.compressao)
+        momento = momento or datetime.now().isoformat()
+        total = hashlib.sha256()
+        resumos = bytearray()
+        usados = set()
+        tamanho = 0
+        gravado = 0
+        
+        conn = self._conectar()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            base, extensao = os.path.splitext(nome)
+            contador = 1
+            while conn.execute('SELECT 1 FROM backups WHERE nome = ?', (nome,)).fetchone():
+                nome = f"{base}_{contador}{extensao}"
+                contador += 1
+            
+            blocos = iter(blocos)
+            while True:
+                lote = list(islice(blocos, 64))
+                if not lote:
+                    break
+                novos = []
+                for bloco, resumo in zip(lote, _em_paralelo(lambda dados: hashlib.sha256(dados).digest(), lote)):
+                    total.update(bloco)
+                    tamanho += len(bloco)
+                    resumos += resumo
+                    if resumo in usados:
+                        continue
+                    usados.add(resumo)
+                    if conn.execute('SELECT 1 FROM objetos WHERE hash = ?', (resumo,)).fetchone() is None:
+                        novos.append((resumo, bloco))
+                # Só os blocos novos são compactados e gravados
+                for (resumo, _), dados in zip(novos, _em_paralelo(compactar, [bloco for _, bloco in novos])):
+                    self._gravar_objeto(resumo, dados)
+                    conn.execute('INSERT INTO objetos (hash, compressao, tamanho, referencias) VALUES (?, ?, ?, 0)',
+                                 (resumo, self.compressao, len(dados)))
+                    gravado += len(dados)
+            
+            conn.executemany('UPDATE objetos SET referencias = referencias + 1 WHERE hash = ?',
+                             ((resumo,) for resumo in usados))
+            conn.execute('''
+                INSERT INTO backups (nome, momento, seq, tamanho, gravado, sha256, blocos)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (nome, momento, seq, tamanho, gravado, total.hexdigest(), bytes(resumos)))
+            conn.commit()
+        finally:
+            conn.close()
+        
+        return {'nome': nome, 'momento': momento, 'seq': seq, 'tamanho': tamanho, 'gravado': gravado,
+                'blocos': len(resumos) // 32}
+    
+    def ler(self, nome: str) -> Iterator[bytes]:
+        # Blocos do backup em ordem, cada um conferido com o seu hash; ao final, confere
+        # também o hash do banco inteiro. Um backup danificado gera ValueError.
+        conn = self._conectar()
+        try:
+            linha = conn.execute('SELECT blocos, sha256 FROM backups WHERE nome = ?', (nome,)).fetchone()
+            if linha is None:
+                raise FileNotFoundError(f"Backup {nome} não encontrado")
+            blocos, sha256 = linha
+            resumos = [blocos[i:i + 32] for i in range(0, len(blocos), 32)]
+            compressoes = {}
+            for resumo in resumos:
+                if resumo not in compressoes:
+                    objeto = conn.execute('SELECT compressao FROM objetos WHERE hash = ?', (resumo,)).fetchone()
+                    if objeto is None:
+                        raise ValueError(f"Backup {nome} danificado: objeto {resumo.hex()} não está no índice")
+                    compressoes[resumo] = objeto[0]
+        finally:
+            conn.close()
+        
+        descompactadores = {compressao: _compactador_backup(compressao)[1] for compressao in set(compressoes.values())}
+        
+        def carregar(resumo: bytes) -> bytes:
+            caminho = self._caminho_objeto(resumo, compressoes[resumo])
+            try:
+                with open(caminho, 'rb') as arquivo:
+                    dados = descompactadores[compressoes[resumo]](arquivo.read())
+            except Exception as e:
+                raise ValueError(f"Backup {nome} danificado: objeto {caminho.name} ilegível ({e})") from None
+            if hashlib.sha256(dados).digest() != resumo:
+                raise ValueError(f"Backup {nome} danificado: objeto {caminho.name} não confere com o hash")
+            return dados
+        
+        total = hashlib.sha256()
+        for dados in _em_paralelo(carregar, resumos):
+            total.update(dados)
+            yield dados
+        if total.hexdigest() != sha256:
+            raise ValueError(f"Backup {nome} danificado: o banco remontado não confere com o hash")
+    
+    def listar(self) -> List[Dict]:
+        # Backups do mais recente ao mais antigo
+        conn = self._conectar()
         try:
-            # Substitui vírgula por ponto para aceitar formato brasileiro
-            preco = preco.replace(',', '.')
-            preco_float = float(preco)
-            if preco_float < 0:
-                raise ValidationError("O preço não pode ser negativo")
-            if preco_float > 999999.99:
-                raise ValidationError("O preço não pode ser maior que R$ 999.999,99")
-            return round(preco_float, 2)
-        except ValueError:
-            raise ValidationError("Preço deve ser um número válido (ex: 29.90 ou 29,90)")
+            linhas = conn.execute('''
+                SELECT nome, momento, seq, tamanho, gravado, length(blocos) / 32
+                FROM backups ORDER BY momento DESC, nome DESC
+            ''').fetchall()
+        finally:
+            conn.close()
+        return [dict(zip(('nome', 'momento', 'seq', 'tamanho', 'gravado', 'blocos'), linha)) for linha in linhas]
+    
+    def estatisticas(self) -> Dict:
+        conn = self._conectar()
+        try:
+            backups, tamanho_total = conn.execute('SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM backups').fetchone()
+            objetos, armazenado = conn.execute('SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM objetos').fetchone()
+        finally:
+            conn.close()
+        return {'backups': backups, 'tamanho_total': tamanho_total, 'objetos': objetos, 'armazenado': armazenado}
+    
+    def registrar_incremental(self, arquivo: str, base: str, seq_inicial: int, seq_final: int):
+        conn = self._conectar()
+        try:
+            with conn:
+                conn.execute('INSERT OR IGNORE INTO incrementais (arquivo, base, seq_inicial, seq_final) VALUES (?, ?, ?, ?)',
+                             (arquivo, base, seq_inicial, seq_final))
+        finally:
+            conn.close()
+    
+    def incrementais(self, base: Optional[str] = None) -> List[Dict]:
+        # Backups incrementais feitos sobre o backup completo base (ou todos), em ordem
+        conn = self._conectar()
+        try:
+            linhas = conn.execute('''
+                SELECT arquivo, base, seq_inicial, seq_final FROM incrementais
+                WHERE ? IS NULL OR base = ? ORDER BY seq_inicial
+            ''', (base, base)).fetchall()
+        finally:
+            conn.close()
+        return [dict(zip(('arquivo', 'base', 'seq_inicial', 'seq_final'), linha)) for linha in linhas]
+    
+    def aplicar_retencao(self, retencao: Dict[str, int]) -> List[str]:
+        # Mantém os backups pedidos por retencao (ver RETENCAO_BACKUPS) e remove os demais,
+        # junto com seus incrementais e os objetos que nenhum backup restante usa.
+        # Retorna os nomes removidos.
+        mantidos = set()
+        backups = self.listar()
+        for backup in backups[:retencao.get('recentes', 0)]:
+            mantidos.add(backup['nome'])
+        # Em cada faixa, o backup mais recente de cada uma das últimas N horas/dias/semanas com backup
+        periodos = {
+            'horarios': lambda momento: momento[:13],
+            'diarios': lambda momento: momento[:10],
+            'semanais': lambda momento: datetime.fromisoformat(momento).isocalendar()[:2],
+        }
+        for faixa, periodo_de in periodos.items():
+            vistos = set()
+            for backup in backups:
+                if len(vistos) >= retencao.get(faixa, 0):
+                    break
+                periodo = periodo_de(backup['momento'])
+                if periodo not in vistos:
+                    vistos.add(periodo)
+                    mantidos.add(backup['nome'])
+        
+        removidos = [backup['nome'] for backup in backups if backup['nome'] not in mantidos]
+        if removidos:
+            self.remover(removidos)
+        return removidos
+    
+    def remover(self, nomes: Iterable[str]):
+        arquivos = []
+        conn = self._conectar()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for nome in nomes:
+                linha = conn.execute('SELECT blocos FROM backups WHERE nome = ?', (nome,)).fetchone()
+                if linha is None:
+                    continue
+                resumos = {linha[0][i:i + 32] for i in range(0, len(linha[0]), 32)}
+                conn.executemany('UPDATE objetos SET referencias = referencias - 1 WHERE hash = ?',
+                                 ((resumo,) for resumo in resumos))
+                arquivos += [self.diretorio / arquivo for (arquivo,) in
+                             conn.execute('SELECT arquivo FROM incrementais WHERE base = ?', (nome,))]
+                conn.execute('DELETE FROM incrementais WHERE base = ?', (nome,))
+                conn.execute('DELETE FROM backups WHERE nome = ?', (nome,))
+            
+            orfaos = conn.execute('SELECT hash, compressao FROM objetos WHERE referencias <= 0').fetchall()
+            conn.execute('DELETE FROM objetos WHERE referencias <= 0')
+            arquivos += [self._caminho_objeto(resumo, compressao) for resumo, compressao in orfaos]
+            conn.commit()
+        finally:
+            conn.close()
+        
+        # Arquivos só são apagados depois do commit; uma falha aqui deixa no máximo lixo, nunca um backup incompleto
+        for arquivo in arquivos:
+            try:
+                arquivo.unlink()
+            except FileNotFoundError:
+                pass
 
 
 class GerenciadorArquivos:
-    def __init__(self, diretorio_base: str):
+    def __init__(self, diretorio_base: str, metricas: Optional[Metricas] = None,
+                 retencao_backups: Optional[Dict[str, int]] = None, compressao_backups: Optional[str] = None,
+                 criar_diretorios: bool = True):
         self.diretorio_base = Path(diretorio_base)
+        self.metricas = metricas
+        # Política de retenção (ver RETENCAO_BACKUPS) e compressão ('gzip' ou 'zstd'; padrão:
+        # zstd se o pacote zstandard estiver instalado) do armazém de backups
+        self.retencao_backups = dict(RETENCAO_BACKUPS, **(retencao_backups or {}))
+        self.compressao_backups = compressao_backups
+        self._armazem = None
         self.diretorio_data = self.diretorio_base / "data"
         self.diretorio_backups = self.diretorio_base / "backups"
         self.diretorio_exports = self.diretorio_base / "exports"
+        self.diretorio_convertidos = self.diretorio_backups / "convertidos"
         self.arquivo_db = self.diretorio_data / "livraria.db"
+        self.backups_convertidos = []  # backups do formato antigo convertidos ao abrir o armazém
         
-        # Criar diretórios se não existirem
-        self._criar_diretorios()
+        # Criar diretórios se não existirem (quem só lê o banco dispensa)
+        if criar_diretorios:
+            self._criar_diretorios()
     
     def _criar_diretorios(self):
         for diretorio in [self.diretorio_data, self.diretorio_backups, self.diretorio_exports]:
             diretorio.mkdir(parents=True, exist_ok=True)
     
+    @property
+    def armazem(self) -> ArmazemBackups:
+        # Aberto no primeiro uso, para não pesar na inicialização (ex.: linha de comando)
+        if self._armazem is None:
+            armazem = ArmazemBackups(self.diretorio_backups, self.compressao_backups)
+            self._importar_backups_antigos(armazem)
+            self._armazem = armazem
+        return self._armazem
+    
+    def _importar_backups_antigos(self, armazem: ArmazemBackups):
+        # Backups do formato anterior (um .db completo por backup) entram no armazém, do mais
+        # antigo ao mais recente. O original não é apagado: depois que a cópia lida de volta do
+        # armazém confere com ele, vai para backups/convertidos (fora do diretório, não é
+        # convertido de novo depois que a retenção remover a cópia) e o nome entra em
+        # backups_convertidos. Incrementais continuam no diretório e passam a constar do índice.
+        antigos = sorted(self.diretorio_backups.glob("backup_livraria_*.db"), key=lambda caminho: caminho.stat().st_mtime)
+        existentes = {backup['nome'] for backup in armazem.listar()} if antigos else set()
+        for caminho in antigos:
+            if caminho.name not in existentes:
+                with open(caminho, 'rb') as arquivo:
+                    armazem.guardar(caminho.name, iter(functools.partial(arquivo.read, TAMANHO_BLOCO_BACKUP), b''),
+                                    self._seq_do_backup(caminho),
+                                    datetime.fromtimestamp(caminho.stat().st_mtime).isoformat())
+            if not self._conversao_confere(armazem, caminho):
+                # Fica como estava; a conversão é refeita na próxima abertura do armazém
+                armazem.remover([caminho.name])
+                continue
+            self.diretorio_convertidos.mkdir(exist_ok=True)
+            os.replace(caminho, self.diretorio_convertidos / caminho.name)
+            self.backups_convertidos.append(caminho.name)
+        
+        registrados = {incremental['arquivo'] for incremental in armazem.incrementais()}
+        for caminho in sorted(self.diretorio_backups.glob("incremental_livraria_*.jsonl")):
+            if caminho.name not in registrados:
+                with open(caminho, 'r', encoding='utf-8') as arquivo:
+                    cabecalho = json.loads(arquivo.readline())
+                armazem.registrar_incremental(caminho.name, cabecalho['base'], cabecalho['seq_inicial'],
+                                              cabecalho['seq_final'])
+    
+    @staticmethod
+    def _conversao_confere(armazem: ArmazemBackups, caminho: Path) -> bool:
+        # O backup guardado, lido de volta do armazém (que confere os hashes), é igual ao arquivo
+        original = hashlib.sha256()
+        with open(caminho, 'rb') as arquivo:
+            for bloco in iter(functools.partial(arquivo.read, TAMANHO_BLOCO_BACKUP), b''):
+                original.update(bloco)
+        guardado = hashlib.sha256()
+        try:
+            for bloco in armazem.ler(caminho.name):
+                guardado.update(bloco)
+        except (OSError, ValueError):
+            return False
+        return guardado.digest() == original.digest()
+    
+    @contextmanager
+    def _copia_consistente(self) -> Iterator[Tuple[Iterator[bytes], int]]:
+        # Blocos de uma cópia consistente do banco, mesmo em uso, e a última alteração
+        # registrada nela. Bancos pequenos são lidos direto para a memória (serialize, dentro
+        # de uma transação de leitura); os maiores passam por um arquivo temporário feito
+        # pela API de backup do SQLite, e a memória usada não depende do tamanho do banco.
+        origem = sqlite3.connect(self.arquivo_db)
+        try:
+            if hasattr(origem, 'serialize') and self.arquivo_db.stat().st_size <= LIMITE_BACKUP_EM_MEMORIA:
+                origem.execute('BEGIN')
+                seq = self._seq_registrado(origem)
+                dados = bytearray(origem.serialize())
+                origem.rollback()
+                # Cópia sem WAL (bytes 18 e 19 do cabeçalho), como um journal_mode = DELETE
+                dados[18:20] = b'\x01\x01'
+                yield (bytes(dados[inicio:inicio + TAMANHO_BLOCO_BACKUP])
+                       for inicio in range(0, len(dados), TAMANHO_BLOCO_BACKUP)), seq
+                return
+            
+            caminho_temporario = self.diretorio_backups / f".copia_{os.getpid()}_{threading.get_ident()}.db"
+            destino = sqlite3.connect(caminho_temporario)
+            try:
+                modo_journal = origem.execute('PRAGMA journal_mode').fetchone()[0]
+                if modo_journal == 'wal':
+                    # Em modo WAL a leitura não bloqueia escritores: copia tudo de uma vez
+                    origem.backup(destino)
+                else:
+                    # Copia em etapas, liberando o banco para escritores entre elas
+                    origem.backup(destino, pages=PAGINAS_POR_ETAPA_BACKUP)
+                destino.execute('PRAGMA journal_mode = DELETE')
+                seq = self._seq_registrado(destino)
+            finally:
+                destino.close()
+            try:
+                with open(caminho_temporario, 'rb') as arquivo:
+                    yield iter(functools.partial(arquivo.read, TAMANHO_BLOCO_BACKUP), b''), seq
+            finally:
+                caminho_temporario.unlink()
+        finally:
+            origem.close()
+    
+    @_medir('backup.completo')
     def criar_backup(self) -> str:
+        # Retorna o nome do backup criado
         if not self.arquivo_db.exists():
             raise FileNotFoundError("Banco de dados não encontrado para backup")
         
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        nome_backup = f"backup_livraria_{timestamp}.db"
-        caminho_backup = self.diretorio_backups / nome_backup
+        with self._copia_consistente() as (blocos, seq):
+            backup = self.armazem.guardar(f"backup_livraria_{timestamp}.db", blocos, seq)
         
-        shutil.copy2(self.arquivo_db, caminho_backup)
+        if self.metricas is not None:
+            self.metricas.somar('backup.bytes_copiados', backup['tamanho'])
+            self.metricas.somar('backup.bytes_gravados', backup['gravado'])
         
-        # Limpar backups antigos após criar o novo
+        # Aplicar a política de retenção após criar o novo
         self._limpar_backups_antigos()
         
-        return str(caminho_backup)
+        return backup['nome']
+    
+    @_medir('backup.incremental')
+    def criar_backup_incremental(self) -> Optional[str]:
+        # Grava apenas as alterações registradas desde o último backup (completo ou
+        # incremental), com custo proporcional ao que mudou e não ao tamanho do banco.
+        # Sem backup completo anterior, cria um. Retorna None se nada mudou.
+        backups = self.listar_backups_completos()
+        if not backups:
+            return self.criar_backup()
+        
+        base = backups[0][0]
+        ultima_seq = self._ultima_alteracao_coberta(base)
+        
+        with sqlite3.connect(self.arquivo_db) as conn:
+            alteracoes = conn.execute('''
+                SELECT seq, operacao, id_livro, dados_antigos, dados_novos, momento
+                FROM livros_alteracoes WHERE seq > ? ORDER BY seq
+            ''', (ultima_seq,)).fetchall()
+        
+        if not alteracoes:
+            return None
+        if self.metricas is not None:
+            self.metricas.somar('backup.alteracoes_gravadas', len(alteracoes))
+        
+        seq_inicial, seq_final = alteracoes[0][0], alteracoes[-1][0]
+        caminho_incremental = self.diretorio_backups / f"incremental_livraria_{seq_inicial:010d}-{seq_final:010d}.jsonl"
+        
+        with open(caminho_incremental, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(json.dumps({'base': base, 'seq_inicial': seq_inicial, 'seq_final': seq_final}) + '\n')
+            for seq, operacao, id_livro, dados_antigos, dados_novos, momento in alteracoes:
+                arquivo.write(json.dumps({
+                    'seq': seq,
+                    'operacao': operacao,
+                    'id': id_livro,
+                    'antes': json.loads(dados_antigos) if dados_antigos else None,
+                    'depois': json.loads(dados_novos) if dados_novos else None,
+                    'momento': momento,
+                }, ensure_ascii=False) + '\n')
+        self.armazem.registrar_incremental(caminho_incremental.name, base, seq_inicial, seq_final)
+        
+        return str(caminho_incremental)
+    
+    @contextmanager
+    def _backup_remontado(self, nome_backup: str) -> Iterator[Path]:
+        # Remonta o backup em um arquivo temporário ao lado do banco. Cada bloco é conferido
+        # com o seu hash enquanto é gravado, e o resultado passa pelo PRAGMA quick_check:
+        # um backup danificado gera ValueError antes de qualquer mudança no banco atual.
+        caminho_temporario = self.diretorio_data / f".restauracao_{os.getpid()}_{threading.get_ident()}.db"
+        try:
+            with open(caminho_temporario, 'wb') as arquivo:
+                for bloco in self.armazem.ler(nome_backup):
+                    arquivo.write(bloco)
+            conn = sqlite3.connect(caminho_temporario)
+            try:
+                resultado = conn.execute('PRAGMA quick_check').fetchone()[0]
+            finally:
+                conn.close()
+            if resultado != 'ok':
+                raise ValueError(f"Backup {nome_backup} danificado: {resultado}")
+            yield caminho_temporario
+        finally:
+            caminho_temporario.unlink(missing_ok=True)
+    
+    @_medir('backup.verificar')
+    def verificar_backup(self, nome_backup: str) -> Dict:
+        # Confere o backup sem restaurá-lo (hashes dos blocos e do banco, e quick_check)
+        with self._backup_remontado(nome_backup) as caminho:
+            tamanho = caminho.stat().st_size
+            with sqlite3.connect(caminho) as conn:
+                livros = conn.execute('SELECT COUNT(*) FROM livros').fetchone()[0]
+            conn.close()
+        return {'nome': nome_backup, 'tamanho': tamanho, 'livros': livros}
+    
+    @_medir('backup.restaurar')
+    def restaurar_backup(self, nome_backup: str) -> int:
+        # Restaura o backup completo informado (já verificado) e reaplica, em ordem, os
+        # backups incrementais feitos sobre ele. Retorna a quantidade de alterações reaplicadas.
+        seqs = dict(self.listar_backups_completos())
+        if nome_backup not in seqs:
+            raise FileNotFoundError(f"Backup {nome_backup} não encontrado")
+        
+        seq_base = seqs[nome_backup]
+        alteracoes = []
+        for alteracao in self._ler_incrementais(nome_backup):
+            if alteracao['seq'] > seq_base:
+                alteracoes.append(alteracao)
+                seq_base = alteracao['seq']
+        
+        with self._backup_remontado(nome_backup) as caminho_backup:
+            self._substituir_banco(caminho_backup, alteracoes)
+        # Novo ponto de partida: os próximos incrementais não podem ter como base um backup
+        # com alterações que a restauração desfez
+        self.criar_backup()
+        return len(alteracoes)
+    
+    @_medir('backup.restaurar_ate_alteracao')
+    def restaurar_ate_alteracao(self, seq_alvo: int, alteracoes: Iterable[Dict]) -> Tuple[str, int]:
+        # Restauração para um ponto no tempo: parte do backup completo mais recente que
+        # não ultrapassa a alteração seq_alvo e reaplica as alterações seguintes do
+        # registro até ela. Retorna (backup usado como base, alterações reaplicadas).
+        # As alterações precisam ser lidas antes de o banco atual ser sobrescrito
+        registro = sorted((alteracao for alteracao in alteracoes if alteracao['seq'] <= seq_alvo),
+                          key=lambda alteracao: alteracao['seq'])
+        with sqlite3.connect(self.arquivo_db) as conn:
+            seq_atual = self._seq_registrado(conn)
+            primeira = conn.execute('SELECT MIN(seq) FROM livros_alteracoes').fetchone()[0]
+        conn.close()
+        
+        for nome_base, seq_base in self.listar_backups_completos():
+            if seq_base > seq_alvo:
+                continue
+            # O registro precisa ter todas as alterações posteriores ao backup: a compactação
+            # descarta as mais antigas (o que há antes de uma lacuna deixada por uma
+            # restauração anterior também fica no registro, então a lacuna não atrapalha)
+            if (primeira is None and seq_atual > seq_base) or (primeira is not None and primeira > seq_base + 1):
+                continue
+            with self._backup_remontado(nome_base) as caminho_base:
+                # Backups anteriores ao registro de alterações não dizem a que ponto dele
+                # correspondem e não servem de base
+                if not self._tem_registro(caminho_base):
+                    continue
+                pendentes = [alteracao for alteracao in registro if alteracao['seq'] > seq_base]
+                self._substituir_banco(caminho_base, pendentes)
+            self.criar_backup()
+            return nome_base, len(pendentes)
+        
+        raise ValueError("Não há backup completo anterior ao momento solicitado que o registro de alterações cubra")
+    
+    def _substituir_banco(self, caminho_base: Path, alteracoes: List[Dict]):
+        # Monta a restauração inteira no arquivo temporário do backup remontado: esquema
+        # atualizado (o backup pode ser de uma versão anterior), alterações reaplicadas e
+        # quick_check. O banco atual só é substituído depois disso, de uma vez, pela API de
+        # backup do SQLite (segura com outras conexões abertas); uma falha antes não o altera.
+        with sqlite3.connect(self.arquivo_db) as conn:
+            seq_atual = self._seq_registrado(conn)
+        conn.close()
+        
+        DatabaseManager(str(caminho_base), perfil=None).close()
+        conn = sqlite3.connect(caminho_base)
+        try:
+            with conn:
+                for alteracao in alteracoes:
+                    # Os triggers registram a alteração reaplicada com o número e o horário
+                    # originais, mesmo que haja lacunas na numeração
+                    self._definir_seq(conn, alteracao['seq'] - 1)
+                    self._aplicar_alteracao(conn, alteracao)
+                    conn.execute('UPDATE livros_alteracoes SET momento = ? WHERE seq = ?',
+                                 (alteracao['momento'], alteracao['seq']))
+                # Mantém a numeração do registro crescente: novas alterações não reutilizam
+                # números das que foram descartadas pela restauração (os incrementais e as
+                # cópias em memória do catálogo dependem disso). A própria restauração consome
+                # um número, então a última alteração sempre muda e serve como versão dos dados
+                # (ETag da API HTTP), mesmo em duas restaurações seguidas.
+                self._definir_seq(conn, max(seq_atual, self._seq_registrado(conn)) + 1)
+            resultado = conn.execute('PRAGMA quick_check').fetchone()[0]
+            if resultado != 'ok':
+                raise ValueError(f"Restauração inconsistente: {resultado}")
+            
+            destino = sqlite3.connect(self.arquivo_db)
+            try:
+                conn.backup(destino)
+            finally:
+                destino.close()
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def _definir_seq(conn: sqlite3.Connection, seq: int):
+        if conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'livros_alteracoes'", (seq,)).rowcount == 0:
+            conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('livros_alteracoes', ?)", (seq,))
+    
+    @staticmethod
+    def _tem_registro(caminho: Path) -> bool:
+        with sqlite3.connect(caminho) as conn:
+            existe = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'livros_alteracoes'").fetchone()
+        conn.close()
+        return existe is not None
+    
+    @staticmethod
+    def _aplicar_alteracao(conn: sqlite3.Connection, alteracao: Dict):
+        id_livro = alteracao['id']
+        depois = alteracao['depois']
+        if alteracao['operacao'] == 'INSERT':
+            conn.execute('''
+                INSERT INTO livros (id, titulo, autor, ano_publicacao, preco) VALUES (?, ?, ?, ?, ?)
+            ''', (id_livro, depois['titulo'], depois['autor'], depois['ano_publicacao'], depois['preco']))
+        elif alteracao['operacao'] == 'UPDATE':
+            conn.execute('''
+                UPDATE livros SET titulo = ?, autor = ?, ano_publicacao = ?, preco = ? WHERE id = ?
+            ''', (depois['titulo'], depois['autor'], depois['ano_publicacao'], depois['preco'], id_livro))
+        elif alteracao['operacao'] == 'DELETE':
+            conn.execute('DELETE FROM livros WHERE id = ?', (id_livro,))
+    
+    def listar_backups(self) -> List[Dict]:
+        # Backups completos do mais recente ao mais antigo: nome, momento, seq (última
+        # alteração contida), tamanho do banco e bytes gravados no armazém por aquele backup
+        return self.armazem.listar()
+    
+    @_medir('backup.listar')
+    def listar_backups_completos(self) -> List[Tuple[str, int]]:
+        # (nome, última alteração contida) dos backups completos, do mais recente ao mais antigo
+        return [(backup['nome'], backup['seq']) for backup in self.armazem.listar()]
+    
+    @staticmethod
+    def _seq_registrado(conn: sqlite3.Connection) -> int:
+        # Número da última alteração registrada no banco. Lido de sqlite_sequence para
+        # continuar correto mesmo depois que o registro é compactado.
+        try:
+            linha = conn.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = 'livros_alteracoes'").fetchone()
+        except sqlite3.OperationalError:
+            # Banco anterior ao registro de alterações
+            linha = None
+        return linha[0] if linha else 0
+    
+    @staticmethod
+    def _seq_do_backup(caminho_backup: Path) -> int:
+        with sqlite3.connect(f"{caminho_backup.resolve().as_uri()}?mode=ro", uri=True) as conn:
+            seq = GerenciadorArquivos._seq_registrado(conn)
+        conn.close()
+        return seq
+    
+    def _ler_incrementais(self, nome_base: str) -> Iterator[Dict]:
+        for incremental in self.armazem.incrementais(nome_base):
+            with open(self.diretorio_backups / incremental['arquivo'], 'r', encoding='utf-8') as arquivo:
+                arquivo.readline()  # cabeçalho
+                for linha in arquivo:
+                    yield json.loads(linha)
+    
+    def _ultima_alteracao_coberta(self, nome_base: str) -> int:
+        ultima_seq = dict(self.listar_backups_completos())[nome_base]
+        for incremental in self.armazem.incrementais(nome_base):
+            ultima_seq = max(ultima_seq, incremental['seq_final'])
+        return ultima_seq
+    
+    @_medir('backup.limpeza')
+    def _limpar_backups_antigos(self):
+        # Remove os backups fora da política de retenção, junto com seus incrementais
+        for nome in self.armazem.aplicar_retencao(self.retencao_backups):
+            print(f"Backup antigo removido: {nome}")
+    
+    def exportar_csv(self, dados: List[Tuple], nome_arquivo: str = "livros_exportados.csv") -> str:
+        caminho_csv, _ = self.exportar_csv_em_fluxo(dados, nome_arquivo)
+        return caminho_csv
+    
+    def exportar_csv_em_fluxo(self, linhas: Iterable[Tuple], nome_arquivo: str = "livros_exportados.csv",
+                              colunas: Optional[List[str]] = None, compactar: bool = False) -> Tuple[str, int]:
+        return self.exportar_em_fluxo(linhas, nome_arquivo, 'csv', colunas, compactar)
+    
+    @_medir('arquivo.exportar', linhas=lambda resultado: resultado[1])
+    def exportar_em_fluxo(self, linhas: Iterable[Tuple], nome_arquivo: str, formato: Optional[str] = None,
+                          colunas: Optional[List[str]] = None, compactar: bool = False) -> Tuple[str, int]:
+        # Grava as linhas conforme chegam (ex.: direto do cursor), sem montar uma lista em memória,
+        # no formato informado (ver FORMATOS_ARQUIVO; padrão: pela extensão do nome).
+        # Retorna (caminho do arquivo, quantidade de linhas gravadas)
+        formato = formato or formato_do_arquivo(nome_arquivo)
+        if formato not in FORMATOS_ARQUIVO:
+            raise ValueError(f"Formato inválido: {formato}. Use um de: {', '.join(FORMATOS_ARQUIVO)}")
+        exportador = FORMATOS_ARQUIVO[formato]
+        if compactar and exportador.compactacao_gzip and not nome_arquivo.endswith('.gz'):
+            nome_arquivo += '.gz'
+        caminho = self.diretorio_exports / nome_arquivo
+        
+        total = exportador.exportar(linhas, caminho, colunas or list(COLUNAS_CSV), compactar)
+        return str(caminho), total
+    
+    def iterar_lotes(self, nome_arquivo: str, tamanho_lote: int = 1000,
+                     formato: Optional[str] = None) -> Iterator[Dict[str, List]]:
+        # Lê um arquivo exportado em qualquer formato de FORMATOS_ARQUIVO em lotes de colunas
+        # (campo -> valores), prontos para Validador.validar_lote
+        caminho = self.diretorio_exports / nome_arquivo
+        if not caminho.exists():
+            raise FileNotFoundError(f"Arquivo {nome_arquivo} não encontrado no diretório exports")
+        
+        formato = formato or formato_do_arquivo(nome_arquivo)
+        return FORMATOS_ARQUIVO[formato].ler_lotes(caminho, tamanho_lote)
+    
+    def importar_csv(self, nome_arquivo: str) -> List[Dict]:
+        livros = []
+        for _, _, livro in self.iterar_csv(nome_arquivo):
+            livros.append({
+                'titulo': livro['titulo'],
+                'autor': livro['autor'],
+                'ano_publicacao': int(livro['ano_publicacao']),
+                'preco': float(livro['preco'])
+            })
+        
+        return livros
+    
+    def iterar_csv(self, nome_arquivo: str, offset: int = 0, linha: int = 0,
+                   campos: Optional[List[str]] = None) -> Iterator[Tuple[int, int, Dict]]:
+        # Gera (número da linha, posição em bytes após a linha, livro) sem carregar o arquivo
+        # inteiro. Para retomar uma leitura, informe o offset e o número da linha salvos;
+        # com offset = 0 as primeiras "linha" linhas de dados são puladas.
+        # campos são as colunas obrigatórias (padrão: título, autor, ano e preço).
+        # Os valores são devolvidos como texto, sem conversão, para serem validados depois.
+        caminho_csv = self.diretorio_exports / nome_arquivo
+        
+        if not caminho_csv.exists():
+            raise FileNotFoundError(f"Arquivo {nome_arquivo} não encontrado no diretório exports")
+        
+        with open(caminho_csv, 'rb') as arquivo:
+            posicao = 0
+            
+            def linhas_do_arquivo():
+                nonlocal posicao
+                for linha_bytes in iter(arquivo.readline, b''):
+                    posicao = arquivo.tell()
+                    yield linha_bytes.decode('utf-8')
+            
+            linhas = linhas_do_arquivo()
+            reader = csv.reader(linhas)
+            
+            cabecalho = next(reader, None)
+            if cabecalho is None:
+                return
+            indices = self._indices_colunas(cabecalho, campos)
+            
+            if offset > posicao:
+                arquivo.seek(offset)
+                posicao = offset
+                numero_linha = linha
+            else:
+                numero_linha = 0
+            
+            for row in reader:
+                if not row:
+                    continue
+                numero_linha += 1
+                if numero_linha <= linha:
+                    continue
+                yield numero_linha, posicao, {
+                    campo: row[indice] if indice < len(row) else ''
+                    for campo, indice in indices.items()
+                }
+    
+    @staticmethod
+    def _indices_colunas(cabecalho: List[str], campos: Optional[List[str]] = None) -> Dict[str, int]:
+        campos = campos or CAMPOS_IMPORTACAO
+        colunas_faltando = [COLUNAS_CSV[c] for c in campos if COLUNAS_CSV[c] not in cabecalho]
+        if colunas_faltando:
+            raise ValueError(f"Colunas ausentes no arquivo CSV: {', '.join(colunas_faltando)}")
+        return {campo: cabecalho.index(coluna) for campo, coluna in COLUNAS_CSV.items()
+                if coluna in cabecalho}
+    
+    def dividir_csv(self, nome_arquivo: str, offset: int = 0,
+                    tamanho_trecho: int = TAMANHO_TRECHO_IMPORTACAO
+                    ) -> Tuple[str, Dict[str, int], Optional[List[Tuple[int, int]]]]:
+        # Divide o arquivo (a partir do offset) em trechos de ~tamanho_trecho bytes que sempre
+        # terminam em fim de linha. Retorna (caminho, índices das colunas, [(início, fim), ...]).
+        # Um campo entre aspas com quebra de linha seria cortado entre dois trechos: se o
+        # arquivo tem algum, os trechos voltam como None e ele deve ser lido em sequência.
+        caminho_csv = self.diretorio_exports / nome_arquivo
+        
+        if not caminho_csv.exists():
+            raise FileNotFoundError(f"Arquivo {nome_arquivo} não encontrado no diretório exports")
+        
+        trechos = []
+        with open(caminho_csv, 'rb') as arquivo:
+            cabecalho = next(csv.reader([arquivo.readline().decode('utf-8')]), None)
+            if cabecalho is None:
+                return str(caminho_csv), {}, trechos
+            indices = self._indices_colunas(cabecalho)
+            
+            inicio = fim = max(offset, arquivo.tell())
+            arquivo.seek(inicio)
+            for linha in arquivo:
+                # Num CSV padrão as aspas de uma linha completa estão aos pares (campos entre
+                # aspas e aspas escapadas como ""); uma quantidade ímpar abre ou fecha um
+                # campo que continua em outra linha
+                if b'"' in linha and linha.count(b'"') % 2:
+                    return str(caminho_csv), indices, None
+                fim += len(linha)
+                if fim - inicio >= tamanho_trecho:
+                    trechos.append((inicio, fim))
+                    inicio = fim
+            if fim > inicio:
+                trechos.append((inicio, fim))
+        
+        return str(caminho_csv), indices, trechos
+    
+    def tamanho_arquivo_exports(self, nome_arquivo: str) -> int:
+        return (self.diretorio_exports / nome_arquivo).stat().st_size
+    
+    def _caminho_progresso_importacao(self, nome_arquivo: str) -> Path:
+        # Ao lado do arquivo importado (nome_arquivo também pode ser um caminho absoluto)
+        caminho = self.diretorio_exports / nome_arquivo
+        return caminho.with_name(f".{caminho.name}.progresso")
+    
+    def ler_progresso_importacao(self, nome_arquivo: str) -> Optional[Dict]:
+        caminho = self._caminho_progresso_importacao(nome_arquivo)
+        if not caminho.exists():
+            return None
+        with open(caminho, 'r', encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    
+    def salvar_progresso_importacao(self, nome_arquivo: str, progresso: Dict):
+        # Grava em arquivo temporário e renomeia, para nunca deixar um ponto de retomada pela metade
+        caminho = self._caminho_progresso_importacao(nome_arquivo)
+        caminho_temporario = caminho.with_suffix('.tmp')
+        with open(caminho_temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(progresso, arquivo)
+        os.replace(caminho_temporario, caminho)
+    
+    def remover_progresso_importacao(self, nome_arquivo: str):
+        caminho = self._caminho_progresso_importacao(nome_arquivo)
+        if caminho.exists():
+            caminho.unlink()
+
+
+class CacheLRU:
+    # Cache em memória para as leituras do DatabaseManager: descarta os itens menos usados
+    # ao passar de max_itens ou de max_bytes (tamanho estimado) e expira itens após ttl segundos
+    def __init__(self, max_itens: int = 1024, max_bytes: int = 16 * 1024 * 1024,
+                 ttl: Optional[float] = 60.0):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._itens = OrderedDict()  # chave -> (valor, expira_em, tamanho)
+        self._lock = threading.Lock()
+        self.bytes_usados = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+        # Incrementada a cada invalidação; uma leitura iniciada antes de uma escrita
+        # não pode guardar no cache o valor antigo que leu
+        self.geracao = 0
+    
+    @staticmethod
+    def _estimar_tamanho(valor) -> int:
+        if isinstance(valor, list):
+            return sys.getsizeof(valor) + sum(CacheLRU._estimar_tamanho(item) for item in valor)
+        if isinstance(valor, tuple):
+            return sys.getsizeof(valor) + sum(sys.getsizeof(campo) for campo in valor)
+        return sys.getsizeof(valor)
+    
+    def obter(self, chave) -> Tuple[bool, object]:
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None:
+                valor, expira_em, tamanho = item
+                if expira_em is None or expira_em > time.monotonic():
+                    self._itens.move_to_end(chave)
+                    self.acertos += 1
+                    return True, valor
+                self._remover(chave)
+            self.falhas += 1
+            return False, None
+    
+    def guardar(self, chave, valor, geracao: int):
+        tamanho = self._estimar_tamanho(valor)
+        with self._lock:
+            if geracao != self.geracao or tamanho > self.max_bytes:
+                return
+            if chave in self._itens:
+                self._remover(chave)
+            expira_em = time.monotonic() + self.ttl if self.ttl is not None else None
+            self._itens[chave] = (valor, expira_em, tamanho)
+            self.bytes_usados += tamanho
+            
+            while len(self._itens) > self.max_itens or self.bytes_usados > self.max_bytes:
+                self._remover(next(iter(self._itens)))
+                self.remocoes += 1
+    
+    def _remover(self, chave):
+        _, _, tamanho = self._itens.pop(chave)
+        self.bytes_usados -= tamanho
+    
+    def invalidar(self, *chaves):
+        with self._lock:
+            self.geracao += 1
+            for chave in chaves:
+                if chave in self._itens:
+                    self._remover(chave)
+    
+    def invalidar_se(self, predicado: Callable[[object, object], bool]):
+        # Remove os itens para os quais predicado(chave, valor) é verdadeiro
+        with self._lock:
+            self.geracao += 1
+            for chave, (valor, _, _) in list(self._itens.items()):
+                if predicado(chave, valor):
+                    self._remover(chave)
+    
+    def limpar(self):
+        with self._lock:
+            self.geracao += 1
+            self._itens.clear()
+            self.bytes_usados = 0
+    
+    def estatisticas(self) -> Dict:
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                'itens': len(self._itens),
+                'bytes': self.bytes_usados,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'remocoes': self.remocoes,
+                'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+            }
+
+
+class DatabaseManager:
+    def __init__(self, caminho_db: str, tamanho_pool: int = 0, perfil: Optional[str] = 'balanced',
+                 cache: Optional[CacheLRU] = None, metricas: Optional[Metricas] = None,
+                 somente_leitura: bool = False):
+        # tamanho_pool = 0 mantém o comportamento antigo (uma conexão por chamada);
+        # valores maiores mantêm até N conexões abertas e reutilizadas entre chamadas.
+        # perfil escolhe as PRAGMAs de PERFIS_DURABILIDADE (None usa os padrões do SQLite).
+        # cache (opcional) guarda as leituras por id, por autor e a listagem completa.
+        # metricas (opcional) mede cada operação e os comandos SQL (ver Metricas).
+        # somente_leitura abre o banco existente sem migrá-lo e sem poder alterá-lo.
+        if perfil is not None and perfil not in PERFIS_DURABILIDADE:
+            raise ValueError(f"Perfil inválido: {perfil}. Use um de: {', '.join(PERFIS_DURABILIDADE)}")
+        self.caminho_db = caminho_db
+        self.tamanho_pool = tamanho_pool
+        self.perfil = perfil
+        self.cache = cache
+        self.metricas = metricas
+        self._rastreadores = {}  # conexão -> RastreadorSQL, só com as métricas ativas
+        self._pool = queue.LifoQueue()
+        self._conexoes_abertas = 0
+        self._lock_pool = threading.Lock()
+        self.espera_maxima_pool = ESPERA_MAXIMA_POOL
+        # Conexões do pool em uso: de qual thread e por quantas operações abertas (ex.: uma
+        # consulta feita enquanto a mesma thread percorre iterar_livros)
+        self._conexao_da_thread = {}
+        self._usos_conexao = {}
+        self._fechado = False
+        self._transacao_local = threading.local()
+        self.somente_leitura = somente_leitura
+        if not somente_leitura:
+            self._migrar_esquema()
+        self._atualizar_estado_esquema()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    @_medir('conexao.abrir')
+    def _abrir_conexao(self) -> sqlite3.Connection:
+        # cached_statements maior mantém os comandos preparados em cache na conexão,
+        # evitando recompilar o SQL a cada chamada quando a conexão é reutilizada
+        if self.somente_leitura:
+            # mode=ro não cria o arquivo se ele não existir
+            conn = sqlite3.connect(f"{Path(self.caminho_db).resolve().as_uri()}?mode=ro", uri=True,
+                                   check_same_thread=False, cached_statements=256)
+        else:
+            conn = sqlite3.connect(self.caminho_db, check_same_thread=False, cached_statements=256)
+        if self.perfil is not None:
+            for pragma, valor in PERFIS_DURABILIDADE[self.perfil].items():
+                # O modo do journal é gravado no arquivo: fica a cargo de quem escreve
+                if pragma == 'journal_mode' and self.somente_leitura:
+                    continue
+                conn.execute(f'PRAGMA {pragma} = {valor}')
+        return conn
+    
+    def _obter_conexao(self) -> sqlite3.Connection:
+        if self._fechado:
+            raise sqlite3.ProgrammingError("DatabaseManager já foi fechado")
+        thread = threading.get_ident()
+        with self._lock_pool:
+            # A thread já usa uma conexão do pool: reutiliza a mesma em vez de esperar por
+            # outra, o que travaria com o pool cheio
+            conn = self._conexao_da_thread.get(thread)
+            if conn is not None:
+                self._usos_conexao[conn] += 1
+                return conn
+        
+        conn = self._reservar_conexao()
+        with self._lock_pool:
+            self._conexao_da_thread[thread] = conn
+            self._usos_conexao[conn] = 1
+        return conn
+    
+    def _reservar_conexao(self) -> sqlite3.Connection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock_pool:
+            if self._conexoes_abertas < self.tamanho_pool:
+                self._conexoes_abertas += 1
+                try:
+                    return self._abrir_conexao()
+                except Exception:
+                    self._conexoes_abertas -= 1
+                    raise
+        
+        # Pool cheio: aguarda uma conexão ser devolvida por outra thread
+        try:
+            return self._pool.get(timeout=self.espera_maxima_pool)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Nenhuma conexão livre no pool após {self.espera_maxima_pool:g} s "
+                f"(tamanho_pool={self.tamanho_pool})") from None
+    
+    def _em_uso_aninhado(self, conn: sqlite3.Connection) -> bool:
+        # A conexão também está em uso por uma operação ainda aberta da mesma thread
+        return self._usos_conexao.get(conn, 0) > 1
+    
+    def _devolver_conexao(self, conn: sqlite3.Connection):
+        with self._lock_pool:
+            self._usos_conexao[conn] -= 1
+            if self._usos_conexao[conn]:
+                return
+            del self._usos_conexao[conn]
+            # Procura a thread pela conexão: um gerador pode terminar em outra thread
+            for thread, conexao in list(self._conexao_da_thread.items()):
+                if conexao is conn:
+                    del self._conexao_da_thread[thread]
+        if self._fechado:
+            conn.close()
+            return
+        self._pool.put(conn)
+    
+    def _rastrear_sql(self, conn: sqlite3.Connection) -> Optional[RastreadorSQL]:
+        # Instala o rastreador de SQL na conexão com as métricas ativas, ou o remove se
+        # elas foram desativadas depois. Só é chamado com métricas ativas ou rastreadores
+        # instalados; sem métricas, as conexões não têm callback nenhum.
+        rastreador = self._rastreadores.get(conn)
+        if self.metricas is not None and self.metricas.rastrear_sql:
+            if rastreador is None or rastreador.metricas is not self.metricas:
+                rastreador = self._rastreadores[conn] = self.metricas.rastreador_sql()
+                conn.set_trace_callback(rastreador)
+            return rastreador
+        if rastreador is not None:
+            conn.set_trace_callback(None)
+            del self._rastreadores[conn]
+        return None
+    
+    @contextmanager
+    def _operacao_aninhada(self, conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+        # Cada operação é um SAVEPOINT da transação (ou da operação) já aberta na conexão.
+        # Uma operação que falha desfaz só a si mesma; o commit fica para quem abriu.
+        rastreador = self._rastrear_sql(conn) if self.metricas or self._rastreadores else None
+        conn.execute('SAVEPOINT operacao')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK TO operacao')
+            raise
+        finally:
+            conn.execute('RELEASE operacao')
+            if rastreador is not None:
+                rastreador.finalizar()
+    
+    @contextmanager
+    def _conexao(self) -> Iterator[sqlite3.Connection]:
+        conn = getattr(self._transacao_local, 'conexao', None)
+        if conn is not None:
+            # Dentro de transacao()
+            with self._operacao_aninhada(conn):
+                yield conn
+            return
+        
+        if self.tamanho_pool <= 0:
+            conn = self._abrir_conexao()
+            rastreador = self._rastrear_sql(conn) if self.metricas or self._rastreadores else None
+            try:
+                with conn:
+                    yield conn
+            finally:
+                if rastreador is not None:
+                    rastreador.finalizar()
+                    del self._rastreadores[conn]
+                conn.close()
+            return
+        
+        conn = self._obter_conexao()
+        if self._em_uso_aninhado(conn):
+            # Chamada enquanto a mesma thread ainda usa a conexão (ex.: dentro de um
+            # "for livro in iterar_livros()")
+            try:
+                with self._operacao_aninhada(conn):
+                    yield conn
+            finally:
+                self._devolver_conexao(conn)
+            return
+        
+        rastreador = self._rastrear_sql(conn) if self.metricas or self._rastreadores else None
+        try:
+            # "with conn" faz commit ao final ou rollback em caso de erro
+            with conn:
+                yield conn
+        finally:
+            if rastreador is not None:
+                rastreador.finalizar()
+            self._devolver_conexao(conn)
+    
+    @contextmanager
+    def transacao(self) -> Iterator[None]:
+        # Agrupa as operações feitas por esta thread dentro do bloco em uma única transação
+        # (um único commit em disco). Uma exceção que escape do bloco desfaz todas elas.
+        if getattr(self._transacao_local, 'conexao', None) is not None:
+            raise sqlite3.ProgrammingError("Já existe uma transação aberta nesta thread")
+        conn = self._obter_conexao() if self.tamanho_pool > 0 else self._abrir_conexao()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            self._transacao_local.conexao = conn
+            try:
+                yield
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                self._transacao_local.conexao = None
+                # As invalidações feitas durante o bloco antecederam o commit
+                self.invalidar_cache()
+        finally:
+            if self.tamanho_pool > 0:
+                self._devolver_conexao(conn)
+            else:
+                conn.close()
+    
+    def close(self):
+        self._fechado = True
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            # Atualiza as estatísticas do planejador se o uso mudou desde o último ANALYZE
+            if not self.somente_leitura:
+                conn.execute('PRAGMA optimize')
+            self._rastreadores.pop(conn, None)
+            conn.close()
+    
+    def _migracoes(self) -> List[Tuple[int, str, Callable[[sqlite3.Cursor], None]]]:
+        # Versões do esquema, em ordem. PRAGMA user_version guarda a última aplicada ao banco.
+        # Novas alterações de esquema entram no fim da lista, nunca alterando as anteriores.
+        return [
+            (1, "tabela livros", self._criar_tabela),
+            (2, "índice de busca FTS5", self._criar_indice_busca),
+            (3, "registro de alterações", self._criar_registro_alteracoes),
+            (4, "índices secundários", self._criar_indices),
+            (5, "estatísticas do índice de busca", self._remover_estatisticas_fts),
+            (6, "índice único da chave natural", self._criar_indice_chave_natural),
+            (7, "estatísticas do catálogo", self._criar_estatisticas),
+            (8, "estatísticas do planejador", self._refazer_estatisticas_planejador),
+        ]
+    
+    def _migrar_esquema(self):
+        # Conexão própria, fechada ao final, em vez de uma do pool: uma conexão carrega as
+        # estatísticas do planejador ao abrir e não as relê quando uma migração as altera
+        # (ANALYZE na migração 4, limpeza na 5 e na 8)
+        conn = self._abrir_conexao()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('PRAGMA user_version')
+            versao = cursor.fetchone()[0]
+            
+            for numero, _, migracao in self._migracoes():
+                if numero <= versao:
+                    continue
+                # Cada migração roda em sua própria transação: ou é aplicada por inteiro
+                # (junto com o novo user_version) ou o banco fica como estava.
+                # BEGIN IMMEDIATE impede que dois processos migrem o mesmo banco ao mesmo tempo.
+                cursor.execute('BEGIN IMMEDIATE')
+                try:
+                    cursor.execute('PRAGMA user_version')
+                    if cursor.fetchone()[0] >= numero:
+                        conn.rollback()
+                        continue
+                    migracao(cursor)
+                    cursor.execute(f'PRAGMA user_version = {numero}')
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+        finally:
+            conn.close()
+    
+    def _atualizar_estado_esquema(self):
+        # Recursos opcionais: o FTS5 pode faltar no SQLite e o índice único da chave
+        # natural só existe em catálogos sem livros duplicados (ver remover_duplicados)
+        with self._conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'livros_fts'")
+            self._fts_disponivel = cursor.fetchone() is not None
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_livros_chave_natural'")
+            self.chave_natural_unica = cursor.fetchone() is not None
+    
+    def versao_esquema(self) -> int:
+        with self._conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute('PRAGMA user_version')
+            return cursor.fetchone()[0]
+    
+    def _criar_tabela(self, cursor: sqlite3.Cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS livros (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                titulo TEXT NOT NULL,
+                autor TEXT NOT NULL,
+                ano_publicacao INTEGER NOT NULL,
+                preco REAL NOT NULL
+            )
+        ''')
+    
+    def _criar_indices(self, cursor: sqlite3.Cursor):
+        # (titulo) atende as listagens ordenadas por título (o índice já inclui o id);
+        # (autor, titulo) as consultas por autor já ordenadas; ano e preço os filtros por faixa
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_livros_titulo ON livros (titulo)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_livros_autor_titulo ON livros (autor, titulo)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_livros_ano ON livros (ano_publicacao)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_livros_preco ON livros (preco)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_alteracoes_momento ON livros_alteracoes (momento)')
+        # Estatísticas para o planejador de consultas passar a usar os novos índices
+        cursor.execute('ANALYZE')
+    
+    def _remover_estatisticas_fts(self, cursor: sqlite3.Cursor):
+        # O ANALYZE da versão 4 roda com o banco vazio e registra as tabelas internas do FTS5
+        # como quase vazias; com isso o planejador escolhe varreduras nas consultas que o FTS5
+        # faz a cada inserção, e importações grandes ficam cada vez mais lentas
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+        if cursor.fetchone() is not None:
+            cursor.execute("DELETE FROM sqlite_stat1 WHERE tbl LIKE 'livros\\_fts\\_%' ESCAPE '\\'")
+    
+    def _criar_indice_chave_natural(self, cursor: sqlite3.Cursor):
+        # Bancos que já têm livros duplicados ficam sem o índice até remover_duplicados()
+        cursor.execute(f'SELECT 1 FROM livros GROUP BY {CHAVE_NATURAL} HAVING COUNT(*) > 1 LIMIT 1')
+        if cursor.fetchone() is None:
+            cursor.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS idx_livros_chave_natural ON livros ({CHAVE_NATURAL})')
+    
+    def _criar_estatisticas(self, cursor: sqlite3.Cursor):
+        # Tabelas de resumo por autor e por década mantidas por triggers na mesma transação
+        # das escritas: o painel de estatísticas lê poucas linhas em vez de percorrer o
+        # catálogo. Preços somados em centavos inteiros, sem erro de arredondamento acumulado.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS estatisticas_autor (
+                autor TEXT PRIMARY KEY,
+                quantidade INTEGER NOT NULL,
+                soma_centavos INTEGER NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS estatisticas_decada (
+                decada INTEGER PRIMARY KEY,
+                quantidade INTEGER NOT NULL,
+                soma_centavos INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_estatisticas_autor_quantidade ON estatisticas_autor (quantidade)')
+        
+        resumos = RESUMOS_ESTATISTICAS
+        
+        def somar(ref: str) -> str:
+            return ''.join(f'''
+                INSERT INTO {tabela} ({chave}, quantidade, soma_centavos)
+                VALUES ({expressao.format(ref)}, 1, CAST(ROUND({ref}.preco * 100) AS INTEGER))
+                ON CONFLICT ({chave}) DO UPDATE SET quantidade = quantidade + 1,
+                    soma_centavos = soma_centavos + excluded.soma_centavos;
+            ''' for tabela, chave, expressao in resumos)
+        
+        def subtrair(ref: str) -> str:
+            return ''.join(f'''
+                UPDATE {tabela} SET quantidade = quantidade - 1,
+                    soma_centavos = soma_centavos - CAST(ROUND({ref}.preco * 100) AS INTEGER)
+                WHERE {chave} = {expressao.format(ref)};
+                DELETE FROM {tabela} WHERE {chave} = {expressao.format(ref)} AND quantidade = 0;
+            ''' for tabela, chave, expressao in resumos)
+        
+        diferenca_preco = ''.join(f'''
+                UPDATE {tabela} SET soma_centavos = soma_centavos
+                    - CAST(ROUND(old.preco * 100) AS INTEGER) + CAST(ROUND(new.preco * 100) AS INTEGER)
+                WHERE {chave} = {expressao.format('new')};
+            ''' for tabela, chave, expressao in resumos)
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS estatisticas_insert AFTER INSERT ON livros BEGIN
+                {somar('new')}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS estatisticas_delete AFTER DELETE ON livros BEGIN
+                {subtrair('old')}
+            END
+        ''')
+        # Reajustes de preço (o caso comum) só corrigem as somas
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS estatisticas_update_preco AFTER UPDATE OF preco ON livros
+            WHEN old.autor = new.autor AND old.ano_publicacao = new.ano_publicacao BEGIN
+                {diferenca_preco}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS estatisticas_update AFTER UPDATE OF autor, ano_publicacao, preco ON livros
+            WHEN old.autor IS NOT new.autor OR old.ano_publicacao IS NOT new.ano_publicacao BEGIN
+                {subtrair('old')}
+                {somar('new')}
+            END
+        ''')
+        
+        for tabela, chave, expressao in resumos:
+            cursor.execute(f'''
+                INSERT INTO {tabela} ({chave}, quantidade, soma_centavos)
+                SELECT {expressao.format('livros')}, COUNT(*), SUM(CAST(ROUND(preco * 100) AS INTEGER))
+                FROM livros GROUP BY 1
+            ''')
+    
+    def _refazer_estatisticas_planejador(self, cursor: sqlite3.Cursor):
+        # O ANALYZE da versão 4 também registra as demais tabelas como estavam naquele
+        # momento, em geral vazias. Descarta tudo o que foi coletado até aqui (pela
+        # migração 4 ou pelo PRAGMA optimize) e analisa só a tabela livros, se ela já tem
+        # livros: todo banco chega à versão 8 no mesmo estado, e nos bancos novos o
+        # PRAGMA optimize do close() coleta as estatísticas depois que houver dados.
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+        if cursor.fetchone() is not None:
+            cursor.execute('DELETE FROM sqlite_stat1')
+        cursor.execute('SELECT 1 FROM livros LIMIT 1')
+        if cursor.fetchone() is not None:
+            cursor.execute('ANALYZE livros')
+    
+    def _criar_registro_alteracoes(self, cursor: sqlite3.Cursor):
+        # Registro de todas as alterações em livros, preenchido por triggers na mesma
+        # transação da escrita; é a base dos backups incrementais
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS livros_alteracoes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                operacao TEXT NOT NULL,
+                id_livro INTEGER NOT NULL,
+                dados_antigos TEXT,
+                dados_novos TEXT,
+                momento TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+            )
+        ''')
+        
+        json_novo = JSON_LIVRO.format('new')
+        json_antigo = JSON_LIVRO.format('old')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS livros_alteracoes_insert AFTER INSERT ON livros BEGIN
+                INSERT INTO livros_alteracoes (operacao, id_livro, dados_novos)
+                VALUES ('INSERT', new.id, {json_novo});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS livros_alteracoes_update AFTER UPDATE ON livros BEGIN
+                INSERT INTO livros_alteracoes (operacao, id_livro, dados_antigos, dados_novos)
+                VALUES ('UPDATE', new.id, {json_antigo}, {json_novo});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS livros_alteracoes_delete AFTER DELETE ON livros BEGIN
+                INSERT INTO livros_alteracoes (operacao, id_livro, dados_antigos)
+                VALUES ('DELETE', old.id, {json_antigo});
+            END
+        ''')
+    
+    def _criar_indice_busca(self, cursor: sqlite3.Cursor):
+        # Índice de texto completo (FTS5) sobre título e autor, mantido por triggers.
+        # remove_diacritics faz "Pompeia" encontrar "Pompéia"; prefix acelera buscas por prefixo.
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'livros_fts'")
+        indice_existia = cursor.fetchone() is not None
+        
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS livros_fts USING fts5(
+                    titulo, autor,
+                    content='livros', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2',
+                    prefix='2 3'
+                )
+            ''')
+        except sqlite3.OperationalError:
+            # SQLite compilado sem FTS5: as buscas usam LIKE
+            return
+        
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS livros_fts_insert AFTER INSERT ON livros BEGIN
+                INSERT INTO livros_fts (rowid, titulo, autor) VALUES (new.id, new.titulo, new.autor);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS livros_fts_delete AFTER DELETE ON livros BEGIN
+                INSERT INTO livros_fts (livros_fts, rowid, titulo, autor)
+                VALUES ('delete', old.id, old.titulo, old.autor);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS livros_fts_update AFTER UPDATE OF titulo, autor ON livros BEGIN
+                INSERT INTO livros_fts (livros_fts, rowid, titulo, autor)
+                VALUES ('delete', old.id, old.titulo, old.autor);
+                INSERT INTO livros_fts (rowid, titulo, autor) VALUES (new.id, new.titulo, new.autor);
+            END
+        ''')
+        
+        # Bancos criados antes do índice existir: indexa os livros já cadastrados
+        if not indice_existia:
+            cursor.execute("INSERT INTO livros_fts (livros_fts) VALUES ('rebuild')")
+    
+    @staticmethod
+    def _expressao_busca(termo: str, coluna: Optional[str] = None) -> Optional[str]:
+        # Converte o texto digitado em uma consulta FTS5: cada palavra vira um prefixo
+        # obrigatório ("jose alencar" -> "jose"* AND "alencar"*)
+        palavras = re.findall(r'\w+', termo)
+        if not palavras:
+            return None
+        expressao = ' AND '.join(f'"{palavra}"*' for palavra in palavras)
+        if coluna:
+            return f'{coluna} : ({expressao})'
+        return expressao
+    
+    @_medir('livros.adicionar', linhas=lambda resultado: 1)
+    def adicionar_livro(self, titulo: str, autor: str, ano_publicacao: int, preco: float) -> int:
+        with self._conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO livros (titulo, autor, ano_publicacao, preco)
+                VALUES (?, ?, ?, ?)
+            ''', (titulo, autor, ano_publicacao, preco))
+            id_livro = cursor.lastrowid
+        # O cache só é invalidado depois do commit, quando a nova versão já é visível
+        self._invalidar_cache_livro(id_livro, autor)
+        return id_livro
+    
+    @_medir('livros.adicionar_em_lote', linhas=lambda resultado: resultado[0])
+    def adicionar_livros_em_lote(self, livros: Iterable[Tuple[str, str, int, float]], batch_size: int = 1000,
+                                 se_existir: str = 'relatar') -> Tuple[int, List[Tuple[int, str]]]:
+        # Retorna (quantidade inserida, [(índice do livro no iterável, mensagem de erro), ...]).
+        # se_existir (MODOS_LIVRO_EXISTENTE) define o tratamento de livros que já estão no
+        # catálogo: 'relatar' os devolve como erro; 'pular' e 'atualizar_preco' não contam
+        # como erro nem como inserção, o que torna a importação de um arquivo idempotente.
+        if se_existir not in MODOS_LIVRO_EXISTENTE:
+            raise ValueError(f"Modo inválido: {se_existir}. Use um de: {', '.join(MODOS_LIVRO_EXISTENTE)}")
+        if se_existir != 'relatar' and not self.chave_natural_unica:
+            raise ValueError("O catálogo tem livros duplicados; execute remover_duplicados() "
+                             "antes de importar sem duplicar")
+        
+        sql = 'INSERT INTO livros (titulo, autor, ano_publicacao, preco) VALUES (?, ?, ?, ?)'
+        if se_existir == 'pular':
+            sql += f' ON CONFLICT ({CHAVE_NATURAL}) DO NOTHING'
+        elif se_existir == 'atualizar_preco':
+            sql += (f' ON CONFLICT ({CHAVE_NATURAL}) DO UPDATE SET preco = excluded.preco'
+                    f' WHERE preco <> excluded.preco')
+        
+        # Com 'atualizar_preco' o lote também altera livros existentes, registrados pelo trigger
+        # de UPDATE durante o executemany; as inserções continuam registradas livro a livro
+        # para que o registro mantenha a ordem em que tudo aconteceu
+        triggers_suspensos = [nome for nome in TRIGGERS_CARGA_EM_MASSA
+                              if not (se_existir == 'atualizar_preco' and nome == 'livros_alteracoes_insert')]
+        
+        inseridos = 0
+        alterados = 0
+        erros = []
+        livros_numerados = enumerate(livros)
+        
+        while True:
+            lote = list(islice(livros_numerados, batch_size))
+            if not lote:
+                break
+            
+            # Cada lote é uma única transação (um único commit em disco)
+            with self._conexao() as conn:
+                cursor = conn.cursor()
+                # Os IDs são crescentes: tudo acima do maior ID anterior foi inserido por este lote
+                cursor.execute('SELECT COALESCE(MAX(id), 0) FROM livros')
+                ultimo_id = cursor.fetchone()[0]
+                cursor.execute('SAVEPOINT lote')
+                # A suspensão dos triggers fica dentro da transação do lote: as outras
+                # conexões nunca veem o esquema sem eles
+                suspensos = (self._suspender_triggers(cursor, triggers_suspensos)
+                             if len(lote) >= LOTE_MINIMO_CARGA_EM_MASSA else [])
+                try:
+                    cursor.executemany(sql, [livro for _, livro in lote])
+                    alterados += cursor.rowcount
+                except sqlite3.Error:
+                    # Um registro inválido interrompe o executemany: desfaz o lote e
+                    # insere linha a linha para identificar exatamente quais falharam.
+                    # O ROLLBACK TO também devolve os triggers suspensos, que cuidam das
+                    # inserções feitas uma a uma.
+                    cursor.execute('ROLLBACK TO lote')
+                    suspensos = []
+                    for indice, livro in lote:
+                        try:
+                            cursor.execute(sql, livro)
+                            alterados += cursor.rowcount
+                        except sqlite3.IntegrityError as e:
+                            mensagem = str(e)
+                            if 'idx_livros_chave_natural' in mensagem:
+                                mensagem = "Livro já cadastrado (mesmo título, autor e ano)"
+                            erros.append((indice, mensagem))
+                        except sqlite3.Error as e:
+                            erros.append((indice, str(e)))
+                if suspensos:
+                    self._indexar_inseridos(cursor, ultimo_id, [nome for nome, _ in suspensos])
+                    for _, sql_trigger in suspensos:
+                        cursor.execute(sql_trigger)
+                cursor.execute('RELEASE lote')
+                cursor.execute('SELECT COUNT(*) FROM livros WHERE id > ?', (ultimo_id,))
+                inseridos += cursor.fetchone()[0]
+        
+        if alterados:
+            self.invalidar_cache()
+        return inseridos, erros
+    
+    @staticmethod
+    def _suspender_triggers(cursor: sqlite3.Cursor, nomes: Iterable[str]) -> List[Tuple[str, str]]:
+        # Remove os triggers existentes entre os informados e devolve [(nome, sql)] para recriá-los
+        nomes = list(nomes)
+        cursor.execute(f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' "
+                       f"AND name IN ({', '.join('?' * len(nomes))})", nomes)
+        suspensos = cursor.fetchall()
+        for nome, _ in suspensos:
+            cursor.execute(f'DROP TRIGGER {nome}')
+        return suspensos
+    
+    @staticmethod
+    def _indexar_inseridos(cursor: sqlite3.Cursor, ultimo_id: int, triggers: List[str]):
+        # Faz, para todos os livros com id acima de ultimo_id, o que os triggers de inserção
+        # suspensos fariam livro a livro: o registro das inserções em ordem de id, o índice
+        # de busca e uma soma por grupo em cada tabela de resumo
+        if 'livros_alteracoes_insert' in triggers:
+            cursor.execute(f'''
+                INSERT INTO livros_alteracoes (operacao, id_livro, dados_novos)
+                SELECT 'INSERT', id, {JSON_LIVRO.format('livros')} FROM livros WHERE id > ? ORDER BY id
+            ''', (ultimo_id,))
+        if 'livros_fts_insert' in triggers:
+            cursor.execute('INSERT INTO livros_fts (rowid, titulo, autor) '
+                           'SELECT id, titulo, autor FROM livros WHERE id > ?', (ultimo_id,))
+        if 'estatisticas_insert' in triggers:
+            for tabela, chave, expressao in RESUMOS_ESTATISTICAS:
+                cursor.execute(f'''
+                    INSERT INTO {tabela} ({chave}, quantidade, soma_centavos)
+                    SELECT {expressao.format('livros')}, COUNT(*), SUM(CAST(ROUND(preco * 100) AS INTEGER))
+                    FROM livros WHERE id > ? GROUP BY 1
+                    ON CONFLICT ({chave}) DO UPDATE SET quantidade = quantidade + excluded.quantidade,
+                        soma_centavos = soma_centavos + excluded.soma_centavos
+                ''', (ultimo_id,))
+    
+    @_medir('livros.remover_duplicados', linhas=int)
+    def remover_duplicados(self) -> int:
+        # Ferramenta para catálogos que já têm duplicados (ex.: o mesmo CSV importado duas
+        # vezes): mantém o livro mais antigo de cada chave natural, com o preço da cópia
+        # mais recente, remove as demais cópias e cria o índice único. Retorna quantos
+        # livros foram removidos; as remoções ficam no registro de alterações.
+        with self._conexao() as conn:
+            cursor = conn.cursor()
+            if not conn.in_transaction:
+                cursor.execute('BEGIN IMMEDIATE')
+            # Livro mantido de cada chave -> preço da cópia mais recente
+            cursor.execute('CREATE TEMP TABLE livros_duplicados (manter INTEGER PRIMARY KEY, preco REAL NOT NULL)')
+            try:
+                cursor.execute(f'''
+                    INSERT INTO temp.livros_duplicados (manter, preco)
+                    SELECT d.manter, recente.preco FROM (
+                        SELECT MIN(id) AS manter, MAX(id) AS mais_recente FROM livros
+                        GROUP BY {CHAVE_NATURAL} HAVING COUNT(*) > 1
+                    ) AS d JOIN livros AS recente ON recente.id = d.mais_recente
+                ''')
+                # Subconsultas correlacionadas em vez de UPDATE ... FROM (SQLite 3.33+)
+                cursor.execute('''
+                    UPDATE livros SET preco = (SELECT d.preco FROM temp.livros_duplicados AS d WHERE d.manter = livros.id)
+                    WHERE id IN (SELECT manter FROM temp.livros_duplicados)
+                      AND preco <> (SELECT d.preco FROM temp.livros_duplicados AS d WHERE d.manter = livros.id)
+                ''')
+                cursor.execute(f'''
+                    DELETE FROM livros WHERE id NOT IN (SELECT MIN(id) FROM livros GROUP BY {CHAVE_NATURAL})
+                ''')
+                removidos = cursor.rowcount
+                cursor.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS idx_livros_chave_natural ON livros ({CHAVE_NATURAL})')
+            finally:
+                cursor.execute('DROP TABLE temp.livros_duplicados')
+        
+        self.chave_natural_unica = True
+        if removidos:
+            self.invalidar_cache()
+        return removidos
     
-    def _limpar_backups_antigos(self):
-        backups = list(self.diretorio_backups.glob("backup_livraria_*.db"))
-        backups.sort(key=lambda x: x.stat().st_mtime, reverse=True)
+    def _montar_filtros(self, autor: Optional[str] = None, ano_min: Optional[int] = None,
+                        ano_max: Optional[int] = None, preco_min: Optional[float] = None,
+                        preco_max: Optional[float] = None,
+                        ids: Optional[List[int]] = None,
+                        autor_exato: Optional[str] = None) -> Tuple[str, List]:
+        # Monta a cláusula WHERE (e seus parâmetros) para os filtros informados. autor busca
+        # por palavras e prefixos, como a busca do menu; autor_exato compara o nome inteiro
+        condicoes = []
+        parametros = []
+        if autor_exato is not None:
+            condicoes.append('autor = ?')
+            parametros.append(autor_exato.strip())
+        if autor:
+            expressao = self._expressao_busca(autor, 'autor') if self._fts_disponivel else None
+            if expressao:
+                condicoes.append('id IN (SELECT rowid FROM livros_fts WHERE livros_fts MATCH ?)')
+                parametros.append(expressao)
+            else:
+                condicoes.append('LOWER(autor) LIKE LOWER(?)')
+                parametros.append(f'%{autor}%')
+        if ano_min is not None:
+            condicoes.append('ano_publicacao >= ?')
+            parametros.append(ano_min)
+        if ano_max is not None:
+            condicoes.append('ano_publicacao <= ?')
+            parametros.append(ano_max)
+        if preco_min is not None:
+            condicoes.append('preco >= ?')
+            parametros.append(preco_min)
+        if preco_max is not None:
+            condicoes.append('preco <= ?')
+            parametros.append(preco_max)
+        if ids is not None:
+            # A lista inteira vai como um único parâmetro JSON, qualquer que seja o tamanho
+            condicoes.append('id IN (SELECT value FROM json_each(?))')
+            parametros.append(json.dumps([int(id_livro) for id_livro in ids]))
         
-        # Remove backups além dos 5 mais recentes
-        for backup_antigo in backups[5:]:
-            backup_antigo.unlink()
-            print(f"Backup antigo removido: {backup_antigo.name}")
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ''
+        return where, parametros
     
-    def exportar_csv(self, dados: List[Tuple], nome_arquivo: str = "livros_exportados.csv") -> str:
-        caminho_csv = self.diretorio_exports / nome_arquivo
+    def iterar_livros(self, colunas: Optional[List[str]] = None, autor: Optional[str] = None,
+                      ano_min: Optional[int] = None, ano_max: Optional[int] = None,
+                      preco_min: Optional[float] = None, preco_max: Optional[float] = None,
+                      tamanho_lote: int = 1000, ordenar_por: str = 'titulo') -> Iterator[Tuple]:
+        # Percorre o resultado com fetchmany, mantendo em memória apenas um lote por vez.
+        # A conexão fica reservada até o iterador terminar (ou ser fechado).
+        colunas = colunas or list(COLUNAS_CSV)
+        colunas_invalidas = [coluna for coluna in colunas if coluna not in COLUNAS_CSV]
+        if colunas_invalidas:
+            raise ValueError(f"Colunas inválidas: {', '.join(colunas_invalidas)}")
+        if ordenar_por not in COLUNAS_CSV:
+            raise ValueError(f"Coluna de ordenação inválida: {ordenar_por}")
         
-        with open(caminho_csv, 'w', newline='', encoding='utf-8') as arquivo:
-            writer = csv.writer(arquivo)
-            # Cabeçalho
-            writer.writerow(['ID', 'Título', 'Autor', 'Ano de Publicação', 'Preço'])
-            # Dados
-            writer.writerows(dados)
+        where, parametros = self._montar_filtros(autor, ano_min, ano_max, preco_min, preco_max)
         
-        return str(caminho_csv)
+        with self._conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT {', '.join(colunas)} FROM livros
+                {where}
+                ORDER BY {ordenar_por}
+            ''', parametros)
+            while True:
+                lote = cursor.fetchmany(tamanho_lote)
+                if not lote:
+                    break
+                yield from lote
     
-    def importar_csv(self, nome_arquivo: str) -> List[Dict]:
-        caminho_csv = self.diretorio_exports / nome_arquivo
+    @_medir('alteracoes.ultima')
+    def ultima_alteracao(self) -> int:
+        # Número da alteração mais recente no registro (0 se nunca houve alteração)
+        with self._conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'livros_alteracoes'")
+            linha = cursor.fetchone()
+            return linha[0] if linha else 0
+    
+    def alteracao_no_momento(self, momento: str) -> Optional[int]:
+        # Última alteração feita até o momento informado ('AAAA-MM-DD HH:MM:SS.fff')
+        with self._conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT MAX(seq) FROM livros_alteracoes WHERE momento <= ?', (momento,))
+            return cursor.fetchone()[0]
+    
+    def obter_alteracoes(self, desde_seq: int = 0, limite: Optional[int] = None,
+                         mais_recentes: bool = False) -> List[Dict]:
+        ordem = 'DESC' if mais_recentes else 'ASC'
+        with self._conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT seq, operacao, id_livro, dados_antigos, dados_novos, momento
+                FROM livros_alteracoes WHERE seq > ?
+                ORDER BY seq {ordem}
+                LIMIT ?
+            ''', (desde_seq, -1 if limite is None else limite))
+            return [{
+                'seq': seq,
+                'operacao': operacao,
+                'id': id_livro,
+                'antes': json.loads(dados_antigos) if dados_antigos else None,
+                'depois': json.loads(dados_novos) if dados_novos else None,
+                'momento': momento,
+            } for seq, operacao, id_livro, dados_antigos, dados_novos, momento in cursor.fetchall()]
+    
+    @_medir('alteracoes.compactar', linhas=int)
+    def compactar_alteracoes(self, seq_limite: int) -> int:
+        # Remove do registro as alterações anteriores a seq_limite, já cobertas por um backup completo
+        with self._conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM livros_alteracoes WHERE seq < ?', (seq_limite,))
+            return cursor.rowcount
+    
+    def marca_alteracoes(self) -> Tuple[int, Optional[str]]:
+        # Última alteração registrada e o momento dela; o par identifica a versão do
+        # catálogo mesmo depois de uma restauração, que reaproveita números de alteração
+        with self._conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT seq, (SELECT momento FROM livros_alteracoes WHERE livros_alteracoes.seq = sqlite_sequence.seq)
+                FROM sqlite_sequence WHERE name = 'livros_alteracoes'
+            ''')
+            linha = cursor.fetchone()
+            return (linha[0], linha[1]) if linha else (0, None)
+    
+    @_medir('alteracoes.livros_alterados', linhas=lambda resultado: len(resultado['ids']) if resultado else 0)
+    def livros_alterados_desde(self, seq: int, momento: Optional[str]) -> Optional[Dict]:
+        # Para cópias do catálogo em memória: ids alterados depois da alteração seq e o estado
+        # atual desses livros (ausentes se removidos), lidos numa única transação junto com a
+        # nova marca. Retorna None quando o registro já não cobre o intervalo (foi compactado
+        # ou o banco foi restaurado) e a cópia precisa ser relida por inteiro.
+        with self._conexao() as conn:
+            cursor = conn.cursor()
+            if not conn.in_transaction:
+                cursor.execute('BEGIN')
+            cursor.execute('''
+                SELECT (SELECT seq FROM sqlite_sequence WHERE name = 'livros_alteracoes'),
+                       (SELECT momento FROM livros_alteracoes WHERE seq = ?)
+            ''', (seq,))
+            ultima, momento_atual = cursor.fetchone()
+            ultima = ultima or 0
+            if ultima < seq or (momento is not None and momento_atual != momento):
+                return None
+            if ultima == seq:
+                return {'seq': seq, 'momento': momento, 'ids': [], 'livros': []}
+            cursor.execute('SELECT MIN(seq) FROM livros_alteracoes WHERE seq > ?', (seq,))
+            if cursor.fetchone()[0] != seq + 1:
+                return None
+            
+            cursor.execute('''
+                SELECT DISTINCT id_livro FROM livros_alteracoes
+                WHERE seq > ? AND seq <= ? ORDER BY id_livro
+            ''', (seq, ultima))
+            ids = [linha[0] for linha in cursor.fetchall()]
+            where, parametros = self._montar_filtros(ids=ids)
+            cursor.execute(f'SELECT * FROM livros {where}', parametros)
+            livros = cursor.fetchall()
+            cursor.execute('SELECT momento FROM livros_alteracoes WHERE seq = ?', (ultima,))
+            linha = cursor.fetchone()
+            return {'seq': ultima, 'momento': linha[0] if linha else None, 'ids': ids, 'livros': livros}
+    
+    @staticmethod
+    def chave_listagem(livro: Tuple, ordenar_por: str = 'titulo') -> Tuple:
+        # Chave de posição de um livro na listagem: (valor da coluna de ordenação, id)
+        indice = list(COLUNAS_CSV).index(ordenar_por)
+        return (livro[indice], livro[0])
+    
+    @_medir('livros.listar', linhas=len)
+    def listar_livros(self, chave_apos: Optional[Tuple] = None, limite: int = 20,
+                      ordenar_por: str = 'titulo', chave_antes: Optional[Tuple] = None) -> List[Tuple]:
+        # Paginação por chave (keyset): em vez de OFFSET, a consulta continua a partir da
+        # chave do último livro da página anterior (chave_apos) ou volta a partir do
+        # primeiro livro da página atual (chave_antes). Com os índices de ordenação, cada
+        # página custa o mesmo, seja a primeira ou a milésima.
+        if ordenar_por not in COLUNAS_CSV:
+            raise ValueError(f"Ordenação inválida: {ordenar_por}")
         
-        if not caminho_csv.exists():
-            raise FileNotFoundError(f"Arquivo {nome_arquivo} não encontrado no diretório exports")
+        if ordenar_por == 'id':
+            colunas_chave, ordem = 'id', 'id'
+            chave_apos = chave_apos[1:] if chave_apos else None
+            chave_antes = chave_antes[1:] if chave_antes else None
+        else:
+            colunas_chave, ordem = f'({ordenar_por}, id)', f'{ordenar_por}, id'
+        marcadores = '(?, ?)' if ordenar_por != 'id' else '?'
         
-        livros = []
-        with open(caminho_csv, 'r', encoding='utf-8') as arquivo:
-            reader = csv.DictReader(arquivo)
-            for row in reader:
-                livros.append({
-                    'titulo': row['Título'],
-                    'autor': row['Autor'],
-                    'ano_publicacao': int(row['Ano de Publicação']),
-                    'preco': float(row['Preço'])
-                })
+        with self._conexao() as conn:
+            cursor = conn.cursor()
+            if chave_antes is not None:
+                ordem_inversa = ', '.join(f'{coluna} DESC' for coluna in ordem.split(', '))
+                cursor.execute(f'''
+                    SELECT * FROM livros WHERE {colunas_chave} < {marcadores}
+                    ORDER BY {ordem_inversa} LIMIT ?
+                ''', (*chave_antes, limite))
+                return cursor.fetchall()[::-1]
+            
+            if chave_apos is not None:
+                cursor.execute(f'''
+                    SELECT * FROM livros WHERE {colunas_chave} > {marcadores}
+                    ORDER BY {ordem} LIMIT ?
+                ''', (*chave_apos, limite))
+            else:
+                cursor.execute(f'SELECT * FROM livros ORDER BY {ordem} LIMIT ?', (limite,))
+            return cursor.fetchall()
+    
+    def chave_da_pagina(self, pagina: int, limite: int = 20, ordenar_por: str = 'titulo') -> Optional[Tuple]:
+        # Chave a usar como chave_apos para abrir diretamente a página informada. Percorre
+        # apenas o índice de ordenação (sem ler as linhas), e só é usada para saltos.
+        if ordenar_por not in COLUNAS_CSV:
+            raise ValueError(f"Ordenação inválida: {ordenar_por}")
+        if pagina <= 1:
+            return None
         
-        return livros
-
-
-class DatabaseManager:
-    def __init__(self, caminho_db: str):
-        self.caminho_db = caminho_db
-        self._criar_tabela()
+        with self._conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT {ordenar_por}, id FROM livros ORDER BY {ordenar_por}, id LIMIT 1 OFFSET ?
+            ''', ((pagina - 1) * limite - 1,))
+            return cursor.fetchone()
     
-    def _criar_tabela(self):
-        with sqlite3.connect(self.caminho_db) as conn:
+    @_medir('livros.contar')
+    def contar_livros(self, **filtros) -> int:
+        # Aceita os mesmos filtros de _montar_filtros (autor, autor_exato, faixa de ano/preço, ids)
+        where, parametros = self._montar_filtros(**filtros)
+        with self._conexao() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS livros (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    titulo TEXT NOT NULL,
-                    autor TEXT NOT NULL,
-                    ano_publicacao INTEGER NOT NULL,
-                    preco REAL NOT NULL
-                )
-            ''')
-            conn.commit()
+            cursor.execute(f'SELECT COUNT(*) FROM livros {where}', parametros)
+            return cursor.fetchone()[0]
     
-    def adicionar_livro(self, titulo: str, autor: str, ano_publicacao: int, preco: float) -> int:
-        with sqlite3.connect(self.caminho_db) as conn:
+    @_medir('livros.estatisticas')
+    def obter_estatisticas(self, limite_autores: int = 10) -> Dict:
+        # Painel do catálogo lido das tabelas de resumo e dos índices (MIN/MAX de preço e
+        # ano vêm direto dos índices), com custo independente do tamanho do catálogo
+        with self._conexao() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                INSERT INTO livros (titulo, autor, ano_publicacao, preco)
-                VALUES (?, ?, ?, ?)
-            ''', (titulo, autor, ano_publicacao, preco))
-            conn.commit()
-            return cursor.lastrowid
+                SELECT COALESCE(SUM(quantidade), 0), COALESCE(SUM(soma_centavos), 0) FROM estatisticas_decada
+            ''')
+            total_livros, soma_centavos = cursor.fetchone()
+            cursor.execute('''
+                SELECT (SELECT MIN(preco) FROM livros), (SELECT MAX(preco) FROM livros),
+                       (SELECT MIN(ano_publicacao) FROM livros), (SELECT MAX(ano_publicacao) FROM livros),
+                       (SELECT COUNT(*) FROM estatisticas_autor)
+            ''')
+            preco_minimo, preco_maximo, ano_mais_antigo, ano_mais_recente, total_autores = cursor.fetchone()
+            
+            cursor.execute('''
+                SELECT autor, quantidade, soma_centavos / 100.0 / quantidade FROM estatisticas_autor
+                ORDER BY quantidade DESC, autor LIMIT ?
+            ''', (limite_autores,))
+            autores = cursor.fetchall()
+            cursor.execute('''
+                SELECT decada, quantidade, soma_centavos / 100.0 / quantidade FROM estatisticas_decada
+                ORDER BY decada
+            ''')
+            decadas = cursor.fetchall()
+        
+        return {
+            'total_livros': total_livros,
+            'total_autores': total_autores,
+            'valor_total': soma_centavos / 100,
+            'preco_medio': soma_centavos / 100 / total_livros if total_livros else None,
+            'preco_minimo': preco_minimo,
+            'preco_maximo': preco_maximo,
+            'ano_mais_antigo': ano_mais_antigo,
+            'ano_mais_recente': ano_mais_recente,
+            'autores': autores,    # [(autor, quantidade, preço médio)], os com mais livros
+            'decadas': decadas,    # [(década, quantidade, preço médio)]
+        }
     
+    @_medir('livros.obter_todos', linhas=len)
     def obter_todos_livros(self) -> List[Tuple]:
-        with sqlite3.connect(self.caminho_db) as conn:
+        return self._ler_com_cache(('todos',), self._obter_todos_livros)
+    
+    def _obter_todos_livros(self) -> List[Tuple]:
+        with self._conexao() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM livros ORDER BY titulo')
             return cursor.fetchall()
     
+    @_medir('livros.buscar_por_autor', linhas=len)
     def buscar_livros_por_autor(self, autor: str) -> List[Tuple]:
-        with sqlite3.connect(self.caminho_db) as conn:
+        return self._ler_com_cache(('autor', autor), self._buscar_livros_por_autor, autor)
+    
+    def _buscar_livros_por_autor(self, autor: str) -> List[Tuple]:
+        where, parametros = self._montar_filtros(autor=autor)
+        with self._conexao() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT * FROM livros 
-                WHERE LOWER(autor) LIKE LOWER(?) 
+                {where}
                 ORDER BY titulo
-            ''', (f'%{autor}%',))
+            ''', parametros)
+            return cursor.fetchall()
+    
+    @_medir('livros.buscar', linhas=len)
+    def buscar_livros(self, termo: str, limite: int = 50) -> List[Tuple]:
+        # Busca por título ou autor, com os resultados mais relevantes primeiro
+        expressao = self._expressao_busca(termo) if self._fts_disponivel else None
+        with self._conexao() as conn:
+            cursor = conn.cursor()
+            if expressao:
+                cursor.execute('''
+                    SELECT livros.* FROM livros_fts
+                    JOIN livros ON livros.id = livros_fts.rowid
+                    WHERE livros_fts MATCH ?
+                    ORDER BY livros_fts.rank
+                    LIMIT ?
+                ''', (expressao, limite))
+            else:
+                cursor.execute('''
+                    SELECT * FROM livros
+                    WHERE LOWER(titulo) LIKE LOWER(?) OR LOWER(autor) LIKE LOWER(?)
+                    ORDER BY titulo
+                    LIMIT ?
+                ''', (f'%{termo}%', f'%{termo}%', limite))
             return cursor.fetchall()
     
+    @_medir('livros.atualizar_preco', linhas=int)
     def atualizar_preco_livro(self, id_livro: int, novo_preco: float) -> bool:
-        with sqlite3.connect(self.caminho_db) as conn:
+        with self._conexao() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE livros SET preco = ? WHERE id = ?
             ''', (novo_preco, id_livro))
-            conn.commit()
-            return cursor.rowcount > 0
+            atualizado = cursor.rowcount > 0
+        if atualizado:
+            self._invalidar_cache_livro(id_livro)
+        return atualizado
+    
+    @_medir('livros.reajustar_precos', linhas=int)
+    def reajustar_precos(self, percentual: Optional[float] = None, valor: Optional[float] = None,
+                         **filtros) -> int:
+        # Reajuste em lote com um único UPDATE: percentual (ex: 10 ou -5,5) ou valor fixo
+        # somado ao preço, nos livros selecionados pelos filtros (autor, ano_min, ano_max,
+        # ids...). Se algum preço resultante ficar fora da faixa do Validador nada é alterado.
+        # O autor é selecionado pelo nome exato (autor_exato): a busca por prefixo do filtro
+        # autor serve para consultas, mas num reajuste alteraria também os homônimos parciais.
+        if (percentual is None) == (valor is None):
+            raise ValueError("Informe o percentual ou o valor do reajuste (apenas um)")
+        if 'autor' in filtros:
+            raise ValueError("Reajustes selecionam o autor pelo nome exato: use autor_exato")
+        
+        if percentual is not None:
+            novo_preco, parametro = 'ROUND(preco * (1 + ? / 100.0), 2)', percentual
+        else:
+            novo_preco, parametro = 'ROUND(preco + ?, 2)', valor
+        where, parametros = self._montar_filtros(**filtros)
+        condicao = f"{where} AND" if where else "WHERE"
+        
+        with self._conexao() as conn:
+            cursor = conn.cursor()
+            # Trava de escrita desde a verificação, para que ela valha para o UPDATE
+            # (dentro de transacao() a trava já foi obtida)
+            if not conn.in_transaction:
+                cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute(f'''
+                SELECT COUNT(*) FROM livros
+                {condicao} ({novo_preco} < 0 OR {novo_preco} > ?)
+            ''', (*parametros, parametro, parametro, PRECO_MAXIMO))
+            fora_da_faixa = cursor.fetchone()[0]
+            if fora_da_faixa:
+                raise ValidationError(
+                    f"O reajuste deixaria {fora_da_faixa} livro(s) com preço negativo ou acima de "
+                    f"R$ 999.999,99. Nenhum preço foi alterado.")
+            
+            cursor.execute(f'UPDATE livros SET preco = {novo_preco} {where}', (parametro, *parametros))
+            atualizados = cursor.rowcount
+        
+        if atualizados:
+            self.invalidar_cache()
+        return atualizados
+    
+    @_medir('livros.aplicar_lista_precos', linhas=lambda resultado: resultado[0])
+    def aplicar_lista_precos(self, precos: Iterable[Tuple[int, float]]) -> Tuple[int, List[int]]:
+        # Aplica uma lista (id, novo preço) já validada, toda em uma transação: a lista vai
+        # para uma tabela temporária e um único UPDATE aplica os preços. Um id repetido fica
+        # com o último preço da lista. Retorna (quantidade atualizada, ids não encontrados).
+        with self._conexao() as conn:
+            cursor = conn.cursor()
+            if not conn.in_transaction:
+                cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('CREATE TEMP TABLE lista_precos (id INTEGER PRIMARY KEY, preco REAL NOT NULL)')
+            try:
+                cursor.executemany('INSERT OR REPLACE INTO temp.lista_precos (id, preco) VALUES (?, ?)', precos)
+                # Subconsulta correlacionada em vez de UPDATE ... FROM (SQLite 3.33+)
+                cursor.execute('''
+                    UPDATE livros SET preco = (SELECT t.preco FROM temp.lista_precos AS t WHERE t.id = livros.id)
+                    WHERE id IN (SELECT id FROM temp.lista_precos)
+                ''')
+                atualizados = cursor.rowcount
+                cursor.execute('''
+                    SELECT id FROM temp.lista_precos AS t
+                    WHERE NOT EXISTS (SELECT 1 FROM livros WHERE livros.id = t.id)
+                ''')
+                nao_encontrados = [id_livro for id_livro, in cursor.fetchall()]
+            finally:
+                cursor.execute('DROP TABLE temp.lista_precos')
+        
+        if atualizados:
+            self.invalidar_cache()
+        return atualizados, nao_encontrados
     
+    @_medir('livros.remover', linhas=int)
     def remover_livro(self, id_livro: int) -> bool:
-        with sqlite3.connect(self.caminho_db) as conn:
+        with self._conexao() as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM livros WHERE id = ?', (id_livro,))
-            conn.commit()
-            return cursor.rowcount > 0
+            removido = cursor.rowcount > 0
+        if removido:
+            self._invalidar_cache_livro(id_livro)
+        return removido
     
+    @_medir('livros.obter_por_id')
     def obter_livro_por_id(self, id_livro: int) -> Optional[Tuple]:
-        with sqlite3.connect(self.caminho_db) as conn:
+        return self._ler_com_cache(('id', id_livro), self._obter_livro_por_id, id_livro)
+    
+    def _obter_livro_por_id(self, id_livro: int) -> Optional[Tuple]:
+        with self._conexao() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM livros WHERE id = ?', (id_livro,))
             return cursor.fetchone()
+    
+    def _ler_com_cache(self, chave: Tuple, leitura: Callable, *args):
+        if self.cache is None:
+            return leitura(*args)
+        
+        encontrado, valor = self.cache.obter(chave)
+        if not encontrado:
+            geracao = self.cache.geracao
+            valor = leitura(*args)
+            self.cache.guardar(chave, valor, geracao)
+        # Listas são copiadas para que quem chamou não altere o conteúdo do cache
+        return list(valor) if isinstance(valor, list) else valor
+    
+    def _invalidar_cache_livro(self, id_livro: int, autor: Optional[str] = None):
+        # Invalida apenas o que pode ter mudado: o próprio livro, a listagem completa e as
+        # buscas por autor que o continham (ou, para um livro novo, que passariam a contê-lo)
+        if self.cache is None:
+            return
+        
+        def afetado(chave: Tuple, valor) -> bool:
+            if chave == ('id', id_livro) or chave == ('todos',):
+                return True
+            if chave[0] != 'autor':
+                return False
+            if any(livro[0] == id_livro for livro in valor):
+                return True
+            return autor is not None and self._autor_corresponde(chave[1], autor)
+        
+        self.cache.invalidar_se(afetado)
+    
+    def _autor_corresponde(self, termo: str, autor: str) -> bool:
+        # Mesma regra da busca: no índice FTS5 cada palavra do termo é prefixo de uma palavra
+        # do autor (sem acentos e sem diferenciar maiúsculas); sem FTS5, LIKE '%termo%'
+        if not self._fts_disponivel or not re.findall(r'\w+', termo):
+            return termo.lower() in autor.lower()
+        palavras_autor = re.findall(r'\w+', _normalizar_texto(autor))
+        return all(any(palavra.startswith(prefixo) for palavra in palavras_autor)
+                   for prefixo in re.findall(r'\w+', _normalizar_texto(termo)))
+    
+    def invalidar_cache(self):
+        # Para alterações feitas fora dos métodos de escrita (restaurações, outros processos)
+        if self.cache is not None:
+            self.cache.limpar()
+
+
+class LivroCompacto:
+    # Um livro do CatalogoCompacto, montado a partir das colunas na hora da consulta.
+    # Pode ser usado no lugar da tupla (id, titulo, autor, ano_publicacao, preco).
+    __slots__ = ('id', 'titulo', 'autor', 'ano_publicacao', 'preco')
+    
+    def __init__(self, id_livro: int, titulo: str, autor: str, ano_publicacao: int, preco: float):
+        self.id = id_livro
+        self.titulo = titulo
+        self.autor = autor
+        self.ano_publicacao = ano_publicacao
+        self.preco = preco
+    
+    def como_tupla(self) -> Tuple:
+        return (self.id, self.titulo, self.autor, self.ano_publicacao, self.preco)
+    
+    def __iter__(self):
+        return iter(self.como_tupla())
+    
+    def __len__(self):
+        return 5
+    
+    def __getitem__(self, indice):
+        return self.como_tupla()[indice]
+    
+    def __eq__(self, outro):
+        if isinstance(outro, (LivroCompacto, tuple)):
+            return self.como_tupla() == tuple(outro)
+        return NotImplemented
+    
+    def __hash__(self):
+        return hash(self.como_tupla())
+    
+    def __repr__(self):
+        return f"LivroCompacto{self.como_tupla()!r}"
+
+
+class CatalogoCompacto:
+    # Cópia somente leitura do catálogo para processos que só consultam (ex.: cálculo de
+    # preços). Os livros ficam em colunas ordenadas por id: ids, anos e preços em arrays,
+    # títulos num único buffer UTF-8 e autores como códigos de uma tabela de nomes únicos,
+    # cerca de 35 bytes por livro além do texto do título. Consultas por id, autor e faixa
+    # de preço não vão ao banco; atualizar() relê só os livros alterados desde a última
+    # leitura, seguindo o registro de alterações.
+    def __init__(self, db_manager: DatabaseManager):
+        self.db_manager = db_manager
+        self._lock = threading.RLock()
+        self.carregar()
+    
+    def _novas_colunas(self):
+        self._ids = array('q')
+        self._anos = array('h')
+        self._precos = array('d')
+        self._autores = array('I')
+        self._inicio_titulos = array('Q')
+        self._tamanho_titulos = array('I')
+        self._titulos = bytearray()
+        # Índices montados na primeira consulta que precisa deles e descartados quando
+        # uma alteração os invalida
+        self._por_autor = None  # código do autor -> posições dos livros
+        self._ordem_precos = None  # posições ordenadas por preço, e os preços nessa ordem
+        self._precos_ordenados = None
+    
+    def carregar(self):
+        # Relê o catálogo inteiro. A marca é lida antes dos livros: o que for alterado no
+        # meio da leitura volta na próxima atualização, que sempre relê o estado atual
+        with self._lock:
+            seq, momento = self.db_manager.marca_alteracoes()
+            self._novas_colunas()
+            self._nomes_autores: List[str] = []
+            self._codigos_autores: Dict[str, int] = {}
+            self._autores_normalizados: List[str] = []
+            for livro in self.db_manager.iterar_livros(tamanho_lote=5000, ordenar_por='id'):
+                self._anexar(livro)
+            self.seq, self.momento = seq, momento
+    
+    def atualizar(self) -> int:
+        # Aplica as alterações feitas desde a última leitura; retorna quantos livros foram relidos
+        with self._lock:
+            alteracoes = self.db_manager.livros_alterados_desde(self.seq, self.momento)
+            if alteracoes is None:
+                self.carregar()
+                return len(self._ids)
+            
+            atuais = {livro[0]: livro for livro in alteracoes['livros']}
+            removidos = set()
+            fora_de_ordem = []
+            for id_livro in alteracoes['ids']:
+                livro = atuais.get(id_livro)
+                posicao = self._posicao(id_livro)
+                if posicao is not None:
+                    if livro is None:
+                        removidos.add(id_livro)
+                    else:
+                        self._substituir(posicao, livro)
+                elif livro is None:
+                    continue
+                elif not self._ids or id_livro > self._ids[-1]:
+                    # Livros novos têm ids maiores que os existentes: basta anexar
+                    self._anexar(livro)
+                else:
+                    fora_de_ordem.append(livro)
+            if removidos or fora_de_ordem:
+                self._reconstruir(removidos, fora_de_ordem)
+            self.seq, self.momento = alteracoes['seq'], alteracoes['momento']
+            return len(alteracoes['ids'])
+    
+    def _codigo_autor(self, autor: str) -> int:
+        codigo = self._codigos_autores.get(autor)
+        if codigo is None:
+            codigo = len(self._nomes_autores)
+            autor = sys.intern(autor)
+            self._nomes_autores.append(autor)
+            self._codigos_autores[autor] = codigo
+            self._autores_normalizados.append(_normalizar_texto(autor))
+        return codigo
+    
+    def _anexar(self, livro: Tuple, titulo: Optional[bytes] = None):
+        id_livro, titulo_texto, autor, ano_publicacao, preco = livro
+        titulo = titulo if titulo is not None else titulo_texto.encode('utf-8')
+        posicao = len(self._ids)
+        codigo = self._codigo_autor(autor)
+        self._ids.append(id_livro)
+        self._inicio_titulos.append(len(self._titulos))
+        self._tamanho_titulos.append(len(titulo))
+        self._titulos += titulo
+        self._autores.append(codigo)
+        self._anos.append(ano_publicacao)
+        self._precos.append(preco)
+        if self._por_autor is not None:
+            self._por_autor.setdefault(codigo, array('I')).append(posicao)
+        self._ordem_precos = None
+    
+    def _substituir(self, posicao: int, livro: Tuple):
+        _, titulo, autor, ano_publicacao, preco = livro
+        if titulo != self._titulo(posicao):
+            # O título antigo fica no buffer até a próxima reconstrução
+            titulo = titulo.encode('utf-8')
+            self._inicio_titulos[posicao] = len(self._titulos)
+            self._tamanho_titulos[posicao] = len(titulo)
+            self._titulos += titulo
+        codigo = self._codigo_autor(autor)
+        if codigo != self._autores[posicao]:
+            self._autores[posicao] = codigo
+            self._por_autor = None
+        if preco != self._precos[posicao]:
+            self._precos[posicao] = preco
+            self._ordem_precos = None
+        self._anos[posicao] = ano_publicacao
+    
+    def _reconstruir(self, removidos: set, novos: List[Tuple]):
+        # Remoções e inserções no meio das colunas são aplicadas numa única passada, que
+        # também descarta do buffer os títulos substituídos
+        ids, anos, precos, autores = self._ids, self._anos, self._precos, self._autores
+        inicio_titulos, tamanho_titulos, titulos = self._inicio_titulos, self._tamanho_titulos, self._titulos
+        self._novas_colunas()
+        mantidos = ((ids[posicao], posicao) for posicao in range(len(ids)) if ids[posicao] not in removidos)
+        inseridos = ((livro[0], livro) for livro in sorted(novos))
+        for id_livro, item in heapq.merge(mantidos, inseridos, key=lambda par: par[0]):
+            if isinstance(item, tuple):
+                self._anexar(item)
+            else:
+                inicio = inicio_titulos[item]
+                self._anexar((id_livro, None, self._nomes_autores[autores[item]], anos[item], precos[item]),
+                             bytes(titulos[inicio:inicio + tamanho_titulos[item]]))
+    
+    def _posicao(self, id_livro: int) -> Optional[int]:
+        posicao = bisect.bisect_left(self._ids, id_livro)
+        if posicao < len(self._ids) and self._ids[posicao] == id_livro:
+            return posicao
+        return None
+    
+    def _titulo(self, posicao: int) -> str:
+        inicio = self._inicio_titulos[posicao]
+        return self._titulos[inicio:inicio + self._tamanho_titulos[posicao]].decode('utf-8')
+    
+    def _livro(self, posicao: int) -> LivroCompacto:
+        return LivroCompacto(self._ids[posicao], self._titulo(posicao),
+                             self._nomes_autores[self._autores[posicao]],
+                             self._anos[posicao], self._precos[posicao])
+    
+    def __len__(self):
+        return len(self._ids)
+    
+    def __iter__(self) -> Iterator[LivroCompacto]:
+        # Em ordem de id, sobre as colunas do momento da chamada
+        with self._lock:
+            livros = [self._livro(posicao) for posicao in range(len(self._ids))]
+        return iter(livros)
+    
+    def obter_por_id(self, id_livro: int) -> Optional[LivroCompacto]:
+        with self._lock:
+            posicao = self._posicao(id_livro)
+            return self._livro(posicao) if posicao is not None else None
+    
+    def buscar_por_autor(self, autor: str) -> List[LivroCompacto]:
+        # Mesmo critério do índice de busca: cada palavra digitada é prefixo de uma palavra
+        # do nome, sem diferenciar maiúsculas nem acentos ("jose alen" -> "José de Alencar")
+        palavras = re.findall(r'\w+', _normalizar_texto(autor))
+        if palavras:
+            padrao = re.compile(''.join(rf'(?=.*\b{re.escape(palavra)})' for palavra in palavras))
+            corresponde = padrao.match
+        else:
+            termo = _normalizar_texto(autor)
+            corresponde = lambda nome: termo in nome
+        
+        with self._lock:
+            if self._por_autor is None:
+                por_autor = {}
+                for posicao, codigo in enumerate(self._autores):
+                    por_autor.setdefault(codigo, array('I')).append(posicao)
+                self._por_autor = por_autor
+            livros = [self._livro(posicao)
+                      for codigo, nome in enumerate(self._autores_normalizados) if corresponde(nome)
+                      for posicao in self._por_autor.get(codigo, ())]
+        livros.sort(key=lambda livro: (livro.titulo, livro.id))
+        return livros
+    
+    def buscar_por_preco(self, preco_min: Optional[float] = None, preco_max: Optional[float] = None,
+                         limite: Optional[int] = None) -> List[LivroCompacto]:
+        # Livros com preço entre preco_min e preco_max (inclusive), do mais barato ao mais caro
+        with self._lock:
+            if self._ordem_precos is None:
+                precos = self._precos
+                self._ordem_precos = array('I', sorted(range(len(precos)), key=precos.__getitem__))
+                self._precos_ordenados = array('d', (precos[posicao] for posicao in self._ordem_precos))
+            inicio = 0 if preco_min is None else bisect.bisect_left(self._precos_ordenados, preco_min)
+            fim = len(self._precos_ordenados) if preco_max is None else bisect.bisect_right(self._precos_ordenados, preco_max)
+            if limite is not None:
+                fim = min(fim, inicio + limite)
+            return [self._livro(self._ordem_precos[indice]) for indice in range(inicio, fim)]
+    
+    def estatisticas(self) -> Dict:
+        with self._lock:
+            colunas = (self._ids, self._anos, self._precos, self._autores,
+                       self._inicio_titulos, self._tamanho_titulos, self._titulos)
+            bytes_colunas = sum(sys.getsizeof(coluna) for coluna in colunas)
+            bytes_autores = (sys.getsizeof(self._nomes_autores) + sys.getsizeof(self._codigos_autores)
+                             + sys.getsizeof(self._autores_normalizados)
+                             + sum(sys.getsizeof(nome) for nome in self._nomes_autores)
+                             + sum(sys.getsizeof(nome) for nome in self._autores_normalizados))
+            bytes_indices = 0
+            if self._por_autor is not None:
+                bytes_indices += sys.getsizeof(self._por_autor) + sum(
+                    sys.getsizeof(posicoes) for posicoes in self._por_autor.values())
+            if self._ordem_precos is not None:
+                bytes_indices += sys.getsizeof(self._ordem_precos) + sys.getsizeof(self._precos_ordenados)
+            return {
+                'livros': len(self._ids),
+                'autores': len(self._nomes_autores),
+                'seq': self.seq,
+                'bytes': bytes_colunas + bytes_autores + bytes_indices,
+                'bytes_indices': bytes_indices,
+            }
 
 
 class SistemaLivraria:
-    def __init__(self, diretorio_base: str = "meu_sistema_livraria"):
-        self.gerenciador_arquivos = GerenciadorArquivos(diretorio_base)
-        self.db_manager = DatabaseManager(str(self.gerenciador_arquivos.arquivo_db))
+    def __init__(self, diretorio_base: str = "meu_sistema_livraria", tamanho_pool: int = 1,
+                 perfil: str = 'balanced', cache: Optional[CacheLRU] = None,
+                 metricas: Optional[Metricas] = None, somente_leitura: bool = False):
+        # somente_leitura: para quem só consulta (ex.: comandos get, list e search da linha de
+        # comando), sem criar diretórios nem migrar o banco (ver DatabaseManager)
+        self.gerenciador_arquivos = GerenciadorArquivos(diretorio_base, metricas,
+                                                        criar_diretorios=not somente_leitura)
+        self.db_manager = DatabaseManager(str(self.gerenciador_arquivos.arquivo_db), tamanho_pool,
+                                          perfil, cache, metricas, somente_leitura)
         self.validador = Validador()
+        self._seq_ultimo_backup = None
+        self.metricas = metricas
     
-    def _fazer_backup_automatico(self):
+    def close(self):
+        self.db_manager.close()
+        if self.metricas is not None and self.metricas.arquivo:
+            self.metricas.salvar()
+    
+    def definir_metricas(self, metricas: Optional[Metricas]):
+        # Liga (ou desliga, com None) a instrumentação sem reabrir o banco. As conexões
+        # do pool ganham ou perdem o rastreador de SQL na próxima vez que forem usadas.
+        self.metricas = metricas
+        self.gerenciador_arquivos.metricas = metricas
+        self.db_manager.metricas = metricas
+    
+    @_medir('backup.compactar_registro')
+    def compactar_registro_se_necessario(self) -> Optional[str]:
+        # Cada escrita custa apenas uma linha no registro de alterações (gravada pelo banco
+        # na mesma transação). A cada INTERVALO_COMPACTACAO alterações o registro é
+        # compactado em um backup completo, e as alterações que nenhum backup mantido
+        # precisa mais são descartadas. Chamado antes das escritas; retorna o nome do
+        # backup criado (None se ainda não era preciso) e não escreve nada na tela.
+        if self._seq_ultimo_backup is None:
+            backups = self.gerenciador_arquivos.listar_backups_completos()
+            if backups:
+                self._seq_ultimo_backup = backups[0][1]
+        
+        if self._seq_ultimo_backup is not None and \
+                self.db_manager.ultima_alteracao() - self._seq_ultimo_backup < INTERVALO_COMPACTACAO:
+            return None
+        
+        nome_backup = self.gerenciador_arquivos.criar_backup()
+        backups = self.gerenciador_arquivos.listar_backups_completos()
+        self._seq_ultimo_backup = backups[0][1]
+        self.db_manager.compactar_alteracoes(min(seq for _, seq in backups))
+        return nome_backup
+    
+    def _compactar_registro_se_necessario(self):
+        # Versão do menu: informa o backup criado e não impede a escrita se ele falhar
         try:
-            backup_path = self.gerenciador_arquivos.criar_backup()
-            print(f"✓ Backup criado automaticamente: {Path(backup_path).name}")
+            nome_backup = self.compactar_registro_se_necessario()
+            if nome_backup:
+                print(f"✓ Backup criado automaticamente: {nome_backup}")
         except Exception as e:
             print(f"Aviso: Não foi possível criar backup: {e}")
     
@@ -224,8 +3095,8 @@ class SistemaLivraria:
             preco = input("Preço (R$): ")
             preco = self.validador.validar_preco(preco)
             
-            # Fazer backup antes da modificação
-            self._fazer_backup_automatico()
+            # Compactar o registro de alterações em um backup completo, se necessário
+            self._compactar_registro_se_necessario()
             
             # Adicionar livro
             id_livro = self.db_manager.adicionar_livro(titulo, autor, ano, preco)
@@ -238,28 +3109,76 @@ class SistemaLivraria:
             
         except ValidationError as e:
             print(f"\nErro de validação: {e}")
+        except sqlite3.IntegrityError:
+            print("\nEste livro já está cadastrado (mesmo título, autor e ano).")
         except Exception as e:
             print(f"\nErro ao adicionar livro: {e}")
     
-    def exibir_todos_livros(self):
+    @staticmethod
+    def _imprimir_livros(livros: List[Tuple]):
+        print(f"{'ID':<5} {'Título':<30} {'Autor':<25} {'Ano':<6} {'Preço':<10}")
+        print("-" * 80)
+        
+        for livro in livros:
+            id_livro, titulo, autor, ano, preco = livro
+            titulo_truncado = titulo[:29] + "..." if len(titulo) > 30 else titulo
+            autor_truncado = autor[:24] + "..." if len(autor) > 25 else autor
+            print(f"{id_livro:<5} {titulo_truncado:<30} {autor_truncado:<25} {ano:<6} R$ {preco:<7.2f}")
+    
+    def exibir_todos_livros(self, livros_por_pagina: int = 20):
         print("\n=== TODOS OS LIVROS CADASTRADOS ===")
         
         try:
-            livros = self.db_manager.obter_todos_livros()
+            total = self.db_manager.contar_livros()
             
-            if not livros:
+            if total == 0:
                 print("Nenhum livro cadastrado.")
                 return
             
-            print(f"\nTotal de livros: {len(livros)}\n")
-            print(f"{'ID':<5} {'Título':<30} {'Autor':<25} {'Ano':<6} {'Preço':<10}")
-            print("-" * 80)
+            # Apenas uma página é buscada no banco por vez
+            total_paginas = (total + livros_por_pagina - 1) // livros_por_pagina
+            pagina = 1
+            livros = self.db_manager.listar_livros(limite=livros_por_pagina)
             
-            for livro in livros:
-                id_livro, titulo, autor, ano, preco = livro
-                titulo_truncado = titulo[:29] + "..." if len(titulo) > 30 else titulo
-                autor_truncado = autor[:24] + "..." if len(autor) > 25 else autor
-                print(f"{id_livro:<5} {titulo_truncado:<30} {autor_truncado:<25} {ano:<6} R$ {preco:<7.2f}")
+            while True:
+                print(f"\nTotal de livros: {total} - Página {pagina} de {total_paginas}\n")
+                self._imprimir_livros(livros)
+                
+                if total_paginas == 1:
+                    return
+                
+                while True:
+                    comando = input("\n[Enter] próxima  [a] anterior  [nº] ir para a página  [s] sair: ").strip().lower()
+                    
+                    if comando in ['', 'p']:
+                        if pagina >= total_paginas:
+                            print("Esta é a última página.")
+                            continue
+                        chave = self.db_manager.chave_listagem(livros[-1])
+                        livros = self.db_manager.listar_livros(chave, livros_por_pagina)
+                        pagina += 1
+                    elif comando == 'a':
+                        if pagina <= 1:
+                            print("Esta é a primeira página.")
+                            continue
+                        chave = self.db_manager.chave_listagem(livros[0])
+                        livros = self.db_manager.listar_livros(limite=livros_por_pagina, chave_antes=chave)
+                        pagina -= 1
+                    elif comando.isdigit() and 1 <= int(comando) <= total_paginas:
+                        pagina = int(comando)
+                        chave = self.db_manager.chave_da_pagina(pagina, livros_por_pagina)
+                        livros = self.db_manager.listar_livros(chave, livros_por_pagina)
+                    elif comando in ['s', 'sair']:
+                        return
+                    else:
+                        print(f"Comando inválido. Páginas disponíveis: 1 a {total_paginas}")
+                        continue
+                    break
+                
+                if not livros:
+                    # O catálogo mudou durante a navegação
+                    print("Nenhum livro nesta página.")
+                    return
             
         except Exception as e:
             print(f"Erro ao exibir livros: {e}")
@@ -292,8 +3211,8 @@ class SistemaLivraria:
             novo_preco = input("\nNovo preço (R$): ")
             novo_preco = self.validador.validar_preco(novo_preco)
             
-            # Fazer backup antes da modificação
-            self._fazer_backup_automatico()
+            # Compactar o registro de alterações em um backup completo, se necessário
+            self._compactar_registro_se_necessario()
             
             # Atualizar preço
             if self.db_manager.atualizar_preco_livro(id_livro, novo_preco):
@@ -339,8 +3258,8 @@ class SistemaLivraria:
                 print("Operação cancelada.")
                 return
             
-            # Fazer backup antes da modificação
-            self._fazer_backup_automatico()
+            # Compactar o registro de alterações em um backup completo, se necessário
+            self._compactar_registro_se_necessario()
             
             # Remover livro
             if self.db_manager.remover_livro(id_livro):
@@ -355,7 +3274,7 @@ class SistemaLivraria:
         print("\n=== BUSCAR LIVROS POR AUTOR ===")
         
         try:
-            autor = input("Nome do autor (busca parcial): ").strip()
+            autor = input("Nome do autor (início das palavras, ex.: 'jose alen'): ").strip()
             if not autor:
                 print("Nome do autor não pode estar vazio")
                 return
@@ -367,140 +3286,604 @@ class SistemaLivraria:
                 return
             
             print(f"\nLivros encontrados para '{autor}': {len(livros)}\n")
-            print(f"{'ID':<5} {'Título':<30} {'Autor':<25} {'Ano':<6} {'Preço':<10}")
-            print("-" * 80)
-            
-            for livro in livros:
-                id_livro, titulo, autor_livro, ano, preco = livro
-                titulo_truncado = titulo[:29] + "..." if len(titulo) > 30 else titulo
-                autor_truncado = autor_livro[:24] + "..." if len(autor_livro) > 25 else autor_livro
-                print(f"{id_livro:<5} {titulo_truncado:<30} {autor_truncado:<25} {ano:<6} R$ {preco:<7.2f}")
+            self._imprimir_livros(livros)
             
         except Exception as e:
             print(f"Erro ao buscar livros: {e}")
     
     def exportar_dados_csv(self):
-        print("\n=== EXPORTAR DADOS PARA CSV ===")
+        print("\n=== EXPORTAR DADOS ===")
         
         try:
-            livros = self.db_manager.obter_todos_livros()
-            
-            if not livros:
-                print("Nenhum livro cadastrado para exportar.")
+            formato = input(f"Formato ({', '.join(FORMATOS_ARQUIVO)}; Enter para csv): ").strip().lower() or 'csv'
+            if formato not in FORMATOS_ARQUIVO:
+                print(f"Formato inválido. Use um de: {', '.join(FORMATOS_ARQUIVO)}")
                 return
+            extensao = FORMATOS_ARQUIVO[formato].extensao
             
-            nome_arquivo = input("Nome do arquivo CSV (pressione Enter para usar padrão): ").strip()
+            nome_arquivo = input("Nome do arquivo (pressione Enter para usar padrão): ").strip()
             if not nome_arquivo:
-                nome_arquivo = "livros_exportados.csv"
-            elif not nome_arquivo.endswith('.csv'):
-                nome_arquivo += '.csv'
+                nome_arquivo = "livros_exportados" + extensao
+            elif not nome_arquivo.endswith(extensao):
+                nome_arquivo += extensao
+            
+            filtros = {}
+            colunas = None
+            if input("Aplicar filtros ou escolher colunas? (s/N): ").lower() in ['s', 'sim']:
+                autor = input("  Autor (Enter para todos): ").strip()
+                if autor:
+                    filtros['autor'] = autor
+                ano_min = input("  Ano inicial (Enter para ignorar): ").strip()
+                if ano_min:
+                    filtros['ano_min'] = self.validador.validar_ano(ano_min)
+                ano_max = input("  Ano final (Enter para ignorar): ").strip()
+                if ano_max:
+                    filtros['ano_max'] = self.validador.validar_ano(ano_max)
+                preco_min = input("  Preço mínimo (Enter para ignorar): ").strip()
+                if preco_min:
+                    filtros['preco_min'] = self.validador.validar_preco(preco_min)
+                preco_max = input("  Preço máximo (Enter para ignorar): ").strip()
+                if preco_max:
+                    filtros['preco_max'] = self.validador.validar_preco(preco_max)
+                
+                print(f"  Colunas disponíveis: {', '.join(COLUNAS_CSV)}")
+                colunas_texto = input("  Colunas separadas por vírgula (Enter para todas): ").strip()
+                if colunas_texto:
+                    colunas = [coluna.strip() for coluna in colunas_texto.split(',') if coluna.strip()]
+            
+            compactacao = "gzip" if FORMATOS_ARQUIVO[formato].compactacao_gzip else "zstd"
+            compactar = input(f"Compactar arquivo com {compactacao}? (s/N): ").lower() in ['s', 'sim']
+            
+            livros = self.db_manager.iterar_livros(colunas, **filtros)
+            caminho_arquivo, total = self.gerenciador_arquivos.exportar_em_fluxo(
+                livros, nome_arquivo, formato, colunas, compactar)
             
-            caminho_arquivo = self.gerenciador_arquivos.exportar_csv(livros, nome_arquivo)
+            if total == 0:
+                Path(caminho_arquivo).unlink()
+                print("Nenhum livro encontrado para exportar.")
+                return
             
             print(f"\n✓ Dados exportados com sucesso!")
             print(f"  Arquivo: {caminho_arquivo}")
-            print(f"  Total de livros exportados: {len(livros)}")
+            print(f"  Total de livros exportados: {total}")
             
+        except ValidationError as e:
+            print(f"\nErro de validação: {e}")
         except Exception as e:
             print(f"Erro ao exportar dados: {e}")
     
+    def importar_csv_em_fluxo(self, nome_arquivo: str, retomar: bool = True, tamanho_lote: int = 1000,
+                              progresso: Optional[Callable[[Dict], None]] = None,
+                              ao_erro: Optional[Callable[[int, str], None]] = None,
+                              processos: int = 1, se_existir: str = 'relatar') -> Dict:
+        # Pipeline de importação: leitura do CSV -> Validador -> inserção em lote.
+        # Apenas um lote fica em memória por vez; após cada lote gravado o ponto de
+        # retomada (offset em bytes e número da linha) é salvo ao lado do arquivo.
+        # Com processos > 1 a leitura e a validação rodam em paralelo (ver _importar_csv_em_paralelo),
+        # a menos que o arquivo tenha campos entre aspas com quebra de linha.
+        # se_existir: ver DatabaseManager.adicionar_livros_em_lote; 'existentes' conta os
+        # livros já cadastrados que foram pulados ou tiveram o preço atualizado.
+        ponto_retomada = self.gerenciador_arquivos.ler_progresso_importacao(nome_arquivo) if retomar else None
+        estado = {'offset': 0, 'linha': 0, 'importados': 0, 'existentes': 0, 'erros': 0}
+        if ponto_retomada:
+            estado.update(ponto_retomada)
+        estado['total_bytes'] = self.gerenciador_arquivos.tamanho_arquivo_exports(nome_arquivo)
+        
+        def registrar_erro(linha: int, mensagem: str):
+            estado['erros'] += 1
+            if ao_erro:
+                ao_erro(linha, mensagem)
+        
+        def salvar_ponto_retomada():
+            self.gerenciador_arquivos.salvar_progresso_importacao(nome_arquivo, {
+                'offset': estado['offset'],
+                'linha': estado['linha'],
+                'importados': estado['importados'],
+                'existentes': estado['existentes'],
+                'erros': estado['erros'],
+            })
+            if progresso:
+                progresso(estado)
+        
+        if processos > 1 and self._importar_csv_em_paralelo(nome_arquivo, estado, processos, tamanho_lote,
+                                                             se_existir, registrar_erro, salvar_ponto_retomada):
+            self.gerenciador_arquivos.remover_progresso_importacao(nome_arquivo)
+            return estado
+        
+        linhas_csv = self.gerenciador_arquivos.iterar_csv(nome_arquivo, estado['offset'], estado['linha'])
+        while True:
+            lote = list(islice(linhas_csv, tamanho_lote))
+            if lote:
+                livros, erros = _validar_livros_csv([linha for linha, _, _ in lote],
+                                                    [livro for _, _, livro in lote])
+                self._gravar_livros_validados(livros, erros, tamanho_lote, se_existir, estado, registrar_erro)
+                estado['linha'], estado['offset'] = lote[-1][0], lote[-1][1]
+            
+            salvar_ponto_retomada()
+            
+            if len(lote) < tamanho_lote:
+                break
+        
+        self.gerenciador_arquivos.remover_progresso_importacao(nome_arquivo)
+        return estado
+    
+    def importar_arquivo_em_fluxo(self, nome_arquivo: str, tamanho_lote: int = 1000,
+                                  progresso: Optional[Callable[[Dict], None]] = None,
+                                  ao_erro: Optional[Callable[[int, str], None]] = None,
+                                  se_existir: str = 'relatar') -> Dict:
+        # Importação de qualquer formato de FORMATOS_ARQUIVO (NDJSON, Parquet, Arrow, CSV
+        # compactado): os lotes já chegam em colunas e vão direto para Validador.validar_lote.
+        # A linha de um erro é a posição do registro no arquivo. CSV simples tem um caminho
+        # próprio, com retomada e processos paralelos (importar_csv_em_fluxo).
+        estado = {'linha': 0, 'importados': 0, 'existentes': 0, 'erros': 0}
+        
+        def registrar_erro(linha: int, mensagem: str):
+            estado['erros'] += 1
+            if ao_erro:
+                ao_erro(linha, mensagem)
+        
+        for colunas in self.gerenciador_arquivos.iterar_lotes(nome_arquivo, tamanho_lote):
+            quantidade = len(colunas['titulo'])
+            linhas = list(range(estado['linha'] + 1, estado['linha'] + quantidade + 1))
+            livros, erros = _validar_colunas(linhas, colunas)
+            self._gravar_livros_validados(livros, erros, tamanho_lote, se_existir, estado, registrar_erro)
+            estado['linha'] += quantidade
+            if progresso:
+                progresso(estado)
+        
+        return estado
+    
+    def _gravar_livros_validados(self, livros: List[Tuple[int, Tuple]], erros: List[Tuple[int, str]],
+                                 tamanho_lote: int, se_existir: str, estado: Dict,
+                                 registrar_erro: Callable[[int, str], None]):
+        # Insere os livros já validados e relata, em ordem de linha, os erros de validação
+        # junto com os que o banco recusar
+        importados, erros_lote = self.db_manager.adicionar_livros_em_lote(
+            [livro for _, livro in livros], tamanho_lote, se_existir)
+        estado['importados'] += importados
+        estado['existentes'] += len(livros) - importados - len(erros_lote)
+        
+        erros = erros + [(livros[indice][0], erro) for indice, erro in erros_lote]
+        for linha, erro in sorted(erros):
+            registrar_erro(linha, erro)
+    
+    def _importar_csv_em_paralelo(self, nome_arquivo: str, estado: Dict, processos: int, tamanho_lote: int,
+                                  se_existir: str, registrar_erro: Callable[[int, str], None],
+                                  salvar_ponto_retomada: Callable[[], None]) -> bool:
+        # O arquivo é dividido em trechos de bytes; um grupo de processos lê e valida os
+        # trechos enquanto este processo, o único escritor, grava os resultados na ordem
+        # do arquivo. Assim os números de linha, os erros e os IDs gerados são os mesmos
+        # da importação sequencial, e o ponto de retomada avança trecho a trecho.
+        # Retorna False, sem importar nada, se o arquivo não pode ser dividido em trechos.
+        caminho_csv, indices, trechos = self.gerenciador_arquivos.dividir_csv(nome_arquivo, estado['offset'])
+        if trechos is None:
+            return False
+        
+        # Importado aqui: concurrent.futures sozinho dobra o tempo de importação deste módulo
+        from concurrent.futures import ProcessPoolExecutor
+        
+        def gravar_trecho(fim: int, trecho):
+            linhas, livros, erros = trecho.result()
+            base = estado['linha']
+            self._gravar_livros_validados([(base + linha, livro) for linha, livro in livros],
+                                          [(base + linha, erro) for linha, erro in erros],
+                                          tamanho_lote, se_existir, estado, registrar_erro)
+            estado['linha'] = base + linhas
+            estado['offset'] = fim
+            salvar_ponto_retomada()
+        
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            # Limita os trechos em andamento para não acumular resultados em memória
+            pendentes = deque()
+            for inicio, fim in trechos:
+                pendentes.append((fim, executor.submit(_validar_trecho_csv, caminho_csv, inicio, fim, indices)))
+                if len(pendentes) >= processos * 2:
+                    gravar_trecho(*pendentes.popleft())
+            while pendentes:
+                gravar_trecho(*pendentes.popleft())
+        return True
+    
     def importar_dados_csv(self):
-        print("\n=== IMPORTAR DADOS DE CSV ===")
+        print("\n=== IMPORTAR DADOS ===")
         
         try:
-            # Listar arquivos CSV disponíveis
-            arquivos_csv = list(self.gerenciador_arquivos.diretorio_exports.glob("*.csv"))
+            # Listar arquivos disponíveis em qualquer formato de FORMATOS_ARQUIVO
+            arquivos = []
+            for arquivo in sorted(self.gerenciador_arquivos.diretorio_exports.iterdir()):
+                try:
+                    formato_do_arquivo(arquivo.name)
+                    arquivos.append(arquivo)
+                except ValueError:
+                    continue
             
-            if not arquivos_csv:
-                print("Nenhum arquivo CSV encontrado no diretório exports.")
+            if not arquivos:
+                print("Nenhum arquivo para importar encontrado no diretório exports.")
                 return
             
-            print("Arquivos CSV disponíveis:")
-            for i, arquivo in enumerate(arquivos_csv, 1):
+            print("Arquivos disponíveis:")
+            for i, arquivo in enumerate(arquivos, 1):
                 print(f"  {i}. {arquivo.name}")
             
-            nome_arquivo = input("\nNome do arquivo CSV ou número: ").strip()
+            nome_arquivo = input("\nNome do arquivo ou número: ").strip()
             
             # Se for número, usar o arquivo correspondente
             if nome_arquivo.isdigit():
                 indice = int(nome_arquivo) - 1
-                if 0 <= indice < len(arquivos_csv):
-                    nome_arquivo = arquivos_csv[indice].name
+                if 0 <= indice < len(arquivos):
+                    nome_arquivo = arquivos[indice].name
                 else:
                     print("Número inválido")
                     return
-            elif not nome_arquivo.endswith('.csv'):
+            elif '.' not in nome_arquivo:
                 nome_arquivo += '.csv'
             
-            livros = self.gerenciador_arquivos.importar_csv(nome_arquivo)
+            # Arquivos CSV sem compactação podem ser retomados e validados em paralelo
+            csv_simples = formato_do_arquivo(nome_arquivo) == 'csv' and not nome_arquivo.endswith('.gz')
             
-            print(f"\nDados carregados do arquivo: {len(livros)} livros")
+            # Mostrar preview dos dados (lê apenas o início do arquivo)
+            if csv_simples:
+                preview = [livro for _, _, livro in islice(self.gerenciador_arquivos.iterar_csv(nome_arquivo), 4)]
+            else:
+                primeiro_lote = next(self.gerenciador_arquivos.iterar_lotes(nome_arquivo, 4), {})
+                preview = [dict(zip(primeiro_lote, valores)) for valores in zip(*primeiro_lote.values())]
+            tamanho_kb = self.gerenciador_arquivos.tamanho_arquivo_exports(nome_arquivo) / 1024
             
-            # Mostrar preview dos dados
+            print(f"\nArquivo: {nome_arquivo} ({tamanho_kb:,.1f} KB)")
             print("\nPreview dos dados:")
-            for i, livro in enumerate(livros[:3], 1):
-                print(f"  {i}. {livro['titulo']} - {livro['autor']} ({livro['ano_publicacao']}) - R$ {livro['preco']:.2f}")
+            for i, livro in enumerate(preview[:3], 1):
+                print(f"  {i}. {livro['titulo']} - {livro['autor']} ({livro['ano_publicacao']}) - R$ {livro['preco']}")
+            
+            if len(preview) > 3:
+                print("  ...")
             
-            if len(livros) > 3:
-                print(f"  ... e mais {len(livros) - 3} livros")
+            retomar = False
+            ponto_retomada = self.gerenciador_arquivos.ler_progresso_importacao(nome_arquivo) if csv_simples else None
+            if ponto_retomada:
+                print(f"\nImportação anterior interrompida após a linha {ponto_retomada['linha']} "
+                      f"({ponto_retomada['importados']} livros importados).")
+                retomar = input("Continuar de onde parou? (S/n): ").lower() not in ['n', 'nao', 'não']
+            
+            se_existir = self._escolher_tratamento_existentes()
+            if se_existir is None:
+                return
             
-            confirmacao = input(f"\nImportar {len(livros)} livros? (s/N): ").lower()
+            confirmacao = input(f"\nImportar livros do arquivo {nome_arquivo}? (s/N): ").lower()
             if confirmacao != 's' and confirmacao != 'sim':
                 print("Importação cancelada.")
                 return
             
-            # Fazer backup antes da modificação
-            self._fazer_backup_automatico()
+            # Compactar o registro de alterações em um backup completo, se necessário
+            self._compactar_registro_se_necessario()
             
-            # Importar livros
-            livros_importados = 0
-            livros_erro = 0
+            def exibir_progresso(estado: Dict):
+                if 'total_bytes' not in estado:
+                    print(f"\r  Registros processados: {estado['linha']}", end='', flush=True)
+                    return
+                percentual = estado['offset'] / estado['total_bytes'] * 100 if estado['total_bytes'] else 100
+                print(f"\r  Linhas processadas: {estado['linha']} ({percentual:.0f}%)", end='', flush=True)
             
-            for livro in livros:
-                try:
-                    # Validar dados
-                    titulo = self.validador.validar_titulo(livro['titulo'])
-                    autor = self.validador.validar_autor(livro['autor'])
-                    ano = livro['ano_publicacao']
-                    preco = livro['preco']
-                    
-                    # Adicionar ao banco
-                    self.db_manager.adicionar_livro(titulo, autor, ano, preco)
-                    livros_importados += 1
-                    
-                except Exception as e:
-                    livros_erro += 1
-                    print(f"Erro ao importar livro '{livro.get('titulo', 'N/A')}': {e}")
+            def exibir_erro(linha: int, erro: str):
+                print(f"\n  Erro na linha {linha}: {erro}")
             
-            print(f"\n✓ Importação concluída!")
-            print(f"  Livros importados: {livros_importados}")
-            if livros_erro > 0:
-                print(f"  Livros com erro: {livros_erro}")
+            if csv_simples:
+                # Arquivos grandes são validados em paralelo, um processo por núcleo
+                processos = 1
+                if tamanho_kb * 1024 >= TAMANHO_MINIMO_IMPORTACAO_PARALELA:
+                    processos = os.cpu_count() or 1
+                
+                resultado = self.importar_csv_em_fluxo(nome_arquivo, retomar, progresso=exibir_progresso,
+                                                       ao_erro=exibir_erro, processos=processos,
+                                                       se_existir=se_existir)
+            else:
+                resultado = self.importar_arquivo_em_fluxo(nome_arquivo, progresso=exibir_progresso,
+                                                           ao_erro=exibir_erro, se_existir=se_existir)
+            
+            print("\n\n✓ Importação concluída!")
+            print(f"  Livros importados: {resultado['importados']}")
+            if resultado['existentes'] > 0:
+                acao = "preço atualizado" if se_existir == 'atualizar_preco' else "ignorados"
+                print(f"  Livros já cadastrados ({acao}): {resultado['existentes']}")
+            if resultado['erros'] > 0:
+                print(f"  Livros com erro: {resultado['erros']}")
             
         except FileNotFoundError as e:
             print(f"Arquivo não encontrado: {e}")
         except Exception as e:
             print(f"Erro ao importar dados: {e}")
     
+    def _escolher_tratamento_existentes(self) -> Optional[str]:
+        # Pergunta o que fazer com livros do arquivo que já estão no catálogo.
+        # Retorna o modo para adicionar_livros_em_lote ou None se o usuário desistir.
+        if not self.db_manager.chave_natural_unica:
+            print("\nO catálogo tem livros duplicados (mesmo título, autor e ano), então não é")
+            print("possível detectar livros já cadastrados durante a importação.")
+            resposta = input("Remover os duplicados agora? (s/N): ").lower()
+            if resposta != 's' and resposta != 'sim':
+                continuar = input("Importar assim mesmo, podendo duplicar livros? (s/N): ").lower()
+                return 'relatar' if continuar in ['s', 'sim'] else None
+            self._fazer_snapshot_antes_de_lote()
+            removidos = self.db_manager.remover_duplicados()
+            print(f"✓ Duplicados removidos: {removidos}")
+        
+        print("\nLivros do arquivo que já estão no catálogo:")
+        print("1. Atualizar o preço (padrão)")
+        print("2. Ignorar")
+        print("3. Relatar como erro")
+        opcao = input("Escolha (1-3): ").strip() or '1'
+        modos = {'1': 'atualizar_preco', '2': 'pular', '3': 'relatar'}
+        if opcao not in modos:
+            print("Opção inválida")
+            return None
+        return modos[opcao]
+    
     def fazer_backup_manual(self):
         print("\n=== FAZER BACKUP DO BANCO DE DADOS ===")
         
         try:
-            backup_path = self.gerenciador_arquivos.criar_backup()
+            nome_backup = self.gerenciador_arquivos.criar_backup()
+            backup = self.gerenciador_arquivos.listar_backups()[0]
+            armazem = self.gerenciador_arquivos.armazem.estatisticas()
             print(f"\n✓ Backup criado com sucesso!")
-            print(f"  Arquivo: {Path(backup_path).name}")
-            print(f"  Localização: {backup_path}")
+            print(f"  Nome: {nome_backup}")
+            print(f"  Tamanho do banco: {backup['tamanho'] / 1024 / 1024:.2f} MB "
+                  f"(gravados {backup['gravado'] / 1024:.1f} KB de blocos novos)")
+            print(f"  Armazém: {armazem['backups']} backups, {armazem['armazenado'] / 1024 / 1024:.2f} MB em disco "
+                  f"para {armazem['tamanho_total'] / 1024 / 1024:.2f} MB de bancos")
+            print(f"  Localização: {self.gerenciador_arquivos.diretorio_backups}")
             
         except Exception as e:
             print(f"Erro ao criar backup: {e}")
     
+    def _fazer_snapshot_antes_de_lote(self):
+        # Operações em lote recebem um único backup completo antes de começar,
+        # em vez de depender apenas do registro de alterações
+        nome_backup = self.gerenciador_arquivos.criar_backup()
+        self._seq_ultimo_backup = None
+        print(f"✓ Backup criado antes da operação em lote: {nome_backup}")
+    
+    def reajustar_precos_em_lote(self):
+        print("\n=== REAJUSTAR PREÇOS EM LOTE ===")
+        
+        try:
+            print("1. Reajuste percentual (ex: 10 para +10%, -5 para -5%)")
+            print("2. Valor fixo somado ao preço (ex: 5,00 ou -2,50)")
+            print("3. Lista de preços de um arquivo CSV (colunas ID e Preço)")
+            tipo = input("Tipo de reajuste: ").strip()
+            
+            if tipo == '3':
+                self._aplicar_lista_precos_csv()
+                return
+            if tipo not in ['1', '2']:
+                print("Tipo inválido")
+                return
+            
+            texto = input("Percentual: " if tipo == '1' else "Valor (R$): ").strip().replace(',', '.')
+            try:
+                quantia = float(texto)
+            except ValueError:
+                print("Informe um número válido (ex: 10 ou 10,5)")
+                return
+            
+            print("\nSeleção dos livros (Enter para ignorar cada critério):")
+            filtros = {}
+            autor = input("  Autor (nome completo): ").strip()
+            if autor:
+                filtros['autor_exato'] = autor
+            ano_min = input("  Ano inicial: ").strip()
+            if ano_min:
+                filtros['ano_min'] = self.validador.validar_ano(ano_min)
+            ano_max = input("  Ano final: ").strip()
+            if ano_max:
+                filtros['ano_max'] = self.validador.validar_ano(ano_max)
+            ids = input("  IDs separados por vírgula: ").strip()
+            if ids:
+                try:
+                    filtros['ids'] = [int(id_livro) for id_livro in ids.split(',') if id_livro.strip()]
+                except ValueError:
+                    print("IDs devem ser números inteiros")
+                    return
+            
+            quantidade = self.db_manager.contar_livros(**filtros)
+            if quantidade == 0:
+                print("Nenhum livro corresponde à seleção.")
+                return
+            
+            descricao = f"{quantia:+.2f}%" if tipo == '1' else f"R$ {quantia:+.2f}"
+            alvo = "TODOS os livros" if not filtros else f"{quantidade} livro(s)"
+            confirmacao = input(f"\nAplicar reajuste de {descricao} em {alvo}? (s/N): ").lower()
+            if confirmacao != 's' and confirmacao != 'sim':
+                print("Operação cancelada.")
+                return
+            
+            self._fazer_snapshot_antes_de_lote()
+            
+            if tipo == '1':
+                atualizados = self.db_manager.reajustar_precos(percentual=quantia, **filtros)
+            else:
+                atualizados = self.db_manager.reajustar_precos(valor=quantia, **filtros)
+            
+            print("\n✓ Reajuste aplicado!")
+            print(f"  Livros atualizados: {atualizados}")
+            
+        except ValidationError as e:
+            print(f"\nErro de validação: {e}")
+        except Exception as e:
+            print(f"\nErro ao reajustar preços: {e}")
+    
+    def _aplicar_lista_precos_csv(self):
+        nome_arquivo = input("Nome do arquivo CSV (no diretório exports): ").strip()
+        if not nome_arquivo.endswith('.csv'):
+            nome_arquivo += '.csv'
+        
+        # Valida a lista inteira antes de alterar qualquer preço
+        precos = []
+        erros = 0
+        for linha, _, registro in self.gerenciador_arquivos.iterar_csv(nome_arquivo, campos=['id', 'preco']):
+            try:
+                precos.append((int(registro['id']), self.validador.validar_preco(registro['preco'])))
+            except ValueError:
+                erros += 1
+                print(f"  Linha {linha}: ID inválido '{registro['id']}'")
+            except ValidationError as e:
+                erros += 1
+                print(f"  Linha {linha}: {e}")
+        
+        if erros:
+            print(f"\n{erros} linha(s) com erro. Corrija o arquivo; nenhum preço foi alterado.")
+            return
+        if not precos:
+            print("Nenhum preço encontrado no arquivo.")
+            return
+        
+        confirmacao = input(f"\nAplicar {len(precos)} novos preços? (s/N): ").lower()
+        if confirmacao != 's' and confirmacao != 'sim':
+            print("Operação cancelada.")
+            return
+        
+        self._fazer_snapshot_antes_de_lote()
+        atualizados, nao_encontrados = self.db_manager.aplicar_lista_precos(precos)
+        
+        print("\n✓ Lista de preços aplicada!")
+        print(f"  Livros atualizados: {atualizados}")
+        if nao_encontrados:
+            print(f"  IDs não encontrados: {', '.join(map(str, nao_encontrados[:20]))}"
+                  f"{' ...' if len(nao_encontrados) > 20 else ''}")
+    
+    def restaurar_momento_anterior(self):
+        print("\n=== RESTAURAR BANCO PARA UM MOMENTO ANTERIOR ===")
+        
+        try:
+            alteracoes = self.db_manager.obter_alteracoes(limite=10, mais_recentes=True)
+            if not alteracoes:
+                print("Nenhuma alteração registrada.")
+                return
+            
+            print("\nÚltimas alterações registradas:")
+            for alteracao in alteracoes:
+                dados = alteracao['depois'] or alteracao['antes']
+                print(f"  #{alteracao['seq']:<6} {alteracao['momento'][:19]}  {alteracao['operacao']:<6} "
+                      f"ID {alteracao['id']}: {dados['titulo']} (R$ {dados['preco']:.2f})")
+            
+            alvo = input("\nRestaurar até a alteração nº (ex: 120) ou momento (AAAA-MM-DD HH:MM:SS): ").strip()
+            if not alvo:
+                print("Operação cancelada.")
+                return
+            
+            if alvo.lstrip('#').isdigit():
+                seq_alvo = int(alvo.lstrip('#'))
+            else:
+                try:
+                    momento = datetime.strptime(alvo, "%Y-%m-%d %H:%M:%S")
+                except ValueError:
+                    print("Momento inválido. Use o formato AAAA-MM-DD HH:MM:SS")
+                    return
+                seq_alvo = self.db_manager.alteracao_no_momento(momento.strftime("%Y-%m-%d %H:%M:%S.999"))
+                if seq_alvo is None:
+                    print("Não há alterações registradas até esse momento.")
+                    return
+            
+            confirmacao = input(f"\nDesfazer todas as alterações posteriores à nº {seq_alvo}? (s/N): ").lower()
+            if confirmacao != 's' and confirmacao != 'sim':
+                print("Operação cancelada.")
+                return
+            
+            # O estado atual também é guardado, para que a restauração possa ser desfeita
+            backup_atual = self.gerenciador_arquivos.criar_backup()
+            
+            registro = self.db_manager.obter_alteracoes()
+            # A restauração já cria o backup que serve de novo ponto de partida
+            nome_base, reaplicadas = self.gerenciador_arquivos.restaurar_ate_alteracao(seq_alvo, registro)
+            self.db_manager._atualizar_estado_esquema()
+            self.db_manager.invalidar_cache()
+            self._seq_ultimo_backup = None
+            
+            print(f"\n✓ Banco restaurado até a alteração nº {seq_alvo}!")
+            print(f"  Backup base: {nome_base}")
+            print(f"  Alterações reaplicadas: {reaplicadas}")
+            print(f"  Estado anterior salvo em: {backup_atual}")
+            
+        except Exception as e:
+            print(f"Erro ao restaurar banco: {e}")
+    
+    def exibir_estatisticas(self):
+        print("\n=== ESTATÍSTICAS DO CATÁLOGO ===")
+        
+        try:
+            estatisticas = self.db_manager.obter_estatisticas()
+            if estatisticas['total_livros'] == 0:
+                print("Nenhum livro cadastrado.")
+                return
+            
+            print(f"\nLivros: {estatisticas['total_livros']:,}   Autores: {estatisticas['total_autores']:,}")
+            print(f"Valor total do acervo: R$ {estatisticas['valor_total']:,.2f}")
+            print(f"Preço médio: R$ {estatisticas['preco_medio']:.2f}   "
+                  f"Mínimo: R$ {estatisticas['preco_minimo']:.2f}   Máximo: R$ {estatisticas['preco_maximo']:.2f}")
+            print(f"Publicações de {estatisticas['ano_mais_antigo']} a {estatisticas['ano_mais_recente']}")
+            
+            print("\nAutores com mais livros:")
+            print(f"  {'Autor':<35} {'Livros':>8} {'Preço médio':>12}")
+            for autor, quantidade, preco_medio in estatisticas['autores']:
+                print(f"  {autor[:35]:<35} {quantidade:>8,} {'R$ ' + f'{preco_medio:.2f}':>12}")
+            
+            print("\nLivros por década:")
+            maior = max(quantidade for _, quantidade, _ in estatisticas['decadas'])
+            for decada, quantidade, preco_medio in estatisticas['decadas']:
+                barra = '#' * max(1, round(quantidade / maior * 30))
+                print(f"  {decada}s {quantidade:>8,}  R$ {preco_medio:>8.2f}  {barra}")
+            
+        except Exception as e:
+            print(f"Erro ao obter estatísticas: {e}")
+    
+    def exibir_metricas(self):
+        print("\n=== MÉTRICAS DE DESEMPENHO ===")
+        
+        if self.metricas is None:
+            print("A medição está desligada (sem custo para as operações).")
+            if input("Ligar agora? (s/N): ").strip().lower() == 's':
+                self.definir_metricas(Metricas())
+                print("✓ Medição ligada. Use o sistema e volte a esta opção para ver os números.")
+            return
+        
+        estatisticas = self.metricas.estatisticas(limite_sql=10)
+        print(f"Medindo desde {estatisticas['desde']}")
+        if not estatisticas['operacoes']:
+            print("Nenhuma operação medida ainda.")
+        else:
+            print(f"\n  {'Operação':<32} {'Qtd':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Linhas':>9}")
+            for nome, resumo in estatisticas['operacoes'].items():
+                print(f"  {nome[:32]:<32} {resumo['contagem']:>7,} {resumo['p50_ms']:>8.2f} "
+                      f"{resumo['p95_ms']:>8.2f} {resumo['p99_ms']:>8.2f} {resumo['linhas']:>9,}")
+        
+        if estatisticas['sql']:
+            print("\nComandos SQL mais caros (tempo total):")
+            for resumo in estatisticas['sql']:
+                print(f"  {resumo['total_ms']:>10.2f} ms  {resumo['contagem']:>7,}x  {resumo['comando'][:60]}")
+        
+        if estatisticas['contadores']:
+            print("\nContadores:")
+            for contador, valor in estatisticas['contadores'].items():
+                print(f"  {contador:<32} {valor:>12,}")
+        
+        print("\n1. Salvar em arquivo (JSON)   2. Zerar   3. Desligar   Enter. Voltar")
+        escolha = input("Opção: ").strip()
+        if escolha == '1':
+            nome = f"metricas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            caminho = self.metricas.salvar(str(self.gerenciador_arquivos.diretorio_exports / nome))
+            print(f"✓ Métricas salvas em: {caminho}")
+        elif escolha == '2':
+            self.metricas.limpar()
+            print("✓ Métricas zeradas.")
+        elif escolha == '3':
+            self.definir_metricas(None)
+            print("✓ Medição desligada.")
+    
     def executar(self):
         print("="*60)
         print("    SISTEMA DE GERENCIAMENTO DE LIVRARIA")
         print("="*60)
         print("Bem-vindo ao sistema de gerenciamento da livraria!")
         print("Todos os dados são salvos automaticamente.")
-        print("Backups são criados automaticamente antes de modificações.")
+        print("Todas as alterações são registradas e podem ser desfeitas.")
         
         while True:
             try:
@@ -512,13 +3895,17 @@ class SistemaLivraria:
                 print("3. Atualizar preço de um livro")
                 print("4. Remover um livro")
                 print("5. Buscar livros por autor")
-                print("6. Exportar dados para CSV")
-                print("7. Importar dados de CSV")
+                print("6. Exportar dados (CSV, NDJSON, Parquet, Arrow)")
+                print("7. Importar dados (CSV, NDJSON, Parquet, Arrow)")
                 print("8. Fazer backup do banco de dados")
                 print("9. Sair")
+                print("10. Restaurar banco para um momento anterior")
+                print("11. Reajustar preços em lote")
+                print("12. Estatísticas do catálogo")
+                print("13. Métricas de desempenho")
                 print("-"*50)
                 
-                opcao = input("Escolha uma opção (1-9): ").strip()
+                opcao = input("Escolha uma opção (1-13): ").strip()
                 
                 if opcao == '1':
                     self.adicionar_livro()
@@ -542,11 +3929,19 @@ class SistemaLivraria:
                     print("Até logo!")
                     print("="*50)
                     break
+                elif opcao == '10':
+                    self.restaurar_momento_anterior()
+                elif opcao == '11':
+                    self.reajustar_precos_em_lote()
+                elif opcao == '12':
+                    self.exibir_estatisticas()
+                elif opcao == '13':
+                    self.exibir_metricas()
                 else:
-                    print("\nOpção inválida. Por favor, escolha uma opção de 1 a 9.")
+                    print("\nOpção inválida. Por favor, escolha uma opção de 1 a 13.")
                 
                 # Pausa para o usuário ler a saída
-                if opcao in ['1', '2', '3', '4', '5', '6', '7', '8']:
+                if opcao in ['1', '2', '3', '4', '5', '6', '7', '8', '10', '11', '12', '13']:
                     input("\nPressione Enter para continuar...")
                 
             except KeyboardInterrupt:
@@ -556,6 +3951,8 @@ class SistemaLivraria:
             except Exception as e:
                 print(f"\nErro inesperado: {e}")
                 input("Pressione Enter para continuar...")
+        
+        self.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,85 @@
+import asyncio
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from livraria_async import AsyncDatabaseManager
+from sistema_livraria import CacheLRU
+
+
+class TestAsyncDatabaseManager(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, diretorio)
+        self.caminho_db = str(diretorio / "livraria.db")
+
+    async def test_escritas_concorrentes_passam_pela_fila_de_escrita(self):
+        threads = set()
+        async with AsyncDatabaseManager(self.caminho_db, leitores=4) as db:
+            adicionar = db.db_manager.adicionar_livro
+
+            def adicionar_registrando(*livro):
+                threads.add(threading.current_thread().name)
+                return adicionar(*livro)
+
+            db.db_manager.adicionar_livro = adicionar_registrando
+            ids = await asyncio.gather(*(db.adicionar_livro(f"Livro {i}", f"Autor {i % 5}", 2000, 10.0 + i)
+                                         for i in range(100)))
+            leituras = await asyncio.gather(*(db.obter_livro_por_id(id_livro) for id_livro in ids))
+
+            self.assertEqual(sorted(ids), list(range(1, 101)))
+            self.assertEqual([livro[0] for livro in leituras], ids)
+            self.assertEqual(await db.contar_livros(), 100)
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads.pop().startswith("livraria-escrita"))
+
+    async def test_leituras_durante_escritas(self):
+        async with AsyncDatabaseManager(self.caminho_db, leitores=2, cache=CacheLRU()) as db:
+            id_livro = await db.adicionar_livro("Helena", "Machado de Assis", 1876, 15.0)
+            resultados = await asyncio.gather(
+                *(db.atualizar_preco_livro(id_livro, 15.0 + i) for i in range(20)),
+                *(db.buscar_livros_por_autor("machado") for _ in range(20)),
+            )
+            self.assertTrue(all(resultados[:20]))
+            self.assertTrue(all(len(livros) == 1 for livros in resultados[20:]))
+            self.assertEqual((await db.obter_livro_por_id(id_livro))[4], 34.0)
+
+    async def test_iterar_livros_por_paginas(self):
+        async with AsyncDatabaseManager(self.caminho_db) as db:
+            await db.adicionar_livros_em_lote([(f"Livro {i % 3}", "Autor", 2000 + i, 10.0) for i in range(25)])
+            livros = [livro async for livro in db.iterar_livros(tamanho_pagina=4)]
+            self.assertEqual(livros, await db.obter_todos_livros())
+            self.assertEqual(len(livros), 25)
+
+            # Vários iteradores abertos ao mesmo tempo não esgotam o pool
+            iteradores = [db.iterar_livros(tamanho_pagina=2) for _ in range(10)]
+            primeiros = [await iterador.__anext__() for iterador in iteradores]
+            self.assertEqual(len(primeiros), 10)
+            for iterador in iteradores:
+                await iterador.aclose()
+
+    async def test_erros_chegam_a_quem_aguarda(self):
+        async with AsyncDatabaseManager(self.caminho_db) as db:
+            await db.adicionar_livro("Helena", "Machado de Assis", 1876, 15.0)
+            with self.assertRaises(sqlite3.IntegrityError):
+                await db.adicionar_livro("Helena", "Machado de Assis", 1876, 15.0)
+            with self.assertRaises(ValueError):
+                await db.listar_livros(ordenar_por='isbn')
+            self.assertEqual(await db.contar_livros(), 1)
+
+    async def test_close_aguarda_as_escritas_pendentes(self):
+        db = AsyncDatabaseManager(self.caminho_db)
+        pendentes = [asyncio.ensure_future(db.adicionar_livro(f"Livro {i}", "Autor", 2000, 10.0)) for i in range(20)]
+        await asyncio.sleep(0)
+        await db.close()
+        await asyncio.gather(*pendentes)
+        with sqlite3.connect(self.caminho_db) as conn:
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM livros').fetchone()[0], 20)
+        conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+import io
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+from sistema_livraria import SistemaLivraria
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+class TestBackups(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.diretorio)
+
+    def _abrir(self) -> SistemaLivraria:
+        with redirect_stdout(io.StringIO()):
+            sistema = SistemaLivraria(str(self.diretorio))
+        self.addCleanup(sistema.close)
+        return sistema
+
+    def _livros(self, sistema: SistemaLivraria):
+        return sorted(tuple(livro) for livro in sistema.db_manager.iterar_livros())
+
+    def _adicionar(self, sistema: SistemaLivraria, quantidade: int, inicio: int = 0):
+        for i in range(inicio, inicio + quantidade):
+            sistema.db_manager.adicionar_livro(f"Livro {i}", f"Autor {i}", 2000, 10.0 + i)
+
+    def test_restaurar_backup_mantem_numeracao_do_registro(self):
+        sistema = self._abrir()
+        gerenciador = sistema.gerenciador_arquivos
+        self._adicionar(sistema, 5)
+        with redirect_stdout(io.StringIO()):
+            base = gerenciador.criar_backup()
+        self._adicionar(sistema, 3, 5)
+        self.assertEqual(sistema.db_manager.ultima_alteracao(), 8)
+
+        with redirect_stdout(io.StringIO()):
+            gerenciador.restaurar_backup(base)
+        self.assertEqual(len(self._livros(sistema)), 5)
+        # A numeração continua de onde estava, sem reutilizar as alterações desfeitas;
+        # a restauração consome um número
+        self.assertEqual(sistema.db_manager.ultima_alteracao(), 9)
+
+        self._adicionar(sistema, 2, 100)
+        self.assertEqual(sistema.db_manager.ultima_alteracao(), 11)
+        incremental = gerenciador.criar_backup_incremental()
+        self.assertIsNotNone(incremental)
+        esperado = self._livros(sistema)
+
+        # O último backup completo mais o incremental reproduzem o estado atual
+        mais_recente = gerenciador.listar_backups_completos()[0][0]
+        with redirect_stdout(io.StringIO()):
+            sistema.db_manager.remover_livro(esperado[0][0])
+            gerenciador.restaurar_backup(mais_recente)
+        self.assertEqual(self._livros(sistema), esperado)
+
+    def test_restaurar_ate_alteracao_com_backups_anteriores_ao_registro(self):
+        # Banco e backups do repositório são anteriores ao registro de alterações
+        (self.diretorio / "data").mkdir()
+        (self.diretorio / "backups").mkdir()
+        shutil.copy(RAIZ / "data" / "livraria.db", self.diretorio / "data" / "livraria.db")
+        for backup in (RAIZ / "backups").glob("backup_livraria_*.db"):
+            shutil.copy(backup, self.diretorio / "backups" / backup.name)
+
+        sistema = self._abrir()
+        gerenciador = sistema.gerenciador_arquivos
+        self._adicionar(sistema, 6)
+        with redirect_stdout(io.StringIO()):
+            gerenciador.criar_backup()
+        antes = self._livros(sistema)
+
+        # Nenhum backup cobre a alteração 3: os antigos não têm registro, o novo é posterior
+        with self.assertRaises(ValueError), redirect_stdout(io.StringIO()):
+            gerenciador.restaurar_ate_alteracao(3, sistema.db_manager.obter_alteracoes())
+
+        # O banco atual fica intacto, com o esquema completo
+        self.assertEqual(self._livros(sistema), antes)
+        self.assertTrue(sistema.db_manager.buscar_livros("Livro"))
+        with sqlite3.connect(gerenciador.arquivo_db) as conn:
+            tabelas = {nome for (nome,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertTrue({'livros_fts', 'livros_alteracoes', 'estatisticas_autor'} <= tabelas)
+
+    def test_restaurar_ate_alteracao(self):
+        sistema = self._abrir()
+        gerenciador = sistema.gerenciador_arquivos
+        self._adicionar(sistema, 2)
+        with redirect_stdout(io.StringIO()):
+            base = gerenciador.criar_backup()
+        self._adicionar(sistema, 4, 2)
+        sistema.db_manager.atualizar_preco_livro(1, 99.0)
+
+        with redirect_stdout(io.StringIO()):
+            nome_base, reaplicadas = gerenciador.restaurar_ate_alteracao(
+                4, sistema.db_manager.obter_alteracoes())
+        self.assertEqual((nome_base, reaplicadas), (base, 2))
+        self.assertEqual([livro[1] for livro in self._livros(sistema)], [f"Livro {i}" for i in range(4)])
+        self.assertEqual(sistema.db_manager.obter_livro_por_id(1)[4], 10.0)
+        self.assertEqual([alteracao['seq'] for alteracao in sistema.db_manager.obter_alteracoes()], [1, 2, 3, 4])
+        # Novas alterações seguem depois das descartadas e do número da restauração
+        self.assertEqual(sistema.db_manager.ultima_alteracao(), 8)
+
+    def test_verificar_backup_sem_objeto_no_indice(self):
+        sistema = self._abrir()
+        gerenciador = sistema.gerenciador_arquivos
+        self._adicionar(sistema, 3)
+        with redirect_stdout(io.StringIO()):
+            nome = gerenciador.criar_backup()
+        conn = sqlite3.connect(gerenciador.armazem.caminho_indice)
+        with conn:
+            conn.execute('DELETE FROM objetos WHERE hash = (SELECT MIN(hash) FROM objetos)')
+        conn.close()
+        with self.assertRaisesRegex(ValueError, "não está no índice"):
+            gerenciador.verificar_backup(nome)
+
+    def test_compactar_registro_retorna_backup_sem_escrever_na_tela(self):
+        sistema = self._abrir()
+        saida = io.StringIO()
+        with redirect_stdout(saida), mock.patch('sistema_livraria.INTERVALO_COMPACTACAO', 3):
+            # Sem nenhum backup, a primeira escrita cria um
+            primeiro = sistema.compactar_registro_se_necessario()
+            self._adicionar(sistema, 2)
+            self.assertIsNone(sistema.compactar_registro_se_necessario())
+            self._adicionar(sistema, 1, 2)
+            segundo = sistema.compactar_registro_se_necessario()
+        self.assertEqual(saida.getvalue(), "")
+        self.assertIsNotNone(primeiro)
+        self.assertIsNotNone(segundo)
+        self.assertEqual([nome for nome, _ in sistema.gerenciador_arquivos.listar_backups_completos()],
+                         [segundo, primeiro])
+
+    def test_backups_antigos_convertidos_sem_apagar_o_original(self):
+        (self.diretorio / "backups").mkdir()
+        antigos = sorted(backup.name for backup in (RAIZ / "backups").glob("backup_livraria_*.db"))
+        for nome in antigos:
+            shutil.copy(RAIZ / "backups" / nome, self.diretorio / "backups" / nome)
+        sistema = self._abrir()
+        gerenciador = sistema.gerenciador_arquivos
+
+        saida = io.StringIO()
+        with redirect_stdout(saida), mock.patch.object(type(gerenciador), '_conversao_confere',
+                                                       side_effect=lambda armazem, caminho: caminho.name != antigos[0]):
+            backups = {backup['nome'] for backup in gerenciador.listar_backups()}
+        self.assertEqual(saida.getvalue(), "")
+        # O primeiro não conferiu: fica no lugar e sai do armazém, para ser convertido de novo
+        self.assertEqual(backups, set(antigos[1:]))
+        self.assertEqual(sorted(gerenciador.backups_convertidos), antigos[1:])
+        self.assertTrue((self.diretorio / "backups" / antigos[0]).exists())
+        for nome in antigos[1:]:
+            self.assertEqual((self.diretorio / "backups" / "convertidos" / nome).read_bytes(),
+                             (RAIZ / "backups" / nome).read_bytes())
+            self.assertEqual(gerenciador.verificar_backup(nome)['nome'], nome)
+
+        # Na abertura seguinte só o que faltou é convertido, agora conferido de verdade
+        sistema.close()
+        gerenciador = self._abrir().gerenciador_arquivos
+        self.assertEqual({backup['nome'] for backup in gerenciador.listar_backups()}, set(antigos))
+        self.assertEqual(gerenciador.backups_convertidos, antigos[:1])
+        self.assertEqual(sorted(caminho.name for caminho in (self.diretorio / "backups" / "convertidos").iterdir()),
+                         antigos)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from sistema_livraria import DatabaseManager
+
+LIVROS = [
+    ("Iracema", "José de Alencar", 1865, 20.0),
+    ("O Guarani", "José de Alencar", 1857, 30.0),
+    ("O Ateneu", "Raul Pompéia", 1888, 22.0),
+    ("Helena", "Machado de Assis", 1876, 15.0),
+    ("Memórias Póstumas de Brás Cubas", "Machado de Assis", 1881, 28.0),
+]
+
+
+class TestBuscaTextoCompleto(unittest.TestCase):
+    def setUp(self):
+        diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, diretorio)
+        self.caminho_db = str(diretorio / "livraria.db")
+
+    def _abrir(self) -> DatabaseManager:
+        db = DatabaseManager(self.caminho_db)
+        self.addCleanup(db.close)
+        return db
+
+    @staticmethod
+    def _titulos(livros) -> list:
+        return sorted(livro[1] for livro in livros)
+
+    def test_busca_por_autor_por_inicio_de_palavra(self):
+        db = self._abrir()
+        db.adicionar_livros_em_lote(LIVROS)
+        self.assertEqual(self._titulos(db.buscar_livros_por_autor("Alencar")), ["Iracema", "O Guarani"])
+        self.assertEqual(self._titulos(db.buscar_livros_por_autor("jose alen")), ["Iracema", "O Guarani"])
+        self.assertEqual(self._titulos(db.buscar_livros_por_autor("alencar josé")), ["Iracema", "O Guarani"])
+        # Só o início das palavras: um trecho do meio não encontra nada
+        self.assertEqual(db.buscar_livros_por_autor("lencar"), [])
+
+    def test_busca_sem_diferenciar_acentos(self):
+        db = self._abrir()
+        db.adicionar_livros_em_lote(LIVROS)
+        self.assertEqual(self._titulos(db.buscar_livros_por_autor("Pompeia")), ["O Ateneu"])
+        self.assertEqual(self._titulos(db.buscar_livros("memorias postumas")), ["Memórias Póstumas de Brás Cubas"])
+        self.assertEqual(self._titulos(db.buscar_livros("BRAS")), ["Memórias Póstumas de Brás Cubas"])
+
+    def test_busca_em_titulo_e_autor(self):
+        db = self._abrir()
+        db.adicionar_livros_em_lote(LIVROS)
+        self.assertEqual(self._titulos(db.buscar_livros("machado")), ["Helena", "Memórias Póstumas de Brás Cubas"])
+        self.assertEqual(self._titulos(db.buscar_livros("helena")), ["Helena"])
+        self.assertEqual(len(db.buscar_livros("de", limite=2)), 2)
+        # Termos sem nenhuma palavra não montam uma consulta FTS5 inválida
+        self.assertEqual(db.buscar_livros('"*'), [])
+
+    def test_indice_acompanha_alteracoes(self):
+        db = self._abrir()
+        id_livro = db.adicionar_livro("Senhora", "José de Alencar", 1875, 18.0)
+        self.assertEqual(self._titulos(db.buscar_livros_por_autor("alencar")), ["Senhora"])
+        with db._conexao() as conn:
+            conn.execute("UPDATE livros SET autor = 'J. de Alencar' WHERE id = ?", (id_livro,))
+        self.assertEqual(db.buscar_livros_por_autor("jose"), [])
+        db.remover_livro(id_livro)
+        self.assertEqual(db.buscar_livros_por_autor("alencar"), [])
+
+    def test_banco_existente_e_indexado_ao_abrir(self):
+        # Banco anterior ao índice de busca: só a tabela livros, já com livros
+        with sqlite3.connect(self.caminho_db) as conn:
+            conn.execute('''
+                CREATE TABLE livros (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    titulo TEXT NOT NULL,
+                    autor TEXT NOT NULL,
+                    ano_publicacao INTEGER NOT NULL,
+                    preco REAL NOT NULL
+                )
+            ''')
+            conn.executemany('INSERT INTO livros (titulo, autor, ano_publicacao, preco) VALUES (?, ?, ?, ?)', LIVROS)
+        conn.close()
+
+        db = self._abrir()
+        self.assertTrue(db._fts_disponivel)
+        self.assertEqual(self._titulos(db.buscar_livros_por_autor("pompeia")), ["O Ateneu"])
+        with sqlite3.connect(self.caminho_db) as conn:
+            conn.execute("INSERT INTO livros_fts (livros_fts, rank) VALUES ('integrity-check', 1)")
+        conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import io
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+from sistema_livraria import CacheLRU, DatabaseManager, SistemaLivraria
+
+
+class TestCacheLRU(unittest.TestCase):
+    def test_descarta_o_menos_usado(self):
+        cache = CacheLRU(max_itens=2, ttl=None)
+        cache.guardar('a', 1, cache.geracao)
+        cache.guardar('b', 2, cache.geracao)
+        self.assertEqual(cache.obter('a'), (True, 1))
+        cache.guardar('c', 3, cache.geracao)
+        self.assertEqual(cache.obter('b'), (False, None))
+        self.assertEqual(cache.obter('a'), (True, 1))
+        self.assertEqual(cache.estatisticas()['remocoes'], 1)
+
+    def test_limite_de_bytes(self):
+        cache = CacheLRU(max_bytes=CacheLRU._estimar_tamanho('x' * 100) * 2, ttl=None)
+        for chave in 'abc':
+            cache.guardar(chave, chave * 100, cache.geracao)
+        self.assertEqual(cache.estatisticas()['itens'], 2)
+        self.assertLessEqual(cache.bytes_usados, cache.max_bytes)
+        # Um valor maior que o cache inteiro não é guardado
+        cache.guardar('grande', 'x' * 1000, cache.geracao)
+        self.assertEqual(cache.obter('grande'), (False, None))
+
+    def test_expira_apos_ttl(self):
+        cache = CacheLRU(ttl=10)
+        with mock.patch('sistema_livraria.time.monotonic', return_value=100.0):
+            cache.guardar('a', 1, cache.geracao)
+            self.assertEqual(cache.obter('a'), (True, 1))
+        with mock.patch('sistema_livraria.time.monotonic', return_value=111.0):
+            self.assertEqual(cache.obter('a'), (False, None))
+
+    def test_leitura_anterior_a_invalidacao_nao_e_guardada(self):
+        cache = CacheLRU()
+        geracao = cache.geracao
+        cache.invalidar('a')
+        cache.guardar('a', 'antigo', geracao)
+        self.assertEqual(cache.obter('a'), (False, None))
+
+
+class TestCacheDatabaseManager(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.diretorio)
+        self.cache = CacheLRU()
+        self.db = DatabaseManager(str(self.diretorio / "livraria.db"), 1, cache=self.cache)
+        self.addCleanup(self.db.close)
+        self.helena = self.db.adicionar_livro("Helena", "Machado de Assis", 1876, 15.0)
+        self.iracema = self.db.adicionar_livro("Iracema", "José de Alencar", 1865, 20.0)
+
+    def test_leitura_repetida_vem_do_cache(self):
+        self.assertEqual(self.db.obter_livro_por_id(self.helena)[4], 15.0)
+        self.assertEqual(self.db.obter_livro_por_id(self.helena)[4], 15.0)
+        self.assertEqual((self.cache.acertos, self.cache.falhas), (1, 1))
+
+    def test_escritas_invalidam(self):
+        self.db.obter_livro_por_id(self.helena)
+        self.db.obter_todos_livros()
+        self.db.atualizar_preco_livro(self.helena, 18.0)
+        self.assertEqual(self.db.obter_livro_por_id(self.helena)[4], 18.0)
+        self.assertEqual(self.db.obter_todos_livros()[0][4], 18.0)
+
+        self.db.remover_livro(self.helena)
+        self.assertIsNone(self.db.obter_livro_por_id(self.helena))
+        self.assertEqual([livro[1] for livro in self.db.obter_todos_livros()], ["Iracema"])
+
+        self.db.reajustar_precos(percentual=10)
+        self.assertEqual(self.db.obter_livro_por_id(self.iracema)[4], 22.0)
+
+    def test_novo_livro_invalida_so_as_buscas_do_autor(self):
+        self.assertEqual(len(self.db.buscar_livros_por_autor("machado")), 1)
+        self.assertEqual(len(self.db.buscar_livros_por_autor("alencar")), 1)
+        self.db.adicionar_livro("Dom Casmurro", "Machado de Assis", 1899, 25.0)
+
+        acertos = self.cache.acertos
+        self.assertEqual(len(self.db.buscar_livros_por_autor("alencar")), 1)
+        self.assertEqual(self.cache.acertos, acertos + 1)
+        self.assertEqual(len(self.db.buscar_livros_por_autor("machado")), 2)
+        self.assertEqual(self.cache.acertos, acertos + 1)
+
+    def test_lista_devolvida_nao_altera_o_cache(self):
+        self.db.obter_todos_livros().clear()
+        self.assertEqual(len(self.db.obter_todos_livros()), 2)
+
+    def test_transacao_invalida_ao_final(self):
+        self.db.obter_livro_por_id(self.helena)
+        with self.assertRaises(RuntimeError):
+            with self.db.transacao():
+                self.db.atualizar_preco_livro(self.helena, 99.0)
+                raise RuntimeError("falha")
+        self.assertEqual(self.db.obter_livro_por_id(self.helena)[4], 15.0)
+
+    def test_restauracao_limpa_o_cache(self):
+        with redirect_stdout(io.StringIO()):
+            sistema = SistemaLivraria(str(self.diretorio / "sistema"), cache=CacheLRU())
+        self.addCleanup(sistema.close)
+        db = sistema.db_manager
+        # Backup completo de partida para a restauração
+        sistema.compactar_registro_se_necessario()
+        id_livro = db.adicionar_livro("Helena", "Machado de Assis", 1876, 15.0)
+        seq = db.ultima_alteracao()
+        db.atualizar_preco_livro(id_livro, 30.0)
+        self.assertEqual(db.obter_livro_por_id(id_livro)[4], 30.0)
+
+        with redirect_stdout(io.StringIO()), mock.patch('builtins.input', side_effect=[str(seq), 's']):
+            sistema.restaurar_momento_anterior()
+        self.assertEqual(db.obter_livro_por_id(id_livro)[4], 15.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import io
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+from sistema_livraria import CatalogoCompacto, DatabaseManager, SistemaLivraria
+
+LIVROS = [
+    ("Helena", "Machado de Assis", 1876, 15.10),
+    ("Dom Casmurro", "Machado de Assis", 1899, 25.20),
+    ("Iracema", "José de Alencar", 1865, 20.30),
+    ("O Guarani", "José de Alencar", 1857, 30.00),
+    ("O Cortiço", "Aluísio Azevedo", 1890, 18.90),
+]
+
+
+class TestCatalogoCompacto(unittest.TestCase):
+    def setUp(self):
+        diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, diretorio)
+        self.caminho_db = str(diretorio / "livraria.db")
+        self.db = DatabaseManager(self.caminho_db)
+        self.addCleanup(self.db.close)
+        self.db.adicionar_livros_em_lote(LIVROS)
+        self.catalogo = CatalogoCompacto(self.db)
+
+    def _conferir(self):
+        # A cópia é igual ao banco, inclusive nos índices montados antes das alterações
+        livros = list(self.db.iterar_livros(ordenar_por='id'))
+        self.assertEqual([tuple(livro) for livro in self.catalogo], livros)
+        self.assertEqual(self.catalogo.buscar_por_preco(), sorted(livros, key=lambda livro: (livro[4], livro[0])))
+        for autor in {livro[2] for livro in livros}:
+            self.assertEqual(self.catalogo.buscar_por_autor(autor),
+                             sorted((livro for livro in livros if livro[2] == autor),
+                                    key=lambda livro: (livro[1], livro[0])))
+        self.assertEqual(self.catalogo.seq, self.db.marca_alteracoes()[0])
+
+    def test_consultas(self):
+        self.assertEqual(len(self.catalogo), 5)
+        self.assertEqual(self.catalogo.obter_por_id(3), (3, "Iracema", "José de Alencar", 1865, 20.30))
+        self.assertIsNone(self.catalogo.obter_por_id(99))
+        self.assertEqual([livro.titulo for livro in self.catalogo.buscar_por_autor("jose alen")],
+                         ["Iracema", "O Guarani"])
+        self.assertEqual(self.catalogo.buscar_por_autor("assis alencar"), [])
+        self.assertEqual([livro.id for livro in self.catalogo.buscar_por_preco(18.90, 25.20)], [5, 3, 2])
+        self.assertEqual([livro.id for livro in self.catalogo.buscar_por_preco(preco_min=20, limite=2)], [3, 2])
+        estatisticas = self.catalogo.estatisticas()
+        self.assertEqual((estatisticas['livros'], estatisticas['autores']), (5, 3))
+        self.assertGreater(estatisticas['bytes_indices'], 0)
+        self._conferir()
+
+    def test_atualizar_segue_as_alteracoes(self):
+        self._conferir()
+        self.assertEqual(self.catalogo.atualizar(), 0)
+
+        self.db.adicionar_livro("Senhora", "José de Alencar", 1875, 22.0)
+        self.db.atualizar_preco_livro(1, 40.0)
+        self.assertEqual(self.catalogo.atualizar(), 2)
+        self._conferir()
+
+        # Título e autor trocados, e um livro reinserido no meio das colunas
+        with sqlite3.connect(self.caminho_db) as conn:
+            conn.execute("UPDATE livros SET titulo = 'Dom Casmurro (2ª ed.)', autor = 'Joaquim Maria Machado' "
+                         "WHERE id = 2")
+        conn.close()
+        self.db.remover_livro(3)
+        self.db.remover_livro(4)
+        with sqlite3.connect(self.caminho_db) as conn:
+            conn.execute("INSERT INTO livros (id, titulo, autor, ano_publicacao, preco) "
+                         "VALUES (4, 'Ubirajara', 'José de Alencar', 1874, 12.5)")
+        conn.close()
+        self.assertEqual(self.catalogo.atualizar(), 3)
+        self._conferir()
+        self.assertEqual(self.catalogo.obter_por_id(2).autor, "Joaquim Maria Machado")
+        self.assertIsNone(self.catalogo.obter_por_id(3))
+
+    def test_registro_compactado_rele_tudo(self):
+        self.db.adicionar_livro("Senhora", "José de Alencar", 1875, 22.0)
+        self.db.atualizar_preco_livro(1, 40.0)
+        self.db.compactar_alteracoes(self.db.marca_alteracoes()[0])
+        with mock.patch.object(self.catalogo, 'carregar', wraps=self.catalogo.carregar) as carregar:
+            self.assertEqual(self.catalogo.atualizar(), 6)
+        carregar.assert_called_once_with()
+        self._conferir()
+
+
+class TestCatalogoCompactoRestauracao(unittest.TestCase):
+    def test_restauracao_rele_tudo(self):
+        diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, diretorio)
+        with redirect_stdout(io.StringIO()):
+            sistema = SistemaLivraria(str(diretorio))
+        self.addCleanup(sistema.close)
+        db = sistema.db_manager
+        db.adicionar_livros_em_lote(LIVROS)
+        backup = sistema.compactar_registro_se_necessario()
+        db.atualizar_preco_livro(1, 40.0)
+        catalogo = CatalogoCompacto(db)
+
+        with redirect_stdout(io.StringIO()):
+            sistema.gerenciador_arquivos.restaurar_backup(backup)
+        # A numeração continua depois da restauração, mas a alteração lida pela cópia não existe mais
+        db.atualizar_preco_livro(2, 50.0)
+        self.assertGreater(db.marca_alteracoes()[0], catalogo.seq)
+
+        with mock.patch.object(catalogo, 'carregar', wraps=catalogo.carregar) as carregar:
+            catalogo.atualizar()
+        carregar.assert_called_once_with()
+        self.assertEqual([tuple(livro) for livro in catalogo], list(db.iterar_livros(ordenar_por='id')))
+        self.assertEqual(catalogo.obter_por_id(1).preco, 15.10)
+
+
+if __name__ == '__main__':
+    unittest.main()
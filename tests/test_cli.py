@@ -0,0 +1,79 @@
+import io
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+import livraria
+from sistema_livraria import DatabaseManager
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+class TestComandosLeitura(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.diretorio)
+
+    def _executar(self, *argv) -> tuple:
+        saida, erros = io.StringIO(), io.StringIO()
+        with redirect_stdout(saida), redirect_stderr(erros):
+            codigo = livraria.main(['--diretorio', str(self.diretorio), *argv])
+        return codigo, saida.getvalue(), erros.getvalue()
+
+    def _versao_esquema(self, caminho_db: Path) -> int:
+        conn = sqlite3.connect(caminho_db)
+        try:
+            return conn.execute('PRAGMA user_version').fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_list_nao_migra_nem_cria_diretorios(self):
+        # Banco no esquema original (versão 0), copiado para não alterar o do repositório
+        (self.diretorio / "data").mkdir()
+        caminho_db = self.diretorio / "data" / "livraria.db"
+        shutil.copy(RAIZ / "data" / "livraria.db", caminho_db)
+        versao = self._versao_esquema(caminho_db)
+
+        codigo, saida, _ = self._executar('--formato', 'csv', 'list')
+
+        self.assertEqual(codigo, 0)
+        self.assertTrue(saida.startswith('ID,Título,Autor'))
+        self.assertEqual(self._versao_esquema(caminho_db), versao)
+        self.assertEqual(sorted(p.name for p in self.diretorio.iterdir()), ["data"])
+
+    def test_leitura_sem_banco_nao_cria_arquivo(self):
+        codigo, _, erros = self._executar('get', '1')
+
+        self.assertEqual(codigo, 1)
+        self.assertIn("Erro ao abrir o banco", erros)
+        self.assertEqual(list(self.diretorio.iterdir()), [])
+
+    def test_escrita_cria_diretorios_e_migra(self):
+        codigo, _, _ = self._executar('add', 'Helena', 'Machado de Assis', '1876', '15.0')
+
+        self.assertEqual(codigo, 0)
+        self.assertTrue((self.diretorio / "backups").is_dir())
+        self.assertGreater(self._versao_esquema(self.diretorio / "data" / "livraria.db"), 0)
+
+    def test_saida_interrompida(self):
+        # Como em "livraria.py list | head -1": quem lê fecha o pipe antes do fim
+        (self.diretorio / "data").mkdir()
+        with DatabaseManager(str(self.diretorio / "data" / "livraria.db")) as db:
+            db.adicionar_livros_em_lote([(f"Livro {i}", "Autor", 2000, 10.0) for i in range(20000)])
+        processo = subprocess.Popen([sys.executable, str(RAIZ / "livraria.py"), '--diretorio', str(self.diretorio),
+                                     'list'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        processo.stdout.readline()
+        processo.stdout.close()
+        erros = processo.stderr.read()
+        processo.stderr.close()
+        self.assertEqual(processo.wait(timeout=60), 1)
+        self.assertEqual(erros, b"")
+
+
+if __name__ == '__main__':
+    unittest.main()
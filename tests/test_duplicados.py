@@ -0,0 +1,55 @@
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from sistema_livraria import DatabaseManager
+
+
+class TestChaveNatural(unittest.TestCase):
+    def setUp(self):
+        diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, diretorio)
+        self.caminho_db = str(diretorio / "livraria.db")
+
+    def _abrir(self) -> DatabaseManager:
+        db = DatabaseManager(self.caminho_db)
+        self.addCleanup(db.close)
+        return db
+
+    def test_remover_duplicados(self):
+        DatabaseManager(self.caminho_db).close()
+        with sqlite3.connect(self.caminho_db) as conn:
+            conn.execute('DROP INDEX idx_livros_chave_natural')
+            conn.executemany('INSERT INTO livros (titulo, autor, ano_publicacao, preco) VALUES (?, ?, ?, ?)', [
+                ("Dom Casmurro", "Machado de Assis", 1899, 10.0),
+                ("Helena", "Machado de Assis", 1876, 15.0),
+                (" dom casmurro", "MACHADO DE ASSIS ", 1899, 12.0),
+                ("Dom Casmurro", "Machado de Assis", 1899, 14.0),
+                ("Helena", "Machado de Assis", 1876, 15.0),
+            ])
+        conn.close()
+
+        db = self._abrir()
+        self.assertFalse(db.chave_natural_unica)
+        self.assertEqual(db.remover_duplicados(), 3)
+        self.assertTrue(db.chave_natural_unica)
+        self.assertEqual([livro[:5] for livro in db.iterar_livros(ordenar_por='id')],
+                         [(1, "Dom Casmurro", "Machado de Assis", 1899, 14.0),
+                          (2, "Helena", "Machado de Assis", 1876, 15.0)])
+        self.assertEqual(db.obter_estatisticas()['total_livros'], 2)
+
+    def test_maiusculas_so_ascii(self):
+        # Limitação documentada em CHAVE_NATURAL: lower() do SQLite não converte letras acentuadas
+        db = self._abrir()
+        livros = [("O Tempo e o Vento", "Erico Verissimo", 1949, 50.0),
+                  ("o tempo e o vento ", "ERICO VERISSIMO", 1949, 50.0),
+                  ("Olhai os Lírios do Campo", "Érico Veríssimo", 1938, 40.0),
+                  ("Olhai os Lírios do Campo", "érico veríssimo", 1938, 40.0)]
+        inseridos, erros = db.adicionar_livros_em_lote(livros, se_existir='pular')
+        self.assertEqual((inseridos, erros), (3, []))
+
+
+if __name__ == '__main__':
+    unittest.main()
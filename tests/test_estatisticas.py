@@ -0,0 +1,101 @@
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from sistema_livraria import DatabaseManager
+
+LIVROS = [
+    ("Helena", "Machado de Assis", 1876, 15.10),
+    ("Dom Casmurro", "Machado de Assis", 1899, 25.20),
+    ("Iracema", "José de Alencar", 1865, 20.30),
+    ("O Guarani", "José de Alencar", 1857, 30.00),
+    ("O Cortiço", "Aluísio Azevedo", 1890, 18.90),
+]
+
+
+class TestEstatisticasDoCatalogo(unittest.TestCase):
+    def setUp(self):
+        diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, diretorio)
+        self.caminho_db = str(diretorio / "livraria.db")
+        self.db = DatabaseManager(self.caminho_db)
+        self.addCleanup(self.db.close)
+
+    def _conferir_resumos(self):
+        # As tabelas de resumo são iguais a agregar a tabela livros do zero
+        with sqlite3.connect(self.caminho_db) as conn:
+            por_autor = conn.execute('''
+                SELECT autor, COUNT(*), SUM(CAST(ROUND(preco * 100) AS INTEGER)) FROM livros GROUP BY autor
+            ''').fetchall()
+            por_decada = conn.execute('''
+                SELECT ano_publicacao / 10 * 10, COUNT(*), SUM(CAST(ROUND(preco * 100) AS INTEGER))
+                FROM livros GROUP BY 1
+            ''').fetchall()
+            self.assertEqual(conn.execute('SELECT * FROM estatisticas_autor ORDER BY autor').fetchall(), por_autor)
+            self.assertEqual(conn.execute('SELECT * FROM estatisticas_decada ORDER BY decada').fetchall(),
+                             por_decada)
+        conn.close()
+
+    def test_resumos_acompanham_as_escritas(self):
+        self.db.adicionar_livros_em_lote(LIVROS)
+        self._conferir_resumos()
+
+        self.db.atualizar_preco_livro(1, 16.05)
+        self.db.reajustar_precos(percentual=10, autor_exato="José de Alencar")
+        self.db.aplicar_lista_precos([(5, 19.99)])
+        self._conferir_resumos()
+
+        # Mudanças de autor e de ano movem o livro entre grupos
+        with sqlite3.connect(self.caminho_db) as conn:
+            conn.execute("UPDATE livros SET autor = 'Aluísio Azevedo', preco = 40.0 WHERE id = 2")
+            conn.execute("UPDATE livros SET ano_publicacao = 1901 WHERE id = 4")
+        conn.close()
+        self._conferir_resumos()
+
+        # O último livro de um grupo remove a linha do grupo
+        self.db.remover_livro(1)
+        self._conferir_resumos()
+        with sqlite3.connect(self.caminho_db) as conn:
+            self.assertIsNone(conn.execute(
+                "SELECT 1 FROM estatisticas_autor WHERE autor = 'Machado de Assis'").fetchone())
+        conn.close()
+
+    def test_painel(self):
+        self.assertEqual(self.db.obter_estatisticas()['total_livros'], 0)
+        self.assertIsNone(self.db.obter_estatisticas()['preco_medio'])
+
+        self.db.adicionar_livros_em_lote(LIVROS)
+        painel = self.db.obter_estatisticas(limite_autores=2)
+        self.assertEqual(painel['total_livros'], 5)
+        self.assertEqual(painel['total_autores'], 3)
+        # Somas em centavos: sem erro de arredondamento acumulado
+        self.assertEqual(painel['valor_total'], 109.5)
+        self.assertAlmostEqual(painel['preco_medio'], 21.9)
+        self.assertEqual((painel['preco_minimo'], painel['preco_maximo']), (15.10, 30.00))
+        self.assertEqual((painel['ano_mais_antigo'], painel['ano_mais_recente']), (1857, 1899))
+        self.assertEqual([(autor, quantidade) for autor, quantidade, _ in painel['autores']],
+                         [("José de Alencar", 2), ("Machado de Assis", 2)])
+        self.assertAlmostEqual(painel['autores'][0][2], 25.15)
+        self.assertEqual([(decada, quantidade) for decada, quantidade, _ in painel['decadas']],
+                         [(1850, 1), (1860, 1), (1870, 1), (1890, 2)])
+
+    def test_banco_existente_e_resumido_na_migracao(self):
+        self.db.adicionar_livros_em_lote(LIVROS)
+        with sqlite3.connect(self.caminho_db) as conn:
+            for trigger in ('estatisticas_insert', 'estatisticas_delete', 'estatisticas_update_preco',
+                            'estatisticas_update'):
+                conn.execute(f'DROP TRIGGER {trigger}')
+            conn.execute('DROP TABLE estatisticas_autor')
+            conn.execute('DROP TABLE estatisticas_decada')
+            conn.execute('PRAGMA user_version = 6')
+        conn.close()
+
+        with DatabaseManager(self.caminho_db) as db:
+            self.assertEqual(db.obter_estatisticas()['total_livros'], 5)
+        self._conferir_resumos()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import csv
+import gzip
+import io
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from sistema_livraria import SistemaLivraria
+
+LIVROS = [
+    ("Helena", "Machado de Assis", 1876, 15.0),
+    ("Dom Casmurro", "Machado de Assis", 1899, 25.0),
+    ("Iracema", "José de Alencar", 1865, 20.0),
+    ("O Guarani", "José de Alencar", 1857, 30.0),
+    ("O Cortiço", "Aluísio Azevedo", 1890, 18.0),
+]
+
+
+class TestExportacaoEmFluxo(unittest.TestCase):
+    def setUp(self):
+        diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, diretorio)
+        with redirect_stdout(io.StringIO()):
+            self.sistema = SistemaLivraria(str(diretorio))
+        self.addCleanup(self.sistema.close)
+        self.db = self.sistema.db_manager
+        self.arquivos = self.sistema.gerenciador_arquivos
+        self.db.adicionar_livros_em_lote(LIVROS)
+
+    def _ler_csv(self, caminho: str) -> list:
+        abrir = gzip.open if caminho.endswith('.gz') else open
+        with abrir(caminho, 'rt', newline='', encoding='utf-8') as arquivo:
+            return list(csv.reader(arquivo))
+
+    def test_exporta_todos_os_livros_em_lotes(self):
+        caminho, total = self.arquivos.exportar_csv_em_fluxo(self.db.iterar_livros(tamanho_lote=2), "todos.csv")
+        linhas = self._ler_csv(caminho)
+        self.assertEqual(total, 5)
+        self.assertEqual(linhas[0], ['ID', 'Título', 'Autor', 'Ano de Publicação', 'Preço'])
+        self.assertEqual([linha[1] for linha in linhas[1:]], sorted(livro[0] for livro in LIVROS))
+
+    def test_filtros_e_colunas(self):
+        colunas = ['titulo', 'preco']
+        livros = self.db.iterar_livros(colunas, autor="Alencar", ano_min=1860, preco_max=25.0)
+        caminho, total = self.arquivos.exportar_csv_em_fluxo(livros, "filtrados.csv", colunas)
+        self.assertEqual(total, 1)
+        self.assertEqual(self._ler_csv(caminho), [['Título', 'Preço'], ['Iracema', '20.0']])
+
+        livros = self.db.iterar_livros(['titulo'], ano_max=1880, preco_min=16.0, ordenar_por='ano_publicacao')
+        self.assertEqual(list(livros), [("O Guarani",), ("Iracema",)])
+
+    def test_colunas_invalidas(self):
+        with self.assertRaises(ValueError):
+            next(self.db.iterar_livros(['titulo', 'isbn']))
+        with self.assertRaises(ValueError):
+            next(self.db.iterar_livros(ordenar_por='isbn'))
+
+    def test_compactar(self):
+        caminho, total = self.arquivos.exportar_csv_em_fluxo(self.db.iterar_livros(), "livros.csv", compactar=True)
+        self.assertTrue(caminho.endswith("livros.csv.gz"))
+        self.assertEqual(total, 5)
+        self.assertEqual(len(self._ler_csv(caminho)), 6)
+
+        # O arquivo compactado é lido de volta pela importação
+        lotes = list(self.arquivos.iterar_lotes("livros.csv.gz"))
+        self.assertEqual(sorted(lotes[0]['titulo']), sorted(livro[0] for livro in LIVROS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import io
+import shutil
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+import livraria_federada
+from livraria_federada import LivrariaFederada, _ler_a_frente
+from sistema_livraria import SistemaLivraria
+
+
+class TestLivrariaFederada(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.diretorio)
+
+    def _abrir(self, tamanho_pool: int = 2) -> LivrariaFederada:
+        with redirect_stdout(io.StringIO()):
+            federada = LivrariaFederada({'centro': str(self.diretorio / "centro"),
+                                         'norte': str(self.diretorio / "norte")}, tamanho_pool)
+        self.addCleanup(federada.close)
+        return federada
+
+    def test_paginacao_com_chaves_iguais_entre_lojas(self):
+        federada = self._abrir()
+        # As duas lojas têm os mesmos livros: cada (valor, id) aparece nas duas
+        livros = [(f"Livro {i % 4}", f"Autor {i}", 1900 + i, float(10 + i % 3)) for i in range(11)]
+        for sistema in federada.lojas.values():
+            sistema.db_manager.adicionar_livros_em_lote(livros)
+
+        for ordenar_por in ('titulo', 'preco', 'id'):
+            esperado = sorted(federada.iterar_livros(ordenar_por),
+                              key=lambda livro: federada.chave_listagem(livro, ordenar_por))
+            for limite in (1, 3, 4):
+                with self.subTest(ordenar_por=ordenar_por, limite=limite):
+                    vistos, chave = [], None
+                    while True:
+                        pagina = federada.listar_livros(chave, limite, ordenar_por)
+                        if not pagina:
+                            break
+                        vistos += pagina
+                        chave = federada.chave_listagem(pagina[-1], ordenar_por)
+                    self.assertEqual(vistos, esperado)
+                    self.assertEqual(len(vistos), 22)
+
+        with self.assertRaises(ValueError):
+            federada.listar_livros(ordenar_por='isbn')
+
+    def test_ler_a_frente_para_quando_quem_le_para(self):
+        fechado = threading.Event()
+
+        def livros():
+            try:
+                for i in range(1000):
+                    yield (i,)
+            finally:
+                fechado.set()
+
+        leitura = _ler_a_frente(livros(), tamanho_lote=2, lotes=1)
+        self.assertEqual([next(leitura) for _ in range(3)], [(0,), (1,), (2,)])
+        leitura.close()
+        self.assertTrue(fechado.is_set())
+        self.assertFalse(any(thread.name == "livraria-loja-leitura" for thread in threading.enumerate()))
+
+    def test_iterar_livros_interrompido_devolve_as_conexoes(self):
+        federada = self._abrir(tamanho_pool=1)
+        for loja, sistema in federada.lojas.items():
+            sistema.db_manager.adicionar_livros_em_lote([(f"Livro {i}", loja, 2000, 10.0) for i in range(30)])
+
+        with mock.patch.object(livraria_federada._ler_a_frente, '__defaults__', (2, 1)):
+            livros = federada.iterar_livros('titulo')
+            primeiros = [next(livros) for _ in range(5)]
+            self.assertEqual([livro[1] for livro in primeiros],
+                             ["Livro 0", "Livro 0", "Livro 1", "Livro 1", "Livro 10"])
+            self.assertTrue(any(thread.name == "livraria-loja-leitura" for thread in threading.enumerate()))
+            livros.close()
+        self.assertFalse(any(thread.name == "livraria-loja-leitura" for thread in threading.enumerate()))
+
+        # Com uma conexão por loja, as escritas só passam se a leitura a devolveu
+        for loja in federada.lojas:
+            federada.adicionar_livro(loja, "Livro novo", loja, 2001, 12.0)
+        self.assertEqual(federada.contar_por_loja(), {'centro': 31, 'norte': 31})
+
+    def test_estatisticas_somam_as_lojas(self):
+        federada = self._abrir()
+        self.assertEqual(federada.obter_estatisticas()['total_livros'], 0)
+        self.assertIsNone(federada.obter_estatisticas()['preco_medio'])
+
+        federada.lojas['centro'].db_manager.adicionar_livros_em_lote([
+            ("Helena", "Machado de Assis", 1876, 15.10),
+            ("Dom Casmurro", "Machado de Assis", 1899, 25.20),
+            ("Iracema", "José de Alencar", 1865, 20.30),
+        ])
+        federada.lojas['norte'].db_manager.adicionar_livros_em_lote([
+            ("Quincas Borba", "Machado de Assis", 1891, 30.00),
+            ("O Cortiço", "Aluísio Azevedo", 1890, 18.90),
+        ])
+        painel = federada.obter_estatisticas(limite_autores=2)
+        self.assertEqual(painel['total_livros'], 5)
+        self.assertEqual(painel['total_autores'], 3)
+        self.assertEqual(painel['valor_total'], 109.5)
+        self.assertAlmostEqual(painel['preco_medio'], 21.9)
+        self.assertEqual((painel['preco_minimo'], painel['preco_maximo']), (15.10, 30.00))
+        self.assertEqual((painel['ano_mais_antigo'], painel['ano_mais_recente']), (1865, 1899))
+        # Machado de Assis está nas duas lojas e conta uma vez, com a média dos três livros
+        self.assertEqual([(autor, quantidade) for autor, quantidade, _ in painel['autores']],
+                         [("Machado de Assis", 3), ("Aluísio Azevedo", 1)])
+        self.assertAlmostEqual(painel['autores'][0][2], 23.4333333, places=5)
+        self.assertEqual([(decada, quantidade) for decada, quantidade, _ in painel['decadas']],
+                         [(1860, 1), (1870, 1), (1890, 3)])
+        self.assertAlmostEqual(painel['decadas'][2][2], 24.7)
+        self.assertEqual(painel['lojas'], {'centro': 3, 'norte': 2})
+
+    def test_escritas_registram_o_backup_sem_escrever_na_tela(self):
+        federada = self._abrir()
+        saida = io.StringIO()
+        with redirect_stdout(saida):
+            id_livro = federada.adicionar_livro('norte', "Helena", "Machado de Assis", 1876, 15.0)
+            self.assertEqual(federada.reajustar_precos(percentual=10), {'centro': 0, 'norte': 1})
+        self.assertEqual(saida.getvalue(), "")
+        self.assertEqual([loja for loja, _ in federada.backups_automaticos], ['norte', 'centro'])
+        self.assertEqual(federada.obter_livro('norte', id_livro)[4], 16.5)
+
+        # Uma falha no backup não impede a escrita
+        with mock.patch.object(SistemaLivraria, 'compactar_registro_se_necessario', side_effect=OSError("disco cheio")):
+            self.assertTrue(federada.atualizar_preco_livro('norte', id_livro, 20.0))
+        self.assertEqual([(loja, str(erro)) for loja, erro in federada.falhas_backup], [('norte', "disco cheio")])
+
+        with self.assertRaises(ValueError):
+            federada.reajustar_precos(percentual=10, lojas=['norte', 'sul'])
+        self.assertEqual(federada.obter_livro('norte', id_livro)[4], 20.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
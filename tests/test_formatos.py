@@ -0,0 +1,99 @@
+import importlib.util
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from sistema_livraria import SistemaLivraria, formato_do_arquivo
+
+TEM_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+LIVROS = [
+    ("Helena", "Machado de Assis", 1876, 15.1),
+    ("Memórias Póstumas de Brás Cubas", "Machado de Assis", 1881, 28.0),
+    ("Iracema, \"lenda do Ceará\"", "José de Alencar", 1865, 20.3),
+    ("O Cortiço", "Aluísio Azevedo", 1890, 18.9),
+]
+
+
+class TestFormatosDeArquivo(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.diretorio)
+        self.origem = self._abrir("origem")
+        self.origem.db_manager.adicionar_livros_em_lote(LIVROS)
+
+    def _abrir(self, nome: str) -> SistemaLivraria:
+        with redirect_stdout(io.StringIO()):
+            sistema = SistemaLivraria(str(self.diretorio / nome))
+        self.addCleanup(sistema.close)
+        return sistema
+
+    @staticmethod
+    def _livros(sistema: SistemaLivraria) -> list:
+        return sorted(livro[1:] for livro in sistema.db_manager.iterar_livros())
+
+    def _ida_e_volta(self, nome_arquivo: str, compactar: bool = False):
+        caminho, total = self.origem.gerenciador_arquivos.exportar_em_fluxo(
+            self.origem.db_manager.iterar_livros(), nome_arquivo, compactar=compactar)
+        self.assertEqual(total, len(LIVROS))
+
+        destino = self._abrir(f"destino_{Path(caminho).name}")
+        resultado = destino.importar_arquivo_em_fluxo(caminho, tamanho_lote=3)
+        self.assertEqual((resultado['importados'], resultado['erros']), (len(LIVROS), 0))
+        self.assertEqual(self._livros(destino), self._livros(self.origem))
+        return caminho
+
+    def test_csv(self):
+        self._ida_e_volta("livros.csv")
+
+    def test_ndjson(self):
+        caminho = self._ida_e_volta("livros.ndjson")
+        with open(caminho, encoding='utf-8') as arquivo:
+            primeiro = json.loads(arquivo.readline())
+        self.assertEqual(set(primeiro), {'id', 'titulo', 'autor', 'ano_publicacao', 'preco'})
+
+    def test_ndjson_compactado(self):
+        self.assertTrue(self._ida_e_volta("livros.ndjson", compactar=True).endswith(".ndjson.gz"))
+
+    @unittest.skipUnless(TEM_PYARROW, "pyarrow não instalado")
+    def test_parquet(self):
+        self._ida_e_volta("livros.parquet")
+        self._ida_e_volta("livros_zstd.parquet", compactar=True)
+
+    @unittest.skipUnless(TEM_PYARROW, "pyarrow não instalado")
+    def test_arrow(self):
+        self._ida_e_volta("livros.arrow")
+
+    @unittest.skipIf(TEM_PYARROW, "pyarrow instalado")
+    def test_formatos_colunares_sem_pyarrow(self):
+        with self.assertRaisesRegex(ImportError, "pip install pyarrow"):
+            self.origem.gerenciador_arquivos.exportar_em_fluxo(self.origem.db_manager.iterar_livros(),
+                                                               "livros.parquet")
+
+    def test_ndjson_com_campo_faltando(self):
+        caminho = self.diretorio / "incompleto.ndjson"
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(json.dumps({'titulo': "Helena", 'autor': "Machado de Assis",
+                                      'ano_publicacao': 1876, 'preco': 15.0}) + "\n")
+            arquivo.write(json.dumps({'titulo': "Iracema", 'autor': "José de Alencar", 'preco': 20.0}) + "\n")
+        destino = self._abrir("destino")
+        erros = []
+        resultado = destino.importar_arquivo_em_fluxo(str(caminho), ao_erro=lambda linha, erro: erros.append(linha))
+        self.assertEqual((resultado['importados'], resultado['erros']), (1, 1))
+        self.assertEqual(erros, [2])
+
+    def test_formato_pela_extensao(self):
+        self.assertEqual(formato_do_arquivo("a.csv"), 'csv')
+        self.assertEqual(formato_do_arquivo("a.ndjson.gz"), 'ndjson')
+        self.assertEqual(formato_do_arquivo("a.parquet"), 'parquet')
+        self.assertEqual(formato_do_arquivo("a.arrow"), 'arrow')
+        with self.assertRaises(ValueError):
+            formato_do_arquivo("a.xlsx")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import base64
+import http.client
+import io
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+
+from livraria_http import ServidorLivraria
+
+
+class TestETag(unittest.TestCase):
+    def setUp(self):
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, diretorio)
+        self.servidor = ServidorLivraria(('127.0.0.1', 0), diretorio, leitores=2, registrar_acessos=False)
+        thread = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.servidor.server_close)
+        self.addCleanup(self.servidor.shutdown)
+
+    def _get(self, caminho: str, etag: str = None):
+        conexao = http.client.HTTPConnection(*self.servidor.server_address)
+        conexao.request('GET', caminho, headers={'If-None-Match': etag} if etag else {})
+        resposta = conexao.getresponse()
+        resposta.read()
+        conexao.close()
+        return resposta.status, resposta.getheader('ETag')
+
+    def test_etag_muda_depois_de_restauracao(self):
+        sistema = self.servidor.sistema
+        db = sistema.db_manager
+        db.adicionar_livro("Livro A", "Autor", 2000, 99.0)
+        with redirect_stdout(io.StringIO()):
+            sistema.gerenciador_arquivos.criar_backup()
+        db.adicionar_livro("Livro B", "Autor", 2000, 10.0)
+        db.atualizar_preco_livro(1, 10.0)
+
+        status, etag = self._get('/livros')
+        self.assertEqual(status, 200)
+        self.assertEqual(self._get('/livros', etag)[0], 304)
+
+        # Volta à alteração 2: mesmo número da última alteração antes, dados diferentes
+        with redirect_stdout(io.StringIO()):
+            sistema.gerenciador_arquivos.restaurar_ate_alteracao(2, db.obter_alteracoes())
+        status, nova = self._get('/livros', etag)
+        self.assertEqual(status, 200)
+        self.assertNotEqual(nova, etag)
+
+        # Uma segunda restauração também muda a versão
+        with redirect_stdout(io.StringIO()):
+            sistema.gerenciador_arquivos.restaurar_ate_alteracao(1, db.obter_alteracoes())
+        self.assertEqual(self._get('/livros', nova)[0], 200)
+
+    def test_etag_diferente_para_cada_url(self):
+        self.servidor.sistema.db_manager.adicionar_livro("Livro A", "Autor", 2000, 10.0)
+        _, etag = self._get('/livros')
+        self.assertEqual(self._get('/livros/', etag)[0], 304)
+        self.assertEqual(self._get('/livros?limite=5&ordenar_por=preco')[1],
+                         self._get('/livros?ordenar_por=preco&limite=5')[1])
+        for outra in ('/livros?limite=5', '/livros/1', '/estatisticas', '/busca?q=livro'):
+            status, etag_outra = self._get(outra, etag)
+            self.assertEqual(status, 200, outra)
+            self.assertNotEqual(etag_outra, etag)
+
+
+class TestCursorPaginacao(TestETag):
+    def _get_json(self, caminho: str):
+        conexao = http.client.HTTPConnection(*self.servidor.server_address)
+        conexao.request('GET', caminho)
+        resposta = conexao.getresponse()
+        dados = json.loads(resposta.read())
+        conexao.close()
+        return resposta.status, dados
+
+    def test_cursor_valido(self):
+        self.servidor.sistema.db_manager.adicionar_livros_em_lote([(f"Livro {i}", "Autor", 2000, 10.0)
+                                                                  for i in range(5)])
+        status, pagina = self._get_json('/livros?limite=3')
+        self.assertEqual(status, 200)
+        status, seguinte = self._get_json(f"/livros?limite=3&apos={pagina['proxima']}")
+        self.assertEqual(status, 200)
+        self.assertEqual([livro['titulo'] for livro in seguinte['livros']], ["Livro 3", "Livro 4"])
+
+    def test_cursor_com_formato_errado(self):
+        for valor in ([1], {"a": 1}, [1, 2, 3], "x", ["Livro", "1"], [True, 1], [None, 1], [["x"], 1]):
+            cursor = base64.urlsafe_b64encode(json.dumps(valor).encode('utf-8')).decode('ascii')
+            with self.subTest(valor=valor):
+                status, dados = self._get_json(f'/livros?apos={cursor}')
+                self.assertEqual(status, 400)
+                self.assertEqual(dados['erro'], "Cursor de paginação inválido")
+        for cursor in ('nao-e-base64!', base64.urlsafe_b64encode(b'{').decode('ascii')):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self._get_json(f'/livros?apos={cursor}')[0], 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import csv
+import io
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from sistema_livraria import SistemaLivraria
+
+
+class TestImportacaoCSV(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.diretorio)
+        with redirect_stdout(io.StringIO()):
+            self.sistema = SistemaLivraria(str(self.diretorio))
+        self.addCleanup(self.sistema.close)
+
+    def _gravar_csv(self, nome: str, livros):
+        with open(self.diretorio / "exports" / nome, 'w', newline='', encoding='utf-8') as arquivo:
+            escritor = csv.writer(arquivo)
+            escritor.writerow(['Título', 'Autor', 'Ano de Publicação', 'Preço'])
+            escritor.writerows(livros)
+
+    def test_dividir_csv(self):
+        self._gravar_csv("simples.csv", [(f'Livro "{i}"', "Autor", 2000, "10,00") for i in range(100)])
+        caminho, _, trechos = self.sistema.gerenciador_arquivos.dividir_csv("simples.csv", tamanho_trecho=500)
+        self.assertGreater(len(trechos), 1)
+        self.assertEqual(trechos[-1][1], Path(caminho).stat().st_size)
+        self.assertTrue(all(fim == inicio for (_, fim), (inicio, _) in zip(trechos, trechos[1:])))
+
+    def test_campo_com_quebra_de_linha_importa_em_sequencia(self):
+        livros = [(f"Livro {i}", "Autor", 2000, "10,00") for i in range(50)]
+        livros[20] = ("Primeira linha\nsegunda linha", "Autor", 2000, "10,00")
+        self._gravar_csv("quebras.csv", livros)
+        self.assertIsNone(self.sistema.gerenciador_arquivos.dividir_csv("quebras.csv")[2])
+
+        resultado = self.sistema.importar_csv_em_fluxo("quebras.csv", retomar=False, processos=2)
+        self.assertEqual((resultado['importados'], resultado['erros']), (50, 0))
+        self.assertEqual(self.sistema.db_manager.obter_livro_por_id(21)[1], "Primeira linha\nsegunda linha")
+
+
+class TestImportacaoEmFluxo(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.diretorio)
+        with redirect_stdout(io.StringIO()):
+            self.sistema = SistemaLivraria(str(self.diretorio))
+        self.addCleanup(self.sistema.close)
+        livros = [(f"Livro {i}", "Autor", 2000, "10,00") for i in range(1, 26)]
+        livros[6] = ("Livro 7", "Autor", "ano", "10,00")
+        with open(self.diretorio / "exports" / "livros.csv", 'w', newline='', encoding='utf-8') as arquivo:
+            escritor = csv.writer(arquivo)
+            escritor.writerow(['Título', 'Autor', 'Ano de Publicação', 'Preço'])
+            escritor.writerows(livros)
+
+    def test_iterar_csv_retoma_por_offset_e_linha(self):
+        arquivos = self.sistema.gerenciador_arquivos
+        linhas = list(arquivos.iterar_csv("livros.csv"))
+        self.assertEqual([linha for linha, _, _ in linhas], list(range(1, 26)))
+
+        linha, offset, _ = linhas[9]
+        retomadas = list(arquivos.iterar_csv("livros.csv", offset, linha))
+        self.assertEqual(retomadas, linhas[10:])
+        # Sem offset, as primeiras "linha" linhas são puladas
+        self.assertEqual(list(arquivos.iterar_csv("livros.csv", 0, linha)), linhas[10:])
+
+    def test_importacao_interrompida_e_retomada(self):
+        class Interrupcao(Exception):
+            pass
+
+        def interromper(estado):
+            if estado['linha'] >= 10:
+                raise Interrupcao()
+
+        erros = []
+        with self.assertRaises(Interrupcao):
+            self.sistema.importar_csv_em_fluxo("livros.csv", tamanho_lote=10, progresso=interromper,
+                                               ao_erro=lambda linha, erro: erros.append(linha))
+        ponto = self.sistema.gerenciador_arquivos.ler_progresso_importacao("livros.csv")
+        self.assertEqual((ponto['linha'], ponto['importados'], ponto['erros']), (10, 9, 1))
+
+        resultado = self.sistema.importar_csv_em_fluxo("livros.csv", tamanho_lote=10,
+                                                       ao_erro=lambda linha, erro: erros.append(linha))
+        self.assertEqual((resultado['linha'], resultado['importados'], resultado['erros']), (25, 24, 1))
+        self.assertEqual(erros, [7])
+        self.assertEqual(self.sistema.db_manager.contar_livros(), 24)
+        self.assertIsNone(self.sistema.gerenciador_arquivos.ler_progresso_importacao("livros.csv"))
+
+    def test_importacao_sem_retomar_recomeca(self):
+        self.sistema.gerenciador_arquivos.salvar_progresso_importacao(
+            "livros.csv", {'offset': 10 ** 6, 'linha': 25, 'importados': 0, 'existentes': 0, 'erros': 0})
+        resultado = self.sistema.importar_csv_em_fluxo("livros.csv", retomar=False)
+        self.assertEqual(resultado['importados'], 24)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from sistema_livraria import DatabaseManager, TRIGGERS_CARGA_EM_MASSA
+
+
+class TestCargaEmMassa(unittest.TestCase):
+    def setUp(self):
+        diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, diretorio)
+        self.caminho_db = str(diretorio / "livraria.db")
+        self.db = DatabaseManager(self.caminho_db)
+        self.addCleanup(self.db.close)
+
+    def _conferir_consistencia(self):
+        with sqlite3.connect(self.caminho_db) as conn:
+            conn.execute("INSERT INTO livros_fts (livros_fts, rank) VALUES ('integrity-check', 1)")
+            por_autor = conn.execute('''
+                SELECT autor, COUNT(*), SUM(CAST(ROUND(preco * 100) AS INTEGER)) FROM livros GROUP BY autor
+            ''').fetchall()
+            self.assertEqual(conn.execute('SELECT * FROM estatisticas_autor ORDER BY autor').fetchall(), por_autor)
+            por_decada = conn.execute('''
+                SELECT ano_publicacao / 10 * 10, COUNT(*), SUM(CAST(ROUND(preco * 100) AS INTEGER))
+                FROM livros GROUP BY 1
+            ''').fetchall()
+            self.assertEqual(conn.execute('SELECT * FROM estatisticas_decada ORDER BY decada').fetchall(), por_decada)
+            triggers = {nome for nome, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+            self.assertTrue(set(TRIGGERS_CARGA_EM_MASSA) <= triggers)
+
+    def test_lote_grande_atualiza_busca_estatisticas_e_registro(self):
+        self.db.adicionar_livro("Livro avulso", "Autor 0", 1999, 5.0)
+        livros = [(f"Livro {i}", f"Autor {i % 7}", 1950 + i % 60, 10.0 + i % 30) for i in range(1000)]
+        inseridos, erros = self.db.adicionar_livros_em_lote(livros, batch_size=500)
+        self.assertEqual((inseridos, erros), (1000, []))
+        self._conferir_consistencia()
+        self.assertEqual(len(self.db.buscar_livros_por_autor("Autor 3")), 143)
+        self.assertEqual([livro[0] for livro in self.db.buscar_livros("Livro 999")], [1001])
+
+        alteracoes = self.db.obter_alteracoes()
+        self.assertEqual([a['id'] for a in alteracoes], list(range(1, 1002)))
+        self.assertEqual(alteracoes[-1]['depois']['titulo'], "Livro 999")
+
+    def test_lote_com_livro_invalido_insere_os_demais(self):
+        # A falha desfaz a inserção em massa do lote; os livros entram um a um, com os triggers
+        livros = [(f"Livro {i}", "Autor", 2000, 10.0) for i in range(300)]
+        livros[150] = ("Livro 149", "Autor", 2000, 12.0)
+        inseridos, erros = self.db.adicionar_livros_em_lote(livros, batch_size=300)
+        self.assertEqual(inseridos, 299)
+        self.assertEqual([indice for indice, _ in erros], [150])
+        self._conferir_consistencia()
+        self.assertEqual(len(self.db.obter_alteracoes()), 299)
+
+    def test_lote_atualizando_precos(self):
+        livros = [(f"Livro {i}", "Autor", 2000, 10.0) for i in range(300)]
+        self.db.adicionar_livros_em_lote(livros, se_existir='pular')
+        livros = [(f"Livro {i}", "Autor", 2000, 20.0) for i in range(150, 450)]
+        inseridos, erros = self.db.adicionar_livros_em_lote(livros, se_existir='atualizar_preco')
+        self.assertEqual((inseridos, erros), (150, []))
+        self._conferir_consistencia()
+        operacoes = [a['operacao'] for a in self.db.obter_alteracoes()[300:]]
+        self.assertEqual(operacoes, ['UPDATE'] * 150 + ['INSERT'] * 150)
+
+
+if __name__ == '__main__':
+    unittest.main()
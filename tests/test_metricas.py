@@ -0,0 +1,139 @@
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from sistema_livraria import DatabaseManager, Metricas, SistemaLivraria
+
+LIVROS = [
+    ("Helena", "Machado de Assis", 1876, 15.0),
+    ("Dom Casmurro", "Machado de Assis", 1899, 25.0),
+    ("Iracema", "José de Alencar", 1865, 20.0),
+]
+
+
+class TestMetricas(unittest.TestCase):
+    def test_histograma_e_sql_normalizado(self):
+        metricas = Metricas()
+        for segundos in (0.001, 0.002, 0.003):
+            metricas.registrar('livros.buscar', segundos, linhas=2)
+        metricas.registrar_sql("SELECT * FROM livros WHERE id = 1", 0.01)
+        metricas.registrar_sql("SELECT *  FROM livros\n WHERE id = 42", 0.02)
+        metricas.somar('backup.bytes_copiados', 100)
+        metricas.somar('backup.bytes_copiados', 50)
+
+        estatisticas = metricas.estatisticas()
+        resumo = estatisticas['operacoes']['livros.buscar']
+        self.assertEqual((resumo['contagem'], resumo['linhas']), (3, 6))
+        self.assertLessEqual(resumo['p50_ms'], resumo['p99_ms'])
+        # Literais viram "?": os dois comandos são o mesmo
+        self.assertEqual([(sql['comando'], sql['contagem']) for sql in estatisticas['sql']],
+                         [("SELECT * FROM livros WHERE id = ?", 2)])
+        self.assertEqual(estatisticas['contadores'], {'backup.bytes_copiados': 150})
+
+        metricas.limpar()
+        self.assertEqual(metricas.estatisticas()['operacoes'], {})
+
+    def test_limite_de_comandos_sql(self):
+        metricas = Metricas(max_comandos_sql=2)
+        for tabela in ('a', 'b', 'c', 'd'):
+            metricas.registrar_sql(f"SELECT * FROM {tabela}", 0.001)
+        self.assertEqual(len(metricas.comandos_sql), 3)
+        self.assertEqual(metricas.comandos_sql['(outros comandos)'].contagem, 2)
+
+
+class TestMetricasDatabaseManager(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.diretorio)
+
+    def _abrir(self, metricas=None, tamanho_pool: int = 1) -> DatabaseManager:
+        db = DatabaseManager(str(self.diretorio / "livraria.db"), tamanho_pool, metricas=metricas)
+        self.addCleanup(db.close)
+        return db
+
+    def test_operacoes_e_sql_medidos(self):
+        for tamanho_pool in (1, 0):
+            with self.subTest(tamanho_pool=tamanho_pool):
+                metricas = Metricas()
+                db = self._abrir(metricas, tamanho_pool)
+                db.adicionar_livros_em_lote(LIVROS)
+                self.assertEqual(len(db.buscar_livros_por_autor("machado")), 2)
+                self.assertFalse(db.atualizar_preco_livro(999, 10.0))
+                with self.assertRaises(ValueError):
+                    db.listar_livros(ordenar_por='isbn')
+
+                operacoes = metricas.estatisticas()['operacoes']
+                self.assertEqual(operacoes['livros.adicionar_em_lote']['linhas'], 3)
+                self.assertEqual(operacoes['livros.buscar_por_autor']['linhas'], 2)
+                self.assertEqual(operacoes['livros.atualizar_preco']['linhas'], 0)
+                self.assertEqual(operacoes['livros.listar.erro']['contagem'], 1)
+                comandos = [sql['comando'] for sql in metricas.estatisticas(limite_sql=200)['sql']]
+                self.assertTrue(any(comando.startswith("UPDATE livros") for comando in comandos))
+                db.close()
+                (self.diretorio / "livraria.db").unlink()
+
+    def test_sem_metricas_nao_ha_rastreador(self):
+        db = self._abrir()
+        db.adicionar_livros_em_lote(LIVROS)
+        db.buscar_livros_por_autor("machado")
+        self.assertEqual(db._rastreadores, {})
+
+    def test_desligar_remove_o_rastreador(self):
+        metricas = Metricas()
+        db = self._abrir(metricas)
+        db.adicionar_livro(*LIVROS[0])
+        self.assertEqual(len(db._rastreadores), 1)
+
+        db.metricas = None
+        db.obter_livro_por_id(1)
+        self.assertEqual(db._rastreadores, {})
+        contagem = metricas.estatisticas()['operacoes']['livros.adicionar']['contagem']
+        db.adicionar_livro(*LIVROS[1])
+        self.assertEqual(metricas.estatisticas()['operacoes']['livros.adicionar']['contagem'], contagem)
+
+    def test_sem_rastrear_sql(self):
+        metricas = Metricas(rastrear_sql=False)
+        db = self._abrir(metricas)
+        db.adicionar_livro(*LIVROS[0])
+        self.assertEqual(db._rastreadores, {})
+        self.assertEqual(metricas.estatisticas()['sql'], [])
+        self.assertIn('livros.adicionar', metricas.estatisticas()['operacoes'])
+
+
+class TestMetricasSistema(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.diretorio)
+        with redirect_stdout(io.StringIO()):
+            self.sistema = SistemaLivraria(str(self.diretorio / "sistema"))
+        self.addCleanup(self.sistema.close)
+
+    def test_definir_metricas_liga_e_desliga(self):
+        metricas = Metricas(arquivo=str(self.diretorio / "metricas.json"))
+        self.sistema.definir_metricas(metricas)
+        self.assertIs(self.sistema.db_manager.metricas, metricas)
+        self.assertIs(self.sistema.gerenciador_arquivos.metricas, metricas)
+
+        self.sistema.db_manager.adicionar_livros_em_lote(LIVROS)
+        self.assertIsNotNone(self.sistema.compactar_registro_se_necessario())
+        estatisticas = metricas.estatisticas()
+        self.assertIn('backup.completo', estatisticas['operacoes'])
+        self.assertGreater(estatisticas['contadores']['backup.bytes_copiados'], 0)
+
+        caminho = metricas.salvar()
+        with open(caminho, encoding='utf-8') as arquivo:
+            self.assertIn('livros.adicionar_em_lote', json.load(arquivo)['operacoes'])
+
+        self.sistema.definir_metricas(None)
+        self.assertIsNone(self.sistema.db_manager.metricas)
+        self.assertIsNone(self.sistema.gerenciador_arquivos.metricas)
+        self.sistema.db_manager.contar_livros()
+        self.assertNotIn('livros.contar', metricas.estatisticas()['operacoes'])
+
+
+if __name__ == '__main__':
+    unittest.main()
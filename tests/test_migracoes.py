@@ -0,0 +1,96 @@
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from sistema_livraria import DatabaseManager
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+class TestMigracoes(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.diretorio)
+
+    def _livros(self, caminho: Path):
+        with sqlite3.connect(caminho) as conn:
+            return conn.execute('SELECT id, titulo, autor, ano_publicacao, preco FROM livros ORDER BY id').fetchall()
+
+    def test_atualiza_banco_versionado_do_repositorio(self):
+        # data/livraria.db é anterior às migrações (user_version 0, só a tabela livros)
+        caminho = self.diretorio / "livraria.db"
+        shutil.copy(RAIZ / "data" / "livraria.db", caminho)
+        originais = self._livros(caminho)
+        self.assertTrue(originais)
+
+        db = DatabaseManager(str(caminho), perfil=None)
+        ultima_versao = db._migracoes()[-1][0]
+        self.assertEqual(db.versao_esquema(), ultima_versao)
+        self.assertEqual(self._livros(caminho), originais)
+
+        with sqlite3.connect(caminho) as conn:
+            indices = {nome for (nome,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            tabelas = {nome for (nome,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            estatisticas_fts = conn.execute(
+                "SELECT COUNT(*) FROM sqlite_stat1 WHERE tbl LIKE 'livros_fts%'").fetchone()[0]
+        for indice in ('idx_livros_titulo', 'idx_livros_autor_titulo', 'idx_livros_ano',
+                       'idx_livros_preco', 'idx_alteracoes_momento', 'idx_livros_chave_natural'):
+            self.assertIn(indice, indices)
+        for tabela in ('livros_fts', 'livros_alteracoes', 'estatisticas_autor', 'estatisticas_decada'):
+            self.assertIn(tabela, tabelas)
+        self.assertEqual(estatisticas_fts, 0)
+
+        # O índice de busca e as estatísticas cobrem os livros que já existiam
+        titulo, autor = originais[0][1], originais[0][2]
+        self.assertIn(originais[0][0], [livro[0] for livro in db.buscar_livros(titulo.split()[0])])
+        self.assertIn(originais[0][0], [livro[0] for livro in db.buscar_livros_por_autor(autor)])
+        self.assertEqual(db.obter_estatisticas()['total_livros'], len(originais))
+        db.close()
+
+        # Reabrir não reaplica nada
+        db = DatabaseManager(str(caminho), perfil=None)
+        self.assertEqual(db.versao_esquema(), ultima_versao)
+        self.assertEqual(self._livros(caminho), originais)
+        db.close()
+
+    def test_banco_novo_nao_registra_estatisticas_vazias(self):
+        # Estatísticas coletadas com o banco vazio deixam as cargas em massa lentas
+        caminho = self.diretorio / "novo.db"
+        DatabaseManager(str(caminho), perfil=None).close()
+        with sqlite3.connect(caminho) as conn:
+            tabela = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+            linhas = conn.execute('SELECT COUNT(*) FROM sqlite_stat1').fetchone()[0] if tabela else 0
+        self.assertEqual(linhas, 0)
+
+    def _estatisticas(self, caminho: Path):
+        with sqlite3.connect(caminho) as conn:
+            return sorted(conn.execute('SELECT tbl, idx, stat FROM sqlite_stat1'))
+
+    def test_estatisticas_iguais_qualquer_que_seja_a_migracao(self):
+        caminho = self.diretorio / "livraria.db"
+        shutil.copy(RAIZ / "data" / "livraria.db", caminho)
+        DatabaseManager(str(caminho), perfil=None).close()
+        esperadas = self._estatisticas(caminho)
+        self.assertTrue(esperadas)
+        self.assertEqual({tbl for tbl, _, _ in esperadas}, {'livros'})
+
+        # Banco que chegou à versão 7 com as estatísticas de um ANALYZE do banco inteiro
+        antigo = self.diretorio / "antigo.db"
+        shutil.copy(RAIZ / "data" / "livraria.db", antigo)
+        DatabaseManager(str(antigo), perfil=None).close()
+        with sqlite3.connect(antigo) as conn:
+            conn.execute('ANALYZE')
+            conn.execute('PRAGMA user_version = 7')
+        conn.close()
+        self.assertNotEqual(self._estatisticas(antigo), esperadas)
+
+        db = DatabaseManager(str(antigo), perfil=None)
+        self.assertEqual(db.versao_esquema(), 8)
+        db.close()
+        self.assertEqual(self._estatisticas(antigo), esperadas)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from sistema_livraria import COLUNAS_CSV, DatabaseManager
+
+
+class TestPaginacaoPorChave(unittest.TestCase):
+    def setUp(self):
+        diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, diretorio)
+        self.db = DatabaseManager(str(diretorio / "livraria.db"))
+        self.addCleanup(self.db.close)
+        # Títulos e preços repetidos: a ordem entre eles é decidida pelo id
+        self.db.adicionar_livros_em_lote([(f"Livro {i % 7}", f"Autor {i}", 1900 + i, float(10 + i % 4))
+                                          for i in range(23)])
+
+    def _ordenados(self, ordenar_por: str) -> list:
+        return sorted(self.db.iterar_livros(), key=lambda livro: DatabaseManager.chave_listagem(livro, ordenar_por))
+
+    def _paginas(self, ordenar_por: str, limite: int) -> list:
+        paginas, chave = [], None
+        while True:
+            pagina = self.db.listar_livros(chave, limite, ordenar_por)
+            if not pagina:
+                return paginas
+            paginas.append(pagina)
+            chave = DatabaseManager.chave_listagem(pagina[-1], ordenar_por)
+
+    def test_avancar_percorre_tudo_sem_repetir(self):
+        for ordenar_por in ('titulo', 'preco', 'id'):
+            with self.subTest(ordenar_por=ordenar_por):
+                paginas = self._paginas(ordenar_por, 5)
+                self.assertEqual([len(pagina) for pagina in paginas], [5, 5, 5, 5, 3])
+                self.assertEqual([livro for pagina in paginas for livro in pagina], self._ordenados(ordenar_por))
+
+    def test_voltar_com_chave_antes(self):
+        for ordenar_por in ('titulo', 'preco', 'id'):
+            with self.subTest(ordenar_por=ordenar_por):
+                paginas = self._paginas(ordenar_por, 5)
+                for anterior, atual in zip(paginas, paginas[1:]):
+                    chave = DatabaseManager.chave_listagem(atual[0], ordenar_por)
+                    self.assertEqual(self.db.listar_livros(limite=5, ordenar_por=ordenar_por, chave_antes=chave),
+                                     anterior)
+
+    def test_chave_da_pagina_salta_direto(self):
+        for ordenar_por in ('titulo', 'preco', 'id'):
+            with self.subTest(ordenar_por=ordenar_por):
+                paginas = self._paginas(ordenar_por, 5)
+                self.assertIsNone(self.db.chave_da_pagina(1, 5, ordenar_por))
+                for numero, pagina in enumerate(paginas, start=1):
+                    chave = self.db.chave_da_pagina(numero, 5, ordenar_por)
+                    self.assertEqual(self.db.listar_livros(chave, 5, ordenar_por), pagina)
+                # Depois da última página não há chave
+                self.assertIsNone(self.db.chave_da_pagina(len(paginas) + 1, 5, ordenar_por))
+
+    def test_ordenacao_invalida(self):
+        self.assertNotIn('isbn', COLUNAS_CSV)
+        with self.assertRaises(ValueError):
+            self.db.listar_livros(ordenar_por='isbn')
+        with self.assertRaises(ValueError):
+            self.db.chave_da_pagina(2, ordenar_por='isbn; DROP TABLE livros')
+
+
+if __name__ == '__main__':
+    unittest.main()
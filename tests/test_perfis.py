@@ -0,0 +1,57 @@
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from sistema_livraria import PERFIS_DURABILIDADE, DatabaseManager
+
+# Valores devolvidos por PRAGMA synchronous
+SYNCHRONOUS = {'OFF': 0, 'NORMAL': 1, 'FULL': 2}
+
+
+class TestPerfisDurabilidade(unittest.TestCase):
+    def setUp(self):
+        diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, diretorio)
+        self.caminho_db = str(diretorio / "livraria.db")
+
+    def test_pragmas_de_cada_perfil(self):
+        for perfil, pragmas in PERFIS_DURABILIDADE.items():
+            with self.subTest(perfil=perfil), DatabaseManager(self.caminho_db, tamanho_pool=1, perfil=perfil) as db:
+                with db._conexao() as conn:
+                    self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+                    self.assertEqual(conn.execute('PRAGMA synchronous').fetchone()[0],
+                                     SYNCHRONOUS[pragmas['synchronous']])
+                    self.assertEqual(conn.execute('PRAGMA cache_size').fetchone()[0], pragmas['cache_size'])
+                    self.assertEqual(conn.execute('PRAGMA busy_timeout').fetchone()[0], pragmas['busy_timeout'])
+
+    def test_sem_perfil_usa_padroes_do_sqlite(self):
+        with DatabaseManager(self.caminho_db, perfil=None) as db:
+            with db._conexao() as conn:
+                self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'delete')
+                self.assertEqual(conn.execute('PRAGMA synchronous').fetchone()[0], SYNCHRONOUS['FULL'])
+
+    def test_perfil_invalido(self):
+        with self.assertRaisesRegex(ValueError, "Perfil inválido"):
+            DatabaseManager(self.caminho_db, perfil='turbo')
+        self.assertFalse(Path(self.caminho_db).exists())
+
+    def test_leitor_nao_bloqueia_escritor(self):
+        # Com WAL, uma leitura em andamento não impede o commit de outra conexão
+        with DatabaseManager(self.caminho_db, tamanho_pool=2) as db:
+            db.adicionar_livro("Helena", "Machado de Assis", 1876, 15.0)
+            leitor = sqlite3.connect(self.caminho_db)
+            self.addCleanup(leitor.close)
+            leitor.execute('BEGIN')
+            self.assertEqual(leitor.execute('SELECT COUNT(*) FROM livros').fetchone()[0], 1)
+
+            db.adicionar_livro("Iracema", "José de Alencar", 1865, 20.0)
+            # O leitor continua vendo o retrato do início da sua transação
+            self.assertEqual(leitor.execute('SELECT COUNT(*) FROM livros').fetchone()[0], 1)
+            leitor.execute('COMMIT')
+            self.assertEqual(leitor.execute('SELECT COUNT(*) FROM livros').fetchone()[0], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
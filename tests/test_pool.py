@@ -0,0 +1,130 @@
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from sistema_livraria import DatabaseManager
+
+
+class TestPoolConexoes(unittest.TestCase):
+    def setUp(self):
+        diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, diretorio)
+        self.caminho_db = str(diretorio / "livraria.db")
+
+    def _abrir(self, tamanho_pool: int = 1) -> DatabaseManager:
+        db = DatabaseManager(self.caminho_db, tamanho_pool)
+        self.addCleanup(db.close)
+        return db
+
+    def _precos(self, db: DatabaseManager) -> list:
+        return [livro[4] for livro in db.iterar_livros(ordenar_por='id')]
+
+    def test_uso_aninhado_na_mesma_thread(self):
+        # Com uma única conexão, a thread que percorre iterar_livros reutiliza a sua
+        # conexão nas operações feitas dentro do laço em vez de esperar por outra
+        db = self._abrir(tamanho_pool=1)
+        db.adicionar_livro("Helena", "Machado de Assis", 1876, 15.0)
+        db.adicionar_livro("Iracema", "José de Alencar", 1865, 20.0)
+
+        lidos = []
+        for livro in db.iterar_livros(ordenar_por='id'):
+            lidos.append(db.obter_livro_por_id(livro[0]))
+            db.atualizar_preco_livro(livro[0], livro[4] + 1)
+
+        self.assertEqual([livro[1] for livro in lidos], ["Helena", "Iracema"])
+        self.assertEqual(self._precos(db), [16.0, 21.0])
+        self.assertEqual(db._conexoes_abertas, 1)
+        self.assertEqual(db._pool.qsize(), 1)
+
+    def test_erro_aninhado_desfaz_so_a_operacao(self):
+        db = self._abrir(tamanho_pool=1)
+        db.adicionar_livro("Helena", "Machado de Assis", 1876, 15.0)
+
+        for livro in db.iterar_livros(ordenar_por='id'):
+            with self.assertRaises(sqlite3.IntegrityError):
+                db.adicionar_livro("helena", "MACHADO DE ASSIS", 1876, 10.0)
+            db.atualizar_preco_livro(livro[0], 18.0)
+
+        self.assertEqual(db.contar_livros(), 1)
+        self.assertEqual(self._precos(db), [18.0])
+
+    def test_pool_cheio_em_outra_thread(self):
+        db = self._abrir(tamanho_pool=1)
+        db.adicionar_livro("Helena", "Machado de Assis", 1876, 15.0)
+        db.espera_maxima_pool = 0.1
+        erros = []
+
+        def ler():
+            try:
+                db.obter_livro_por_id(1)
+            except sqlite3.OperationalError as e:
+                erros.append(str(e))
+
+        iterador = db.iterar_livros()
+        next(iterador)
+        thread = threading.Thread(target=ler)
+        thread.start()
+        thread.join()
+        self.assertEqual(len(erros), 1)
+        self.assertIn("Nenhuma conexão livre", erros[0])
+
+        # Devolvida a conexão, a outra thread volta a conseguir ler
+        iterador.close()
+        thread = threading.Thread(target=ler)
+        thread.start()
+        thread.join()
+        self.assertEqual(len(erros), 1)
+
+    def test_close(self):
+        for tamanho_pool in (0, 2):
+            with self.subTest(tamanho_pool=tamanho_pool):
+                db = DatabaseManager(self.caminho_db, tamanho_pool)
+                db.adicionar_livro(f"Livro {tamanho_pool}", "Autor", 2000, 10.0)
+                db.close()
+                self.assertEqual(db._pool.qsize(), 0)
+                if tamanho_pool:
+                    with self.assertRaises(sqlite3.ProgrammingError):
+                        db.contar_livros()
+
+    def test_gerenciador_de_contexto(self):
+        with DatabaseManager(self.caminho_db, tamanho_pool=2) as db:
+            db.adicionar_livro("Helena", "Machado de Assis", 1876, 15.0)
+            self.assertEqual(db._pool.qsize(), 1)
+        self.assertEqual(db._pool.qsize(), 0)
+        with DatabaseManager(self.caminho_db) as db:
+            self.assertEqual(db.contar_livros(), 1)
+
+    def test_transacao(self):
+        for tamanho_pool in (0, 1):
+            with self.subTest(tamanho_pool=tamanho_pool):
+                Path(self.caminho_db).unlink(missing_ok=True)
+                db = DatabaseManager(self.caminho_db, tamanho_pool)
+                self.addCleanup(db.close)
+
+                # Uma operação que falha dentro do bloco desfaz só a si mesma (SAVEPOINT)
+                with db.transacao():
+                    db.adicionar_livro("Helena", "Machado de Assis", 1876, 15.0)
+                    with self.assertRaises(sqlite3.IntegrityError):
+                        db.adicionar_livro("Helena", "Machado de Assis", 1876, 10.0)
+                    db.adicionar_livro("Iracema", "José de Alencar", 1865, 20.0)
+                self.assertEqual(db.contar_livros(), 2)
+
+                # Uma exceção que escapa do bloco desfaz todas as operações
+                with self.assertRaises(RuntimeError):
+                    with db.transacao():
+                        db.atualizar_preco_livro(1, 99.0)
+                        db.remover_livro(2)
+                        raise RuntimeError("falha")
+                self.assertEqual(self._precos(db), [15.0, 20.0])
+
+                with db.transacao():
+                    with self.assertRaises(sqlite3.ProgrammingError):
+                        with db.transacao():
+                            pass
+
+
+if __name__ == '__main__':
+    unittest.main()
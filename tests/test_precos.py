@@ -0,0 +1,40 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from sistema_livraria import DatabaseManager
+
+
+class TestPrecos(unittest.TestCase):
+    def setUp(self):
+        diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, diretorio)
+        self.db = DatabaseManager(str(diretorio / "livraria.db"), tamanho_pool=1)
+        self.addCleanup(self.db.close)
+        for titulo, autor in (("Dom Casmurro", "Machado de Assis"), ("Helena", "Machado de Assis"),
+                              ("Iracema", "José de Alencar"), ("Contos", "Machado")):
+            self.db.adicionar_livro(titulo, autor, 1900, 10.0)
+
+    def _precos(self):
+        return [livro[4] for livro in self.db.iterar_livros(ordenar_por='id')]
+
+    def test_aplicar_lista_precos(self):
+        atualizados, nao_encontrados = self.db.aplicar_lista_precos([(1, 20.0), (3, 30.0), (99, 5.0), (1, 25.0), (42, 1.0)])
+        self.assertEqual(atualizados, 2)
+        self.assertEqual(nao_encontrados, [42, 99])
+        self.assertEqual(self._precos(), [25.0, 10.0, 30.0, 10.0])
+        self.assertEqual([a['operacao'] for a in self.db.obter_alteracoes()][4:], ['UPDATE', 'UPDATE'])
+        # A tabela temporária não fica na conexão do pool
+        self.assertEqual(self.db.aplicar_lista_precos([(2, 12.0)]), (1, []))
+
+    def test_reajuste_por_autor_usa_o_nome_exato(self):
+        self.assertEqual(self.db.reajustar_precos(percentual=10, autor_exato="Machado"), 1)
+        self.assertEqual(self._precos(), [10.0, 10.0, 10.0, 11.0])
+        self.assertEqual(self.db.contar_livros(autor_exato="Machado de Assis"), 2)
+        with self.assertRaises(ValueError):
+            self.db.reajustar_precos(valor=1, autor="Machado")
+
+
+if __name__ == '__main__':
+    unittest.main()
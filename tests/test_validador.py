@@ -0,0 +1,54 @@
+import unittest
+
+from sistema_livraria import ValidationError, Validador
+
+
+class TestValidador(unittest.TestCase):
+    def test_ano_aceita_float_inteiro_e_texto(self):
+        self.assertEqual(Validador.validar_ano(2000.0), 2000)
+        self.assertEqual(Validador.validar_ano(" 2000 "), 2000)
+        self.assertEqual(Validador.validar_ano(1999), 1999)
+        for invalido in (2000.5, "2000.0", "abc", None, float('nan')):
+            with self.assertRaises(ValidationError):
+                Validador.validar_ano(invalido)
+
+    def test_preco_aceita_notacao_cientifica_e_virgula(self):
+        self.assertEqual(Validador.validar_preco("1e3"), 1000.0)
+        self.assertEqual(Validador.validar_preco("2.5E1"), 25.0)
+        self.assertEqual(Validador.validar_preco("29,90"), 29.9)
+        self.assertEqual(Validador.validar_preco("1.234,56"), 1234.56)
+        self.assertEqual(Validador.validar_preco(12), 12.0)
+        for invalido in ("nan", "inf", "1e7", "-1", "1,234.56", float('inf')):
+            with self.assertRaises(ValidationError):
+                Validador.validar_preco(invalido)
+
+    def test_lote_igual_a_validacao_individual(self):
+        titulos = ["Livro", "", "Outro", "Mais um", "Último", " x "]
+        autores = ["Autor", "Autor", "", "Autor", "Autor", "Autor"]
+        anos = [2000.0, "1999", 2000, "abc", 1500, "2001"]
+        precos = ["1e3", "10", "10", "10", "-5", 7]
+        resultado = Validador.validar_lote(titulos, autores, anos, precos)
+        self.assertEqual(resultado['validos'], [True, False, False, False, False, True])
+        self.assertEqual(resultado['anos'], [2000, None, None, None, None, 2001])
+        self.assertEqual(resultado['precos'], [1000.0, None, None, None, None, 7.0])
+        self.assertEqual(resultado['titulos'][5], "x")
+
+        for indice, erro in resultado['erros']:
+            validadores = [(Validador.validar_titulo, titulos), (Validador.validar_autor, autores),
+                           (Validador.validar_ano, anos), (Validador.validar_preco, precos)]
+            mensagens = []
+            for validar, coluna in validadores:
+                try:
+                    validar(coluna[indice])
+                except ValidationError as e:
+                    mensagens.append(str(e))
+            self.assertEqual(erro, mensagens[0])
+
+    def test_lote_com_colunas_nativas(self):
+        resultado = Validador.validar_lote(["A", "B"], ["C", "D"], [1990, 2000], [10.0, float('nan')])
+        self.assertEqual(resultado['validos'], [True, False])
+        self.assertEqual(resultado['erros'], [(1, "Preço deve ser um número válido (ex: 29.90 ou 29,90)")])
+
+
+if __name__ == '__main__':
+    unittest.main()